@@ -1,27 +1,49 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, File, UploadFile, Form, Depends, Security, status, Request
+from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Depends, Security, status, Request, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
-from typing import List, Optional, Dict, Any
+from fastapi.responses import Response, StreamingResponse
+from typing import AsyncIterator, List, Optional, Dict, Any
+import asyncio
+import json
 import logging
+import shutil
 import uuid
 from datetime import datetime
 from pathlib import Path
-import aiofiles
 
+from ..core import metrics
 from ..core.config import settings
 from ..models.schemas import (
     VideoCompositionRequest,
     VideoJob,
-    JobsResponse
+    BatchCompositionRequest,
+    BatchJob,
+    BatchStatus,
+    JobSummary,
+    JobsResponse,
+    ChunkedUploadRequest,
+    ChunkedUploadStatus,
+    ChunkedUploadComplete
 )
-from ..models.enums import JobStatus
+from ..models.enums import JobFields, JobStatus
 from ..services.video_processor import VideoProcessor
+from ..services.job_scheduler import AdmissionError, check_composition_limits
+from ..services.batch_planner import BatchPlanner
+from ..services.job_queue import create_job_scheduler
+from ..services.job_events import job_events, job_event, TERMINAL_STATUSES
+from ..services.job_store import job_store
+from ..services.packaging import HLS_MEDIA_TYPES, hls_dir
+from ..services.previews import PREVIEW_MEDIA_TYPES
+from ..services.chunked_uploads import chunked_uploads, UploadNotFoundError, IncompleteUploadError
 from ..utils.file_handlers import (
+    SNIFF_BYTES,
     validate_file_type,
     save_base64_media,
     download_remote_file
 )
+from ..utils.remote_fetcher import remote_fetcher
+from ..utils.range_responses import ranged_file_response
+from ..utils.content_store import ContentTooLargeError, StoredContent, find_content, store_content_addressed
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -46,18 +68,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize VideoProcessor
+# Initialize VideoProcessor and the scheduler feeding it
 video_processor = VideoProcessor()
+job_scheduler = create_job_scheduler(video_processor)
+batch_planner = BatchPlanner(video_processor, job_scheduler)
+background_tasks: List[asyncio.Task] = []
 
-# Global storage for jobs (in a real application, this would be a database)
-jobs_storage: Dict[str, VideoJob] = {}
+@app.on_event("startup")
+async def start_render_workers():
+    """Spawn the render worker pool and scheduler slots before serving requests."""
+    await job_store.start()
+    job_scheduler.start()
+    video_processor.lifecycle.start()
+    if settings.JOB_QUEUE_BACKEND != "local":
+        # Rendering and reclaiming queued jobs happen in src.worker processes; only
+        # batch jobs a crashed API never handed to the queue are recovered here
+        background_tasks.append(asyncio.create_task(recover_interrupted_jobs(stage="planning")))
+        return
+    video_processor.render_executor.start()
+    background_tasks.append(asyncio.create_task(recover_interrupted_jobs()))
+
+async def recover_interrupted_jobs(stage: Optional[str] = None):
+    """Re-queue jobs of crashed processes, rechecking as their leases expire."""
+    while True:
+        try:
+            for job in await job_store.recover_interrupted(stage):
+                try:
+                    await job_scheduler.submit(job)
+                except AdmissionError as e:
+                    job.status = JobStatus.FAILED
+                    job.error_message = str(e)
+                    job.updated_at = datetime.utcnow()
+                    await job_store.update(job)
+        except Exception as e:
+            logger.error(f"Error recovering interrupted jobs: {e}")
+        await asyncio.sleep(settings.JOB_STORE_LEASE_SECONDS)
+
+@app.on_event("shutdown")
+async def stop_render_workers():
+    """Stop the scheduler slots and terminate the render worker pool."""
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await batch_planner.stop()
+    await video_processor.lifecycle.stop()
+    await job_scheduler.stop()
+    video_processor.render_executor.shutdown()
+    await remote_fetcher.aclose()
+    await job_store.close()
 
 async def verify_api_key(
     request: Request,
     credentials: HTTPAuthorizationCredentials = Security(security)
 ):
     """Verify API key for protected endpoints."""
-    if request.url.path in ["/docs", "/redoc", "/openapi.json", "/health"]:
+    if request.url.path in ["/docs", "/redoc", "/openapi.json", "/health", "/metrics"]:
         return True
     
     if credentials.credentials != settings.API_KEY:
@@ -81,37 +146,180 @@ async def health_check():
     """Health check endpoint."""
     return {
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow().isoformat(),
+        **await job_scheduler.stats()
     }
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Render pipeline metrics in the Prometheus text format."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    metrics.set_queue_stats(await job_scheduler.stats())
+    return Response(metrics.latest(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+ALLOWED_UPLOAD_TYPES = {
+    *settings.ALLOWED_IMAGE_TYPES,
+    *settings.ALLOWED_AUDIO_TYPES,
+    *settings.ALLOWED_VIDEO_TYPES
+}
+
+async def _sniffed(chunks: AsyncIterator[bytes], filename: str) -> AsyncIterator[bytes]:
+    """Pass chunks through, rejecting the upload if its magic bytes do not match the extension."""
+    header = b""
+    async for chunk in chunks:
+        if header is not None:
+            header += chunk
+            if len(header) < SNIFF_BYTES:
+                continue
+            if not validate_file_type(filename, ALLOWED_UPLOAD_TYPES, header[:SNIFF_BYTES]):
+                raise HTTPException(status_code=400, detail="File content does not match its type")
+            chunk, header = header, None
+        yield chunk
+    if header is not None:
+        if not validate_file_type(filename, ALLOWED_UPLOAD_TYPES, header):
+            raise HTTPException(status_code=400, detail="File content does not match its type")
+        yield header
+
+def _stored_content(stored: StoredContent) -> Dict[str, Any]:
+    return {
+        "file_path": str(stored.path),
+        "content_hash": stored.content_hash,
+        "size": stored.size,
+        "deduplicated": stored.deduplicated
+    }
+
+async def _store_upload(chunks: AsyncIterator[bytes], filename: str) -> Dict[str, Any]:
+    """Store an upload content-addressed and describe the result."""
+    try:
+        stored = await store_content_addressed(_sniffed(chunks, filename), Path(filename).suffix)
+    except ContentTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    return _stored_content(stored)
+
 @app.post("/upload", dependencies=[Depends(verify_api_key)])
 async def upload_file(file: UploadFile = File(...)):
     """Upload a single media file."""
-    if not validate_file_type(file.filename, {
-        *settings.ALLOWED_IMAGE_TYPES,
-        *settings.ALLOWED_AUDIO_TYPES,
-        *settings.ALLOWED_VIDEO_TYPES
-    }):
+    if not validate_file_type(file.filename, ALLOWED_UPLOAD_TYPES):
         raise HTTPException(
             status_code=400,
             detail="File type not allowed"
         )
+    if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds maximum allowed size ({settings.MAX_FILE_SIZE})"
+        )
 
-    file_path = settings.UPLOAD_DIR / f"{uuid.uuid4()}{Path(file.filename).suffix}"
-    
+    async def chunks():
+        while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+    return await _store_upload(chunks(), file.filename)
+
+@app.post("/upload/raw", dependencies=[Depends(verify_api_key)])
+async def upload_raw_file(request: Request, filename: str):
+    """Upload a media file sent as the raw request body.
+
+    The body is streamed straight to disk without multipart spooling.
+    """
+    if not validate_file_type(filename, ALLOWED_UPLOAD_TYPES):
+        raise HTTPException(
+            status_code=400,
+            detail="File type not allowed"
+        )
     try:
-        async with aiofiles.open(file_path, 'wb') as f:
-            while chunk := await file.read(8192):
-                await f.write(chunk)
-        return {"file_path": str(file_path)}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        content_length = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid Content-Length header"
+        )
+    if content_length > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds maximum allowed size ({settings.MAX_FILE_SIZE})"
+        )
+
+    return await _store_upload(request.stream(), filename)
+
+@app.api_route("/upload/{content_hash}", methods=["GET", "HEAD"], dependencies=[Depends(verify_api_key)])
+async def get_upload(content_hash: str):
+    """Check whether content with this SHA-256 hash is already uploaded."""
+    path = find_content(content_hash.lower())
+    if path is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Content not found"
+        )
+    return {
+        "file_path": str(path),
+        "content_hash": content_hash.lower(),
+        "size": path.stat().st_size
+    }
+
+@app.post("/uploads", response_model=ChunkedUploadStatus, dependencies=[Depends(verify_api_key)])
+async def create_chunked_upload(upload: ChunkedUploadRequest):
+    """Start a resumable upload; send chunks with PUT /uploads/{upload_id}/chunks/{index}."""
+    if not validate_file_type(upload.filename, ALLOWED_UPLOAD_TYPES):
+        raise HTTPException(
+            status_code=400,
+            detail="File type not allowed"
+        )
+    try:
+        return await asyncio.to_thread(chunked_uploads.create, upload.filename, upload.size, upload.content_hash)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+@app.get("/uploads/{upload_id}", response_model=ChunkedUploadStatus, dependencies=[Depends(verify_api_key)])
+async def get_chunked_upload(upload_id: str):
+    """Report which chunks were received, to resume an interrupted upload."""
+    try:
+        return chunked_uploads.status(upload_id)
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.put("/uploads/{upload_id}/chunks/{index}", dependencies=[Depends(verify_api_key)])
+async def put_upload_chunk(upload_id: str, index: int, request: Request):
+    """Write one chunk; an optional X-Chunk-SHA256 header is checked on arrival."""
+    try:
+        chunk_hash = await chunked_uploads.write_chunk(
+            upload_id,
+            index,
+            request.stream(),
+            request.headers.get("x-chunk-sha256")
+        )
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"index": index, "sha256": chunk_hash}
+
+@app.post("/uploads/{upload_id}/complete", dependencies=[Depends(verify_api_key)])
+async def complete_chunked_upload(upload_id: str, completion: ChunkedUploadComplete = ChunkedUploadComplete()):
+    """Verify all chunks and store the assembled file content-addressed."""
+    try:
+        stored = await chunked_uploads.complete(upload_id, completion.chunk_hashes)
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except IncompleteUploadError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _stored_content(stored)
+
+@app.delete("/uploads/{upload_id}", dependencies=[Depends(verify_api_key)])
+async def abort_chunked_upload(upload_id: str):
+    """Abandon a chunked upload and discard its chunks."""
+    try:
+        chunked_uploads.status(upload_id)
+    except UploadNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    chunked_uploads.abort(upload_id)
+    return {"message": "Upload aborted"}
 
 @app.post("/compose", response_model=Dict[str, str], dependencies=[Depends(verify_api_key)])
-async def create_composition(
-    request: VideoCompositionRequest,
-    background_tasks: BackgroundTasks
-):
+async def create_composition(request: VideoCompositionRequest):
     """Create a new video composition."""
     job_id = str(uuid.uuid4())
     job = VideoJob(
@@ -120,48 +328,160 @@ async def create_composition(
         status=JobStatus.PENDING
     )
     
-    jobs_storage[job_id] = job
-    background_tasks.add_task(video_processor.process_job, job)
-    
+    # Persist the job, which pins its uploads, before any worker can pick it up
+    await job_store.save(job)
+    try:
+        await job_scheduler.submit(job)
+    except AdmissionError as e:
+        await job_store.delete(job_id)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e)
+        )
+
     return {"job_id": job_id}
 
+@app.post("/compose/batch", response_model=Dict[str, Any], dependencies=[Depends(verify_api_key)])
+async def create_batch_composition(batch_request: BatchCompositionRequest):
+    """Create a batch of compositions planned together so shared inputs and segments are processed once."""
+    if len(batch_request.compositions) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch has {len(batch_request.compositions)} compositions; maximum is {settings.BATCH_MAX_ITEMS}"
+        )
+
+    batch_id = str(uuid.uuid4())
+    jobs = [
+        VideoJob(id=str(uuid.uuid4()), request=request, status=JobStatus.PENDING, stage="planning", batch_id=batch_id)
+        for request in batch_request.compositions
+    ]
+    for index, job in enumerate(jobs):
+        try:
+            check_composition_limits(job)
+        except AdmissionError as e:
+            raise HTTPException(status_code=400, detail=f"Composition {index}: {e}")
+
+    batch = BatchJob(id=batch_id, job_ids=[job.id for job in jobs])
+    await job_store.save_batch(batch)
+    for job in jobs:
+        await job_store.save(job)
+    batch_planner.dispatch(batch, jobs)
+    return {"batch_id": batch_id, "job_ids": batch.job_ids}
+
+@app.get("/compose/batch/{batch_id}", response_model=BatchStatus, dependencies=[Depends(verify_api_key)])
+async def get_batch_status(batch_id: str):
+    """Get the plan and per-job status of a batch."""
+    batch = await job_store.get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Batch not found"
+        )
+
+    jobs = await job_store.get_many(batch.job_ids)
+    counts = {job_status: 0 for job_status in JobStatus}
+    for job in jobs:
+        counts[job.status] += 1
+    if all(job.status in TERMINAL_STATUSES for job in jobs):
+        batch_status = JobStatus.FAILED if counts[JobStatus.FAILED] else JobStatus.COMPLETED
+    elif counts[JobStatus.PENDING] == len(jobs):
+        batch_status = JobStatus.PENDING
+    else:
+        batch_status = JobStatus.PROCESSING
+    return BatchStatus(
+        batch=batch,
+        status=batch_status,
+        counts=counts,
+        jobs=[JobSummary.from_job(job) for job in jobs]
+    )
+
 @app.get("/job/{job_id}", response_model=VideoJob, dependencies=[Depends(verify_api_key)])
 async def get_job_status(job_id: str):
     """Get the status of a specific job."""
-    if job_id not in jobs_storage:
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found"
+        )
+    return job
+
+@app.get("/job/{job_id}/events", dependencies=[Depends(verify_api_key)])
+async def stream_job_events(job_id: str, request: Request):
+    """Stream a job's progress as server-sent events until it finishes."""
+    job = await job_store.get(job_id)
+    if job is None:
         raise HTTPException(
             status_code=404,
             detail="Job not found"
         )
-    return jobs_storage[job_id]
+
+    async def event_stream():
+        queue = job_events.subscribe(job_id)
+        try:
+            event = job_event(job)
+            while True:
+                yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+                if JobStatus(event["status"]) in TERMINAL_STATUSES:
+                    break
+                try:
+                    event = await asyncio.wait_for(queue.get(), settings.PROGRESS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    # Jobs rendered by another worker only surface through the store
+                    current = await job_store.get(job_id)
+                    if current is None:
+                        break
+                    event = job_event(current)
+        finally:
+            job_events.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/jobs", response_model=JobsResponse, dependencies=[Depends(verify_api_key)])
 async def list_jobs(
     status: Optional[JobStatus] = None,
-    limit: int = 10,
-    offset: int = 0
+    limit: int = Query(10, ge=1, le=500),
+    cursor: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    fields: JobFields = JobFields.FULL
 ):
-    """List all jobs with optional filtering."""
-    filtered_jobs = [
-        job for job in jobs_storage.values()
-        if status is None or job.status == status
-    ]
-    
+    """List jobs newest first with optional filtering.
+
+    Pass ``next_cursor`` from the previous page as ``cursor`` to paginate;
+    ``fields=summary`` omits the request body of each job.
+    """
+    try:
+        page = await job_store.list(
+            status,
+            limit,
+            cursor=cursor,
+            offset=offset,
+            summary=fields == JobFields.SUMMARY
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return JobsResponse(
-        total=len(filtered_jobs),
-        jobs=filtered_jobs[offset:offset + limit]
+        total=page.total,
+        jobs=page.jobs,
+        next_cursor=page.next_cursor
     )
 
 @app.get("/download/{job_id}", dependencies=[Depends(verify_api_key)])
-async def download_video(job_id: str):
+async def download_video(job_id: str, request: Request):
     """Download the processed video."""
-    if job_id not in jobs_storage:
+    job = await job_store.get(job_id)
+    if job is None:
         raise HTTPException(
             status_code=404,
             detail="Job not found"
         )
     
-    job = jobs_storage[job_id]
     if job.status != JobStatus.COMPLETED:
         raise HTTPException(
             status_code=400,
@@ -174,27 +494,73 @@ async def download_video(job_id: str):
             detail="Output file not found"
         )
     
-    return FileResponse(
-        job.output_path,
+    return await ranged_file_response(
+        request,
+        Path(job.output_path),
         media_type="video/mp4",
         filename=f"video_{job_id}.mp4"
     )
 
+@app.get("/job/{job_id}/hls/{filename}", dependencies=[Depends(verify_api_key)])
+async def get_hls_file(job_id: str, filename: str, request: Request):
+    """Serve the HLS playlist and fMP4 segments of a job packaged with package_hls."""
+    job = await job_store.get(job_id)
+    if job is None or not job.hls_playlist:
+        raise HTTPException(
+            status_code=404,
+            detail="HLS rendition not found"
+        )
+
+    path = Path(job.hls_playlist).parent / filename
+    media_type = HLS_MEDIA_TYPES.get(path.suffix)
+    if Path(filename).name != filename or media_type is None or not path.exists():
+        raise HTTPException(
+            status_code=404,
+            detail="HLS file not found"
+        )
+    return await ranged_file_response(request, path, media_type=media_type)
+
+@app.get("/job/{job_id}/preview", dependencies=[Depends(verify_api_key)])
+async def get_preview(job_id: str, request: Request):
+    """Serve the draft proxy or contact sheet of a job rendered with a preview mode."""
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found"
+        )
+
+    if not job.preview_path or not Path(job.preview_path).exists():
+        raise HTTPException(
+            status_code=404,
+            detail="Preview not ready"
+        )
+    return await ranged_file_response(
+        request,
+        Path(job.preview_path),
+        media_type=PREVIEW_MEDIA_TYPES[job.request.settings.preview]
+    )
+
 @app.delete("/job/{job_id}", dependencies=[Depends(verify_api_key)])
 async def delete_job(job_id: str):
     """Delete a job and its associated files."""
-    if job_id not in jobs_storage:
+    job = await job_store.get(job_id)
+    if job is None:
         raise HTTPException(
             status_code=404,
             detail="Job not found"
         )
     
-    job = jobs_storage[job_id]
-    if job.output_path:
+    await job_scheduler.cancel(job_id)
+    # Cached renders may be shared with other jobs; the cache evicts them
+    if job.output_path and not video_processor.render_cache.contains(job.output_path):
         try:
             Path(job.output_path).unlink(missing_ok=True)
+            shutil.rmtree(hls_dir(Path(job.output_path)), ignore_errors=True)
         except Exception as e:
             logger.error(f"Error deleting output file: {e}")
+    if job.preview_path:
+        Path(job.preview_path).unlink(missing_ok=True)
     
-    del jobs_storage[job_id]
+    await job_store.delete(job_id)
     return {"message": "Job deleted successfully"}
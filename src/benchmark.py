@@ -0,0 +1,301 @@
+"""Render benchmark over a matrix of synthetic compositions.
+
+Run with ``python -m src.benchmark``; results are written as JSON so runs
+can be compared across commits::
+
+    python -m src.benchmark --scenes 2,6 --qualities 480p,1080p --output before.json
+"""
+import argparse
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .core.config import settings
+from .models.enums import RenderEngine, TransitionType, VideoQuality
+from .models.schemas import VideoCompositionRequest
+
+logger = logging.getLogger(__name__)
+
+SOURCE_SIZE = (1280, 720)
+CLIP_FPS = 30
+CLIP_SECONDS = 4.0
+AUDIO_SECONDS = 10.0
+SCENE_SECONDS = 2.0
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+def _write_image(path: Path, pixels: np.ndarray) -> str:
+    Image.fromarray(pixels).save(path)
+    return str(path)
+
+def _gradient(width: int, height: int, phase: float = 0.0) -> np.ndarray:
+    x = np.linspace(0.0, 1.0, width, dtype=np.float32)[None, :]
+    y = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+    channels = [
+        np.broadcast_to((x + phase) % 1.0, (height, width)),
+        np.broadcast_to(y, (height, width)),
+        (x * y + phase) % 1.0
+    ]
+    return (np.stack(channels, axis=-1) * 255).astype(np.uint8)
+
+def _write_clip(path: Path) -> str:
+    width, height = SOURCE_SIZE[0] // 2, SOURCE_SIZE[1] // 2
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), CLIP_FPS, (width, height))
+    try:
+        for index in range(int(CLIP_SECONDS * CLIP_FPS)):
+            frame = _gradient(width, height, phase=index / (CLIP_SECONDS * CLIP_FPS))
+            writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+    finally:
+        writer.release()
+    return str(path)
+
+def _write_sine(path: Path, frequency: float) -> str:
+    t = np.arange(int(AUDIO_SECONDS * settings.AUDIO_SAMPLE_RATE)) / settings.AUDIO_SAMPLE_RATE
+    tone = (0.3 * np.sin(2 * math.pi * frequency * t) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as output:
+        output.setnchannels(2)
+        output.setsampwidth(2)
+        output.setframerate(settings.AUDIO_SAMPLE_RATE)
+        output.writeframes(np.repeat(tone[:, None], 2, axis=1).tobytes())
+    return str(path)
+
+def generate_media(media_dir: Path) -> Dict[str, str]:
+    """Write the synthetic images, clip, audio and watermark used by every case."""
+    media_dir.mkdir(parents=True, exist_ok=True)
+    width, height = SOURCE_SIZE
+    watermark = np.zeros((96, 96, 4), dtype=np.uint8)
+    watermark[16:80, 16:80] = (255, 255, 255, 200)
+    return {
+        "solid": _write_image(media_dir / "solid.png", np.full((height, width, 3), (40, 90, 160), dtype=np.uint8)),
+        "gradient": _write_image(media_dir / "gradient.jpg", _gradient(width, height)),
+        "clip": _write_clip(media_dir / "clip.mp4"),
+        "audio": _write_sine(media_dir / "tone.wav", 440.0),
+        "watermark": _write_image(media_dir / "watermark.png", watermark)
+    }
+
+def build_request(
+    media: Dict[str, str],
+    scenes: int,
+    transition: TransitionType,
+    overlays: bool,
+    content: str,
+    quality: VideoQuality,
+    engine: RenderEngine
+) -> VideoCompositionRequest:
+    """A composition of `scenes` scenes of images, clips or both."""
+    sources = {
+        "images": [media["solid"], media["gradient"]],
+        "clips": [media["clip"]],
+        "mixed": [media["solid"], media["clip"], media["gradient"]]
+    }[content]
+    return VideoCompositionRequest(
+        scenes=[
+            {
+                "media_path": sources[index % len(sources)],
+                "duration": SCENE_SECONDS,
+                "transition": transition,
+                "transition_duration": 0.5,
+                "text_overlays": [{"text": f"Scene {index + 1}", "end_time": SCENE_SECONDS / 2}] if overlays else []
+            }
+            for index in range(scenes)
+        ],
+        settings={
+            "video_settings": {"quality": quality},
+            "background_audio": {"media_path": media["audio"], "volume": 0.5, "loop": True},
+            "watermark_path": media["watermark"] if overlays else None,
+            "render_engine": engine
+        }
+    )
+
+def _tree_rss_bytes(root: int) -> int:
+    """Resident memory of a process and all of its descendants, from /proc."""
+    parents: Dict[int, List[int]] = {}
+    for stat_path in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            # The command name may contain spaces, so split after its closing parenthesis
+            fields = stat_path.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        parents.setdefault(int(fields[1]), []).append(int(stat_path.parent.name))
+
+    total = 0
+    pending = [root]
+    while pending:
+        pid = pending.pop()
+        pending.extend(parents.get(pid, []))
+        try:
+            # statm reports pages; the second field is resident
+            total += int(Path(f"/proc/{pid}/statm").read_text().split()[1]) * PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+class _TreeRssSampler:
+    """Samples the combined RSS of this process and its children in the background.
+
+    ``RUSAGE_CHILDREN`` only reports the largest single waited-for child, and a
+    forked child is charged the pages it shares with the parent, so it cannot
+    show ffmpeg and the renderer resident at the same time.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "_TreeRssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        pid = os.getpid()
+        while True:
+            self.peak_bytes = max(self.peak_bytes, _tree_rss_bytes(pid))
+            if self._stop.wait(self.interval):
+                break
+
+def _run_case(request_json: str, output_path: str) -> Dict[str, Any]:
+    """Render one case in a fresh worker process and measure it."""
+    from .services.timeline import scene_start_times
+    from .services.render_pipeline import RenderPipeline
+
+    request = VideoCompositionRequest.model_validate_json(request_json)
+    with _TreeRssSampler() as sampler:
+        started = time.perf_counter()
+        result = RenderPipeline().render(request, Path(output_path))
+        wall_seconds = time.perf_counter() - started
+    _, duration = scene_start_times(request.scenes)
+    frames = round(duration * request.settings.video_settings.fps)
+    return {
+        "engine": result["engine"],
+        "encoding_profile": result["encoding_profile"]["name"],
+        "wall_seconds": round(wall_seconds, 3),
+        "frames": frames,
+        "fps": round(frames / wall_seconds, 1),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_children_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        # Renderer and encoder processes resident at the same moment
+        "peak_total_rss_mb": round(sampler.peak_bytes / 1024 / 1024, 1),
+        "output_bytes": Path(output_path).stat().st_size,
+        "stage_timings": {stage: round(seconds, 3) for stage, seconds in result["stage_timings"].items()}
+    }
+
+def _summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The median run, with every run's wall time kept for spread."""
+    median = sorted(runs, key=lambda run: run["wall_seconds"])[len(runs) // 2]
+    return {**median, "runs": [run["wall_seconds"] for run in runs]}
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    matrix = list(itertools.product(
+        args.scenes, args.transitions, args.overlays, args.content, args.qualities, args.engines
+    ))
+    results = []
+    with tempfile.TemporaryDirectory(prefix="render-benchmark-") as work_dir:
+        work_dir = Path(work_dir)
+        media = generate_media(work_dir / "media")
+        for index, (scenes, transition, overlays, content, quality, engine) in enumerate(matrix, 1):
+            case = f"{scenes}x{content}-{transition.value}-{'overlays' if overlays else 'plain'}-{quality.value}-{engine.value}"
+            request = build_request(media, scenes, transition, overlays, content, quality, engine)
+            runs, error = [], None
+            for repeat in range(max(1, args.repeat)):
+                # Fresh caches and a fresh process per run, so peak RSS and timings are cold
+                run_dir = work_dir / f"{index}-{repeat}"
+                os.environ["GENERATED_DIR"] = str(run_dir / "generated")
+                os.environ["TEMP_DIR"] = str(run_dir / "temp")
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    try:
+                        runs.append(pool.submit(_run_case, request.model_dump_json(), str(run_dir / "output.mp4")).result())
+                    except Exception as e:
+                        error = str(e)
+                        break
+            if error is None:
+                summary = _summarize(runs)
+                logger.info(f"[{index}/{len(matrix)}] {case}: {summary['wall_seconds']}s")
+            else:
+                summary = {"error": error}
+                logger.error(f"[{index}/{len(matrix)}] {case} failed: {error}")
+            results.append({
+                "case": case,
+                "scenes": scenes,
+                "transition": transition.value,
+                "overlays": overlays,
+                "content": content,
+                "quality": quality.value,
+                "requested_engine": engine.value,
+                **summary
+            })
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "results": results
+    }
+
+def _csv(parse):
+    return lambda value: [parse(item.strip()) for item in value.split(",") if item.strip()]
+
+def _overlays(value: str) -> bool:
+    if value not in ("none", "text"):
+        raise argparse.ArgumentTypeError("overlays must be 'none' or 'text'")
+    return value == "text"
+
+def _content(value: str) -> str:
+    if value not in ("images", "clips", "mixed"):
+        raise argparse.ArgumentTypeError("content must be 'images', 'clips' or 'mixed'")
+    return value
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark renders of synthetic compositions.")
+    parser.add_argument("--scenes", type=_csv(int), default=[3], help="scene counts, e.g. 2,6,12")
+    parser.add_argument("--transitions", type=_csv(TransitionType), default=[TransitionType.CUT, TransitionType.CROSSFADE])
+    parser.add_argument("--overlays", type=_csv(_overlays), default=[False, True], help="none,text")
+    parser.add_argument("--content", type=_csv(_content), default=["mixed"], help="images,clips,mixed")
+    parser.add_argument("--qualities", type=_csv(VideoQuality), default=[VideoQuality.LOW])
+    parser.add_argument("--engines", type=_csv(RenderEngine), default=[RenderEngine.AUTO])
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case; the median is reported")
+    parser.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        args.output.write_text(report)
+    else:
+        print(report)
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,46 @@ class Settings(BaseSettings):
     MAX_DURATION_PER_SCENE: int = 60  # seconds
     MAX_TOTAL_DURATION: int = 600  # 10 minutes
     MAX_CONCURRENT_JOBS: int = 5
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    CHUNKED_UPLOAD_CHUNK_SIZE: int = 8 * 1024 * 1024
+    CHUNKED_UPLOAD_TTL: int = 24 * 60 * 60  # seconds before abandoned chunked uploads are removed
+
+    # Rendering
+    RENDER_WORKERS: int = os.cpu_count() or 1
+    SCENE_PREP_CONCURRENCY: int = 8
+    STILL_IMAGE_CACHE_SIZE: int = 32  # decoded, pre-scaled still images
+    OVERLAY_CACHE_SIZE: int = 128  # cached text/watermark layers
+    TRANSITION_MASK_CACHE_SIZE: int = 4  # cached mask fields and affine map sets
+    RENDER_CACHE_MAX_BYTES: int = 20 * 1024 * 1024 * 1024  # 20GB
+    SEGMENT_CACHE_MAX_BYTES: int = 10 * 1024 * 1024 * 1024  # 10GB of per-scene encoded segments
+    HLS_SEGMENT_SECONDS: float = 2.0
+    STILL_GOP_SECONDS: float = 2.0  # still-image GOP encoded once and repeated by stream copy
+
+    # Previews
+    PREVIEW_HEIGHT: int = 360
+    PREVIEW_FPS: int = 15
+    CONTACT_SHEET_COLUMNS: int = 4
+    CONTACT_SHEET_THUMB_WIDTH: int = 320
+
+    # Audio
+    AUDIO_SAMPLE_RATE: int = 44100
+    AUDIO_CHANNELS: int = 2
+    AUDIO_CACHE_MAX_BYTES: int = 5 * 1024 * 1024 * 1024  # 5GB of decoded float32 PCM
+    AUDIO_FADE_SECONDS: float = 2.0
+    AUDIO_NORMALIZE_RMS_DBFS: float = -20.0
+    AUDIO_PEAK_DBFS: float = -1.0  # ceiling for normalization
+    AUDIO_AMPLIFY_DB: float = 6.0
+    AUDIO_NOISE_REDUCTION_DB: float = 18.0  # attenuation of bins below the noise gate
+
+    # Scheduling
+    SCHEDULER_AGING_SECONDS: int = 300  # head start per priority level
+    SCHEDULER_URGENT_SLOTS: int = 1  # slots reserved for urgent jobs
+    SCHEDULER_MAX_QUEUED_JOBS: int = 1000
+    SCHEDULER_MAX_QUEUED_SECONDS: int = 6 * 60 * 60  # total queued video duration
+
+    # Batches
+    BATCH_MAX_ITEMS: int = 500
+    BATCH_POLL_INTERVAL: float = 2.0  # seconds between checks for finished seed jobs
 
     # File Types
     ALLOWED_IMAGE_TYPES: set = {'.jpg', '.jpeg', '.png', '.bmp', '.gif'}
@@ -27,9 +67,42 @@ class Settings(BaseSettings):
     GENERATED_DIR: Path = BASE_DIR / "generated"
     TEMP_DIR: Path = BASE_DIR / "temp"
 
+    # Lifecycle
+    LIFECYCLE_INTERVAL: float = 60.0  # seconds between disk sweeps
+    GENERATED_TTL: int = 7 * 24 * 60 * 60  # seconds since last access before outputs and previews expire
+    UPLOAD_TTL: int = 7 * 24 * 60 * 60  # seconds before unreferenced uploads and downloads expire
+    TEMP_TTL: int = 24 * 60 * 60  # seconds before orphaned scratch directories are removed
+    DISK_HIGH_WATERMARK: float = 0.90  # used fraction of the volume that triggers LRU eviction
+    DISK_LOW_WATERMARK: float = 0.80  # used fraction eviction stops at
+
+    # Job queue
+    JOB_QUEUE_BACKEND: str = os.getenv("JOB_QUEUE_BACKEND", "local")  # "local" or "redis"
+    JOB_QUEUE_STREAM_PREFIX: str = "video_jobs"
+    JOB_QUEUE_VISIBILITY_TIMEOUT: int = 120  # seconds without a heartbeat before a job is reclaimed
+    JOB_QUEUE_HEARTBEAT_INTERVAL: int = 30
+    JOB_QUEUE_MAX_ATTEMPTS: int = 3
+    JOB_QUEUE_BLOCK_SECONDS: float = 5.0
+
+    # Progress events
+    PROGRESS_MIN_INTERVAL: float = 0.5  # seconds between progress events per job
+    PROGRESS_QUEUE_SIZE: int = 32
+    PROGRESS_KEEPALIVE_SECONDS: float = 15.0
+
+    # Remote media
+    DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
+    DOWNLOAD_TIMEOUT: float = 60.0
+    DOWNLOAD_MAX_CONNECTIONS: int = 20
+    REMOTE_CACHE_TTL: int = 300  # seconds before cached URLs are revalidated
+
+    # Metrics
+    METRICS_ENABLED: bool = True
+    WORKER_METRICS_PORT: int = 9100  # Prometheus port of standalone queue workers; 0 disables
+
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./video_jobs.db")
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    JOB_STORE_FLUSH_INTERVAL: float = 1.0  # seconds between batched progress writes
+    JOB_STORE_LEASE_SECONDS: int = 30  # heartbeat age after which a worker's jobs are reclaimed
 
     class Config:
         case_sensitive = True
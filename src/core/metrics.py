@@ -0,0 +1,92 @@
+from collections import Counter as CountTable
+from typing import Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, start_http_server
+
+from .config import settings
+
+registry = CollectorRegistry()
+
+SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+FPS_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+stage_seconds = Histogram(
+    "video_render_stage_seconds", "Time spent in each render stage",
+    ["stage", "engine"], buckets=SECONDS_BUCKETS, registry=registry
+)
+job_seconds = Histogram(
+    "video_job_duration_seconds", "Processing time of finished jobs",
+    ["status"], buckets=SECONDS_BUCKETS, registry=registry
+)
+jobs_finished = Counter("video_jobs_finished", "Finished jobs by status", ["status"], registry=registry)
+encode_fps = Histogram(
+    "video_encode_fps", "Output frames per second of encode time",
+    ["engine", "profile"], buckets=FPS_BUCKETS, registry=registry
+)
+queued_jobs = Gauge("video_jobs_queued", "Jobs waiting for a render slot", registry=registry)
+running_jobs = Gauge("video_jobs_running", "Jobs being processed", registry=registry)
+downloaded_bytes = Counter("video_downloaded_bytes", "Bytes downloaded from remote media URLs", registry=registry)
+cache_lookups = Counter("video_cache_lookups", "Cache lookups by cache and result", ["cache", "result"], registry=registry)
+disk_bytes = Gauge("video_disk_bytes", "Bytes stored per data directory", ["area"], registry=registry)
+disk_free_bytes = Gauge("video_disk_free_bytes", "Free bytes on the data volume", registry=registry)
+
+# Lookups counted inside render worker processes, returned with each render result
+_worker_cache_lookups: CountTable = CountTable()
+
+def record_cache(cache: str, hit: bool, count: int = 1) -> None:
+    if settings.METRICS_ENABLED and count:
+        cache_lookups.labels(cache, "hit" if hit else "miss").inc(count)
+
+def count_worker_cache(cache: str, hit: bool, count: int = 1) -> None:
+    """Count cache lookups made in a render worker, where metrics are not exported."""
+    if settings.METRICS_ENABLED:
+        _worker_cache_lookups[f"{cache}:{'hit' if hit else 'miss'}"] += count
+
+def drain_worker_cache_counts() -> Dict[str, int]:
+    counts = dict(_worker_cache_lookups)
+    _worker_cache_lookups.clear()
+    return counts
+
+def record_worker_cache_counts(counts: Dict[str, int]) -> None:
+    for key, count in counts.items():
+        cache, _, result = key.partition(":")
+        record_cache(cache, result == "hit", count)
+
+def record_download(size: int) -> None:
+    if settings.METRICS_ENABLED:
+        downloaded_bytes.inc(size)
+
+def record_job(
+    status: str,
+    duration: float,
+    stage_timings: Dict[str, float],
+    engine: str = "none",
+    profile: str = "none",
+    fps: Optional[float] = None
+) -> None:
+    """Observe a finished job's duration, stage breakdown and encode throughput."""
+    if not settings.METRICS_ENABLED:
+        return
+    jobs_finished.labels(status).inc()
+    job_seconds.labels(status).observe(duration)
+    for stage, seconds in stage_timings.items():
+        stage_seconds.labels(stage, engine).observe(seconds)
+    if fps is not None:
+        encode_fps.labels(engine, profile).observe(fps)
+
+def set_queue_stats(stats: Dict[str, int]) -> None:
+    queued_jobs.set(stats.get("queued_jobs", 0))
+    running_jobs.set(stats.get("running_jobs", 0))
+
+def set_disk_usage(usage: Dict[str, int], free: int) -> None:
+    for area, size in usage.items():
+        disk_bytes.labels(area).set(size)
+    disk_free_bytes.set(free)
+
+def latest() -> bytes:
+    """All metrics in the Prometheus text exposition format."""
+    return generate_latest(registry)
+
+def serve(port: int) -> None:
+    """Expose the metrics on their own HTTP port, for processes without the API."""
+    start_http_server(port, registry=registry)
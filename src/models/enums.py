@@ -43,3 +43,18 @@ class JobStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     CANCELLED = "cancelled"
+
+class RenderEngine(str, Enum):
+    AUTO = "auto"
+    MOVIEPY = "moviepy"
+    FFMPEG = "ffmpeg"
+    SEGMENTED = "segmented"
+
+class PreviewMode(str, Enum):
+    NONE = "none"
+    PROXY = "proxy"
+    CONTACT_SHEET = "contact_sheet"
+
+class JobFields(str, Enum):
+    FULL = "full"
+    SUMMARY = "summary"
@@ -1,15 +1,18 @@
 from pydantic import BaseModel, Field, EmailStr, validator
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
 from .enums import (
     TransitionType,
     AudioEffect,
     VideoQuality,
     JobPriority,
-    JobStatus
+    JobStatus,
+    PreviewMode,
+    RenderEngine
 )
 
 class AudioSettings(BaseModel):
+    media_path: Optional[str] = None
     volume: float = Field(1.0, ge=0.0, le=2.0)
     effect: AudioEffect = AudioEffect.NONE
     start_time: float = Field(0.0, ge=0.0)
@@ -23,6 +26,15 @@ class VideoSettings(BaseModel):
     height: Optional[int] = None
     bitrate: Optional[str] = None
 
+class EncodingProfile(BaseModel):
+    """x264 settings chosen for a render."""
+    name: str
+    preset: str
+    crf: Optional[int] = None  # constant quality; None when a bitrate is set
+    bitrate: Optional[str] = None
+    tune: Optional[str] = None
+    threads: int = 0  # 0 lets x264 decide
+
 class TextOverlay(BaseModel):
     text: str
     font: str = "DejaVu Sans"
@@ -46,6 +58,16 @@ class CompositionSettings(BaseModel):
     background_audio: Optional[AudioSettings] = None
     watermark_path: Optional[str] = None
     watermark_opacity: float = Field(0.5, ge=0.0, le=1.0)
+    render_engine: RenderEngine = RenderEngine.AUTO
+    package_hls: bool = False  # also write fMP4/HLS segments for streaming playback
+    preview: PreviewMode = PreviewMode.NONE  # low-res proxy or contact sheet rendered ahead of the output
+    preview_only: bool = False  # render only the preview
+
+    @validator('preview_only')
+    def validate_preview_only(cls, v, values):
+        if v and values.get('preview') == PreviewMode.NONE:
+            raise ValueError("preview_only requires a preview mode")
+        return v
 
 class VideoCompositionRequest(BaseModel):
     scenes: List[Scene] = Field(..., max_items=20)
@@ -71,7 +93,77 @@ class VideoJob(BaseModel):
     error_message: Optional[str] = None
     output_path: Optional[str] = None
     progress: float = 0.0
+    stage: Optional[str] = None
+    stage_timings: Dict[str, float] = {}
+    render_engine: Optional[str] = None
+    encoding_profile: Optional[EncodingProfile] = None
+    encode_fps: Optional[float] = None  # output frames encoded per second of encode time
+    hls_playlist: Optional[str] = None
+    preview_path: Optional[str] = None
+    batch_id: Optional[str] = None
+
+class ChunkedUploadRequest(BaseModel):
+    filename: str
+    size: int = Field(..., gt=0)
+    content_hash: Optional[str] = None  # SHA-256 of the whole file, verified on completion
+
+class ChunkedUploadStatus(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    chunk_size: int
+    chunk_count: int
+    received_chunks: List[int] = []
+
+class ChunkedUploadComplete(BaseModel):
+    chunk_hashes: Optional[List[str]] = None  # SHA-256 of every chunk, in order
+
+class JobSummary(BaseModel):
+    """Lightweight projection of a VideoJob without the request body."""
+    id: str
+    status: JobStatus
+    priority: JobPriority
+    created_at: datetime
+    updated_at: datetime
+    progress: float = 0.0
+    stage: Optional[str] = None
+    output_path: Optional[str] = None
+    error_message: Optional[str] = None
+
+    @classmethod
+    def from_job(cls, job: VideoJob) -> "JobSummary":
+        return cls(
+            id=job.id,
+            status=job.status,
+            priority=job.request.priority,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+            progress=job.progress,
+            stage=job.stage,
+            output_path=job.output_path,
+            error_message=job.error_message
+        )
 
 class JobsResponse(BaseModel):
     total: int
-    jobs: List[VideoJob]
+    jobs: List[Union[VideoJob, JobSummary]]
+    next_cursor: Optional[str] = None
+
+class BatchCompositionRequest(BaseModel):
+    compositions: List[VideoCompositionRequest] = Field(..., min_items=1)
+
+class BatchJob(BaseModel):
+    """A batch of compositions submitted together and planned as a whole."""
+    id: str
+    job_ids: List[str]
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    planned: bool = False
+    seed_job_ids: List[str] = []  # rendered first so the rest reuse their shared segments
+    shared_inputs: int = 0  # inputs referenced by more than one composition
+    shared_segments: int = 0  # encoded segments used by more than one composition
+
+class BatchStatus(BaseModel):
+    batch: BatchJob
+    status: JobStatus
+    counts: Dict[JobStatus, int]
+    jobs: List[JobSummary]
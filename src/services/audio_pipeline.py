@@ -0,0 +1,289 @@
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Set
+
+import imageio_ffmpeg
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ..core import metrics
+from ..core.config import settings
+from ..models.enums import AudioEffect
+from ..models.schemas import AudioSettings, Scene, VideoCompositionRequest
+from ..utils.file_handlers import file_sha256
+from .timeline import scene_start_times
+
+logger = logging.getLogger(__name__)
+
+# Short-time Fourier transform used by the spectral noise gate
+NOISE_GATE_FRAME = 2048
+NOISE_GATE_HOP = 512
+NOISE_GATE_BLOCK = 1024  # STFT frames transformed at once, bounding memory
+NOISE_GATE_PERCENTILE = 20  # frame loudness percentile below which frames are taken as noise only
+NOISE_GATE_THRESHOLD_DB = 10.0  # margin above the floor a bin needs to pass
+
+@lru_cache(maxsize=256)
+def has_audio_stream(media_path: str) -> bool:
+    """Probe a media file for an audio stream using the bundled ffmpeg."""
+    result = subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-i", media_path],
+        capture_output=True,
+        text=True
+    )
+    return re.search(r"Stream #\S+.*: Audio:", result.stderr) is not None
+
+def db_to_gain(db: float) -> float:
+    return 10 ** (db / 20)
+
+def fade(samples: np.ndarray, seconds: float, fade_in: bool) -> np.ndarray:
+    """Apply a linear gain ramp over the first or last ``seconds`` in place."""
+    length = min(len(samples), round(seconds * settings.AUDIO_SAMPLE_RATE))
+    ramp = np.linspace(0.0, 1.0, length, dtype=np.float32)[:, None]
+    if fade_in:
+        samples[:length] *= ramp
+    else:
+        samples[len(samples) - length:] *= ramp[::-1]
+    return samples
+
+def normalize(samples: np.ndarray) -> np.ndarray:
+    """Scale to the target RMS level without pushing peaks above the ceiling."""
+    peak = float(np.max(np.abs(samples), initial=0.0))
+    if peak == 0.0:
+        return samples
+    rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
+    gain = min(
+        db_to_gain(settings.AUDIO_NORMALIZE_RMS_DBFS) / rms,
+        db_to_gain(settings.AUDIO_PEAK_DBFS) / peak
+    )
+    samples *= np.float32(gain)
+    return samples
+
+def reduce_noise(samples: np.ndarray) -> np.ndarray:
+    """Spectral gate attenuating STFT bins that stay near the track's noise floor.
+
+    The floor is each frequency bin's mean magnitude over the quietest
+    frames (below the NOISE_GATE_PERCENTILE of frame loudness), so steady
+    programme material such as a held tone is not mistaken for noise. Bins
+    less than NOISE_GATE_THRESHOLD_DB above it are attenuated by
+    AUDIO_NOISE_REDUCTION_DB and the signal is resynthesized by weighted
+    overlap-add. Tracks without quiet passages have no measurable floor and
+    are returned unchanged.
+    """
+    frame, hop = NOISE_GATE_FRAME, NOISE_GATE_HOP
+    if len(samples) < frame:
+        return samples
+    window = np.hanning(frame + 1)[:-1].astype(np.float32)
+    padded = np.pad(samples, ((frame, frame), (0, 0)))
+    # (frames, channels, frame) strided view over the padded signal
+    frames = sliding_window_view(padded, frame, axis=0)[::hop]
+
+    # Estimate the floor from frames lying entirely inside the signal, away from the zero padding
+    inner = frames[-(-frame // hop):len(samples) // hop + 1]
+    if len(inner) == 0:
+        return samples
+    step = max(1, len(inner) // NOISE_GATE_BLOCK)
+    magnitudes = np.abs(np.fft.rfft(inner[::step] * window, axis=-1))
+    loudness = np.square(magnitudes).sum(axis=(1, 2))
+    quiet = loudness <= np.percentile(loudness, NOISE_GATE_PERCENTILE)
+    if np.median(loudness) < loudness[quiet].max() * db_to_gain(NOISE_GATE_THRESHOLD_DB) ** 2:
+        return samples
+    floor = magnitudes[quiet].mean(axis=0)
+    threshold = floor * db_to_gain(NOISE_GATE_THRESHOLD_DB)
+    attenuation = db_to_gain(-settings.AUDIO_NOISE_REDUCTION_DB)
+
+    output = np.zeros_like(padded)
+    for start in range(0, len(frames), NOISE_GATE_BLOCK):
+        spectrum = np.fft.rfft(frames[start:start + NOISE_GATE_BLOCK] * window, axis=-1)
+        spectrum *= np.where(np.abs(spectrum) > threshold, 1.0, attenuation)
+        resynthesized = np.fft.irfft(spectrum, n=frame, axis=-1).astype(np.float32) * window
+        count = len(resynthesized)
+        # Hop-sized slice j of frame k lands at (start + k + j) * hop
+        for j in range(frame // hop):
+            piece = resynthesized[:, :, j * hop:(j + 1) * hop].transpose(0, 2, 1).reshape(-1, samples.shape[1])
+            output[(start + j) * hop:(start + j + count) * hop] += piece
+
+    # Every original sample is covered by frame // hop windows
+    window_power = np.square(window).reshape(-1, hop).sum(axis=0)
+    norm = window_power[np.arange(frame, frame + len(samples)) % hop]
+    return output[frame:frame + len(samples)] / norm[:, None]
+
+def apply_effect(samples: np.ndarray, effect: AudioEffect) -> np.ndarray:
+    """Apply an AudioEffect to a float32 (samples, channels) buffer."""
+    if effect == AudioEffect.FADE_IN:
+        return fade(samples, min(settings.AUDIO_FADE_SECONDS, len(samples) / settings.AUDIO_SAMPLE_RATE / 2), True)
+    if effect == AudioEffect.FADE_OUT:
+        return fade(samples, min(settings.AUDIO_FADE_SECONDS, len(samples) / settings.AUDIO_SAMPLE_RATE / 2), False)
+    if effect == AudioEffect.NORMALIZE:
+        return normalize(samples)
+    if effect == AudioEffect.AMPLIFY:
+        samples *= np.float32(db_to_gain(settings.AUDIO_AMPLIFY_DB))
+        return samples
+    if effect == AudioEffect.NOISE_REDUCTION:
+        return reduce_noise(samples)
+    return samples
+
+class PcmCache:
+    """Decoded audio as memory-mapped float32 PCM files keyed by source content hash.
+
+    Each source is decoded once by ffmpeg to interleaved float32 at the
+    pipeline's sample rate and channel count; later jobs map the file
+    read-only instead of decoding again. Least recently used files (by
+    mtime) are evicted above ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = settings.TEMP_DIR / "pcm",
+        max_bytes: int = settings.AUDIO_CACHE_MAX_BYTES,
+        ffmpeg_path: Optional[str] = None
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ffmpeg_path = ffmpeg_path or imageio_ffmpeg.get_ffmpeg_exe()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def load(self, media_path: str) -> np.ndarray:
+        """Return a read-only (samples, channels) float32 view of a source's audio."""
+        path = self.cache_dir / f"{file_sha256(media_path)}_{settings.AUDIO_SAMPLE_RATE}_{settings.AUDIO_CHANNELS}.f32"
+        try:
+            os.utime(path)
+            metrics.count_worker_cache("pcm", hit=True)
+        except FileNotFoundError:
+            metrics.count_worker_cache("pcm", hit=False)
+            self._decode(media_path, path)
+            self.evict(keep={path})
+        if path.stat().st_size == 0:
+            return np.zeros((0, settings.AUDIO_CHANNELS), dtype=np.float32)
+        return np.memmap(path, dtype=np.float32, mode="r").reshape(-1, settings.AUDIO_CHANNELS)
+
+    def evict(self, keep: Set[Path]) -> None:
+        """Remove least recently used PCM files until the cache fits max_bytes."""
+        entries = []
+        for path in self.cache_dir.glob("*.f32"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _decode(self, media_path: str, path: Path) -> None:
+        partial_path = self.cache_dir / f".{path.stem}.{uuid.uuid4().hex}.partial"
+        command = [
+            self.ffmpeg_path, "-y", "-hide_banner", "-loglevel", "error",
+            "-i", media_path, "-vn",
+            "-f", "f32le", "-ac", str(settings.AUDIO_CHANNELS), "-ar", str(settings.AUDIO_SAMPLE_RATE),
+            str(partial_path)
+        ]
+        try:
+            result = subprocess.run(command, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"Audio decoding failed for {media_path}: {result.stderr.strip()[-500:]}")
+            os.replace(partial_path, path)
+        finally:
+            partial_path.unlink(missing_ok=True)
+        logger.info(f"Decoded audio of {Path(media_path).name} to the PCM cache")
+
+class AudioPipeline:
+    """Build a composition's soundtrack from cached PCM in one NumPy pass.
+
+    Scene audio (a separate file, or the scene video's own track) and the
+    background track are cut, looped, gain-adjusted and run through their
+    effect as whole buffers, summed on the timeline and encoded once, so
+    every render engine just muxes the finished track.
+    """
+
+    def __init__(self, cache: Optional[PcmCache] = None):
+        self.cache = cache or PcmCache()
+
+    def mix(self, request: VideoCompositionRequest) -> Optional[np.ndarray]:
+        """Mix every audio source on the timeline; None if the composition is silent."""
+        sample_rate = settings.AUDIO_SAMPLE_RATE
+        starts, total_duration = scene_start_times(request.scenes)
+        mixed = np.zeros((round(total_duration * sample_rate), settings.AUDIO_CHANNELS), dtype=np.float32)
+        silent = True
+
+        for start, scene in zip(starts, request.scenes):
+            track = self.scene_track(scene)
+            if track is not None:
+                offset = round(start * sample_rate)
+                track = track[:len(mixed) - offset]
+                mixed[offset:offset + len(track)] += track
+                silent = False
+
+        background = request.settings.background_audio
+        if background and background.media_path:
+            track = self.track(background, background.media_path, total_duration)
+            mixed[:len(track)] += track
+            silent = False
+
+        if silent:
+            return None
+        return np.clip(mixed, -1.0, 1.0, out=mixed)
+
+    def scene_track(self, scene: Scene) -> Optional[np.ndarray]:
+        """A scene's audio file, or its video's own soundtrack, trimmed to the scene."""
+        audio = scene.audio or AudioSettings()
+        if audio.media_path:
+            return self.track(audio, audio.media_path, scene.duration)
+        suffix = Path(scene.media_path).suffix.lower()
+        if suffix not in settings.ALLOWED_VIDEO_TYPES or not has_audio_stream(scene.media_path):
+            return None
+        # The video's own audio plays from its start; start/end/loop refer to audio files
+        return self.track(audio.model_copy(update={"start_time": 0.0, "end_time": None, "loop": False}), scene.media_path, scene.duration)
+
+    def track(self, audio: AudioSettings, media_path: str, duration: float) -> np.ndarray:
+        """Cut ``[start_time, end_time)`` from a source, loop it to ``duration`` if asked,
+        then apply volume and the effect."""
+        sample_rate = settings.AUDIO_SAMPLE_RATE
+        pcm = self.cache.load(media_path)
+        start = round(audio.start_time * sample_rate)
+        end = round(audio.end_time * sample_rate) if audio.end_time is not None and audio.end_time > audio.start_time else None
+        source = pcm[start:end]
+        length = round(duration * sample_rate)
+
+        if audio.loop and 0 < len(source) < length:
+            repeats = -(-length // len(source))
+            samples = np.tile(source, (repeats, 1))[:length]
+        else:
+            samples = np.array(source[:length], dtype=np.float32)
+        samples *= np.float32(audio.volume)
+        return apply_effect(samples, audio.effect)
+
+    def render(self, request: VideoCompositionRequest, output_path: Path) -> Optional[Path]:
+        """Encode the mixed soundtrack to AAC at output_path; None if there is no audio."""
+        mixed = self.mix(request)
+        if mixed is None:
+            return None
+        command = [
+            self.cache.ffmpeg_path, "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "f32le", "-ar", str(settings.AUDIO_SAMPLE_RATE), "-ac", str(settings.AUDIO_CHANNELS), "-i", "-",
+            "-c:a", "aac", "-f", "mp4", str(output_path)
+        ]
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=stderr)
+            try:
+                process.stdin.write(mixed.data)
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            if process.wait() != 0:
+                stderr.seek(0)
+                error = stderr.read().decode(errors="replace").strip().splitlines()[-5:]
+                raise RuntimeError(f"Audio encoding failed: {' | '.join(error)}")
+        return output_path
+
+audio_pipeline = AudioPipeline()
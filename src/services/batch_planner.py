@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import re
+from collections import Counter
+from datetime import datetime
+from typing import List, NamedTuple, Set
+
+from ..core.config import settings
+from ..models.enums import JobStatus, RenderEngine
+from ..models.schemas import BatchJob, VideoCompositionRequest, VideoJob
+from ..utils.file_handlers import download_remote_file
+from .job_events import TERMINAL_STATUSES, job_events
+from .job_scheduler import AdmissionError
+from .job_store import JobRepository, job_store
+from .segment_cache import SegmentedRenderer
+from .video_processor import VideoProcessor, media_references
+
+logger = logging.getLogger(__name__)
+
+class BatchPlan(NamedTuple):
+    seeds: List[int]  # indexes of the compositions rendered first
+    shared_inputs: int
+    shared_segments: int
+
+def select_seeds(segment_keys: List[Set[str]], shared: Set[str]) -> List[int]:
+    """Greedily pick compositions until every shared segment is covered by one of them."""
+    seeds = []
+    uncovered = set(shared)
+    while uncovered:
+        best = max(range(len(segment_keys)), key=lambda i: len(uncovered & segment_keys[i]))
+        seeds.append(best)
+        uncovered -= segment_keys[best]
+    return seeds
+
+class BatchPlanner:
+    """Plans and dispatches batches of compositions that share assets.
+
+    Remote inputs referenced anywhere in the batch are downloaded once up
+    front. Segments several compositions would encode identically (an intro
+    clip, a watermarked still) are found from their segment cache keys; a
+    few seed jobs covering all of them are scheduled first, and the rest of
+    the batch is released once the seeds finish so every other job reuses
+    their encoded segments and decoded audio instead of racing to redo them.
+    """
+
+    def __init__(self, processor: VideoProcessor, scheduler, store: JobRepository = job_store):
+        self.processor = processor
+        self.scheduler = scheduler
+        self.store = store
+        self._tasks: Set[asyncio.Task] = set()
+
+    def dispatch(self, batch: BatchJob, jobs: List[VideoJob]) -> None:
+        """Plan and schedule a saved batch in the background."""
+        task = asyncio.create_task(self._run(batch, jobs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def stop(self) -> None:
+        """Cancel batches still planning.
+
+        Their unsubmitted jobs keep the ``planning`` stage and are recovered,
+        unplanned, by the API's interrupted-job recovery for every backend.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def plan(self, requests: List[VideoCompositionRequest]) -> BatchPlan:
+        references = [media_references(request) for request in requests]
+        usage = Counter(reference for item in references for reference in item)
+        remote = [reference for reference in usage if re.match(r'^https?://', reference)]
+        # Failed downloads are retried, and reported, by the jobs themselves
+        await asyncio.gather(*(download_remote_file(url) for url in remote), return_exceptions=True)
+
+        localized = []
+        for request in requests:
+            try:
+                localized.append(await self.processor.prepare_media(request, {}))
+            except Exception:
+                localized.append(None)
+        segment_keys = await asyncio.to_thread(self._segment_keys, localized)
+        segment_usage = Counter(key for keys in segment_keys for key in keys)
+        shared = {key for key, count in segment_usage.items() if count > 1}
+        return BatchPlan(
+            seeds=select_seeds(segment_keys, shared),
+            shared_inputs=sum(1 for count in usage.values() if count > 1),
+            shared_segments=len(shared)
+        )
+
+    def _segment_keys(self, requests: List[VideoCompositionRequest]) -> List[Set[str]]:
+        renderer = SegmentedRenderer(lambda scene, frame_size: None)
+        keys = []
+        for request in requests:
+            if request is None or self.processor.pipeline.select_engine(request) != RenderEngine.SEGMENTED:
+                keys.append(set())
+                continue
+            try:
+                keys.append({segment.key for segment in renderer.plan(request)})
+            except Exception as e:
+                logger.warning(f"Could not plan segments of a batch item: {e}")
+                keys.append(set())
+        return keys
+
+    async def _run(self, batch: BatchJob, jobs: List[VideoJob]) -> None:
+        try:
+            plan = await self.plan([job.request for job in jobs])
+        except Exception as e:
+            logger.error(f"Planning batch {batch.id} failed, scheduling it unplanned: {e}")
+            plan = BatchPlan([], 0, 0)
+
+        seeds = [jobs[i] for i in plan.seeds]
+        batch.planned = True
+        batch.seed_job_ids = [job.id for job in seeds]
+        batch.shared_inputs = plan.shared_inputs
+        batch.shared_segments = plan.shared_segments
+        await self.store.save_batch(batch)
+        logger.info(
+            f"Batch {batch.id}: {len(jobs)} jobs, {plan.shared_inputs} shared inputs, "
+            f"{plan.shared_segments} shared segments rendered by {len(seeds)} seed jobs"
+        )
+
+        await self._submit(seeds)
+        await self._wait(seeds)
+        seed_ids = set(batch.seed_job_ids)
+        await self._submit([job for job in jobs if job.id not in seed_ids])
+
+    async def _submit(self, jobs: List[VideoJob]) -> None:
+        for job in jobs:
+            # Deleted while the batch was planning
+            if await self.store.get(job.id) is None:
+                continue
+            try:
+                await self.scheduler.submit(job)
+            except AdmissionError as e:
+                job.status = JobStatus.FAILED
+                job.error_message = str(e)
+                job.updated_at = datetime.utcnow()
+                job_events.publish(job)
+            await self.store.update(job)
+
+    async def _wait(self, jobs: List[VideoJob]) -> None:
+        """Wait until every job has finished, wherever it is rendered."""
+        pending = [job.id for job in jobs]
+        while pending:
+            await asyncio.sleep(settings.BATCH_POLL_INTERVAL)
+            current = {job.id: job for job in await self.store.get_many(pending)}
+            pending = [
+                job_id for job_id in pending
+                if job_id in current and current[job_id].status not in TERMINAL_STATUSES
+            ]
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+from ..core.config import settings
+from ..models.schemas import ChunkedUploadStatus
+from ..utils.content_store import StoredContent
+from ..utils.file_handlers import SNIFF_BYTES, validate_file_type
+
+logger = logging.getLogger(__name__)
+
+class UploadNotFoundError(Exception):
+    """Raised for unknown or expired upload sessions."""
+
+class IncompleteUploadError(Exception):
+    """Raised when finalizing an upload with missing chunks."""
+
+class ChunkedUploadManager:
+    """Resumable uploads assembled from fixed-size chunks.
+
+    Each session lives in ``TEMP_DIR/uploads/<id>``: an immutable
+    ``session.json``, a data file preallocated to the final size, and one
+    marker per received chunk holding its SHA-256. Chunks are written with
+    positional I/O at ``index * chunk_size``, so they can arrive in any order
+    and in parallel, from any API process. Finalizing re-hashes the data file
+    chunk by chunk and moves it into UPLOAD_DIR under its content hash.
+    """
+
+    def __init__(self, root: Path = settings.TEMP_DIR / "uploads", upload_dir: Path = settings.UPLOAD_DIR):
+        self.root = root
+        self.upload_dir = upload_dir
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def create(self, filename: str, size: int, content_hash: Optional[str] = None) -> ChunkedUploadStatus:
+        """Start an upload session and preallocate its data file."""
+        if size > settings.MAX_FILE_SIZE:
+            raise ValueError(f"File size ({size}) exceeds maximum allowed size ({settings.MAX_FILE_SIZE})")
+        self.expire_sessions()
+
+        upload_id = str(uuid.uuid4())
+        session_dir = self.root / upload_id
+        (session_dir / "chunks").mkdir(parents=True)
+        fd = os.open(session_dir / "data", os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(fd, 0, size)
+            else:
+                os.ftruncate(fd, size)
+        finally:
+            os.close(fd)
+
+        session = {
+            "filename": filename,
+            "size": size,
+            "chunk_size": settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+            "content_hash": content_hash,
+            "created_at": time.time()
+        }
+        (session_dir / "session.json").write_text(json.dumps(session))
+        return self.status(upload_id)
+
+    def status(self, upload_id: str) -> ChunkedUploadStatus:
+        session = self._session(upload_id)
+        return ChunkedUploadStatus(
+            upload_id=upload_id,
+            filename=session["filename"],
+            size=session["size"],
+            chunk_size=session["chunk_size"],
+            chunk_count=self._chunk_count(session),
+            received_chunks=sorted(self._received(upload_id))
+        )
+
+    async def write_chunk(
+        self,
+        upload_id: str,
+        index: int,
+        body: AsyncIterator[bytes],
+        expected_hash: Optional[str] = None
+    ) -> str:
+        """Write chunk ``index`` from a request body and return its SHA-256."""
+        session = self._session(upload_id)
+        if not 0 <= index < self._chunk_count(session):
+            raise ValueError(f"Chunk index {index} out of range")
+        offset = index * session["chunk_size"]
+        length = min(session["chunk_size"], session["size"] - offset)
+
+        data = bytearray()
+        async for piece in body:
+            data += piece
+            if len(data) > length:
+                raise ValueError(f"Chunk {index} is larger than {length} bytes")
+        if len(data) != length:
+            raise ValueError(f"Chunk {index} has {len(data)} bytes, expected {length}")
+
+        chunk_hash = hashlib.sha256(data).hexdigest()
+        if expected_hash and expected_hash.lower() != chunk_hash:
+            raise ValueError(f"Chunk {index} hash mismatch")
+        if index == 0 and not validate_file_type(
+            session["filename"],
+            settings.ALLOWED_IMAGE_TYPES | settings.ALLOWED_AUDIO_TYPES | settings.ALLOWED_VIDEO_TYPES,
+            bytes(data[:SNIFF_BYTES])
+        ):
+            raise ValueError("File content does not match its type")
+
+        await asyncio.to_thread(self._pwrite, upload_id, bytes(data), offset)
+        marker = self.root / upload_id / "chunks" / str(index)
+        partial_marker = marker.with_suffix(f".{uuid.uuid4().hex}")
+        partial_marker.write_text(chunk_hash)
+        os.replace(partial_marker, marker)
+        # Neither pwrite nor the marker touches the session directory, which expiry goes by
+        os.utime(self.root / upload_id)
+        return chunk_hash
+
+    async def complete(self, upload_id: str, chunk_hashes: Optional[List[str]] = None) -> StoredContent:
+        """Verify every chunk and move the file into UPLOAD_DIR under its content hash."""
+        session = self._session(upload_id)
+        received = self._received(upload_id)
+        missing = [i for i in range(self._chunk_count(session)) if i not in received]
+        if missing:
+            raise IncompleteUploadError(f"Missing chunks: {missing[:20]}")
+        if chunk_hashes is not None and len(chunk_hashes) != len(received):
+            raise ValueError(f"Expected {len(received)} chunk hashes, got {len(chunk_hashes)}")
+
+        content_hash = await asyncio.to_thread(self._verify, upload_id, session, received, chunk_hashes)
+        if session["content_hash"] and session["content_hash"].lower() != content_hash:
+            raise ValueError("File hash mismatch")
+
+        path = self.upload_dir / f"{content_hash}{Path(session['filename']).suffix.lower()}"
+        deduplicated = path.exists()
+        if not deduplicated:
+            await asyncio.to_thread(shutil.move, str(self.root / upload_id / "data"), str(path))
+        self.abort(upload_id)
+        return StoredContent(path, content_hash, session["size"], deduplicated)
+
+    def abort(self, upload_id: str) -> None:
+        shutil.rmtree(self.root / upload_id, ignore_errors=True)
+
+    def expire_sessions(self) -> None:
+        """Remove sessions that received no chunk for CHUNKED_UPLOAD_TTL."""
+        cutoff = time.time() - settings.CHUNKED_UPLOAD_TTL
+        for session_dir in self.root.iterdir():
+            try:
+                if session_dir.stat().st_mtime < cutoff:
+                    logger.info(f"Expiring chunked upload {session_dir.name}")
+                    shutil.rmtree(session_dir, ignore_errors=True)
+            except FileNotFoundError:
+                continue
+
+    def _session(self, upload_id: str) -> Dict:
+        try:
+            uuid.UUID(upload_id)
+            return json.loads((self.root / upload_id / "session.json").read_text())
+        except (ValueError, FileNotFoundError):
+            raise UploadNotFoundError(f"Upload {upload_id} not found")
+
+    def _chunk_count(self, session: Dict) -> int:
+        return max(1, -(-session["size"] // session["chunk_size"]))
+
+    def _received(self, upload_id: str) -> Dict[int, str]:
+        return {
+            int(marker.name): marker.read_text()
+            for marker in (self.root / upload_id / "chunks").iterdir()
+            if marker.name.isdigit()
+        }
+
+    def _pwrite(self, upload_id: str, data: bytes, offset: int) -> None:
+        fd = os.open(self.root / upload_id / "data", os.O_WRONLY)
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(fd, view, offset)
+                view = view[written:]
+                offset += written
+        finally:
+            os.close(fd)
+
+    def _verify(
+        self,
+        upload_id: str,
+        session: Dict,
+        received: Dict[int, str],
+        chunk_hashes: Optional[List[str]]
+    ) -> str:
+        """Re-hash the data file per chunk in one pass and return its SHA-256."""
+        file_hash = hashlib.sha256()
+        with open(self.root / upload_id / "data", "rb") as f:
+            for index in range(len(received)):
+                data = f.read(session["chunk_size"])
+                chunk_hash = hashlib.sha256(data).hexdigest()
+                if chunk_hash != received[index]:
+                    raise ValueError(f"Chunk {index} is corrupt on disk")
+                if chunk_hashes is not None and chunk_hashes[index].lower() != chunk_hash:
+                    raise ValueError(f"Chunk {index} hash mismatch")
+                file_hash.update(data)
+        return file_hash.hexdigest()
+
+chunked_uploads = ChunkedUploadManager()
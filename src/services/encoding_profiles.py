@@ -0,0 +1,74 @@
+import os
+import re
+from pathlib import Path
+from typing import List, Optional
+
+from ..core.config import settings
+from ..models.enums import JobPriority, VideoQuality
+from ..models.schemas import EncodingProfile, VideoCompositionRequest
+
+# x264 presets from fastest to slowest
+X264_PRESETS = ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow"]
+
+# (name, preset, crf) per priority: urgent jobs trade size for speed, low-priority ones are archival quality
+PRIORITY_PROFILES = {
+    JobPriority.URGENT: ("urgent", "ultrafast", 26),
+    JobPriority.HIGH: ("fast", "veryfast", 23),
+    JobPriority.NORMAL: ("standard", "medium", 23),
+    JobPriority.LOW: ("archival", "slow", 20)
+}
+
+# Output sizes where the preset steps one faster to keep render times bounded
+FASTER_PRESET_QUALITIES = {VideoQuality.ULTRA, VideoQuality.UHD}
+
+BITRATE_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)([kKmM]?)$")
+
+def parse_bitrate(bitrate: str) -> Optional[int]:
+    """Bits per second of an ffmpeg bitrate such as ``"2500k"`` or ``"5M"``; None if unparseable."""
+    match = BITRATE_PATTERN.match(bitrate.strip())
+    if match is None:
+        return None
+    value, unit = match.groups()
+    return int(float(value) * {"": 1, "k": 1000, "m": 1000_000}[unit.lower()])
+
+# A job may render its preview alongside the full output
+RENDERS_PER_JOB = 2
+
+def encoder_threads() -> int:
+    """x264 threads per render, sharing the cores between concurrent renders and previews."""
+    concurrent_renders = max(1, min(settings.MAX_CONCURRENT_JOBS * RENDERS_PER_JOB, settings.RENDER_WORKERS))
+    return max(1, (os.cpu_count() or 1) // concurrent_renders)
+
+def select_profile(request: VideoCompositionRequest) -> EncodingProfile:
+    """Choose x264 settings from the job priority, output quality and content."""
+    video_settings = request.settings.video_settings
+    name, preset, crf = PRIORITY_PROFILES[request.priority]
+    if video_settings.quality in FASTER_PRESET_QUALITIES:
+        preset = X264_PRESETS[max(0, X264_PRESETS.index(preset) - 1)]
+    slideshow = all(Path(scene.media_path).suffix.lower() in settings.ALLOWED_IMAGE_TYPES for scene in request.scenes)
+    return EncodingProfile(
+        name=f"{name}-slideshow" if slideshow else name,
+        preset=preset,
+        crf=None if video_settings.bitrate else crf,
+        bitrate=video_settings.bitrate,
+        tune="stillimage" if slideshow else None,
+        threads=encoder_threads()
+    )
+
+def rate_control_args(profile: EncodingProfile) -> List[str]:
+    """Quality/bitrate and tuning options of a profile."""
+    if profile.bitrate:
+        # Cap the rate around the target instead of an unconstrained average
+        args = ["-b:v", profile.bitrate]
+        bits = parse_bitrate(profile.bitrate)
+        if bits:
+            args += ["-maxrate", str(bits), "-bufsize", str(2 * bits)]
+    else:
+        args = ["-crf", str(profile.crf)]
+    if profile.tune:
+        args += ["-tune", profile.tune]
+    return args
+
+def encoder_args(profile: EncodingProfile) -> List[str]:
+    """All libx264 options of a profile."""
+    return ["-preset", profile.preset, *rate_control_args(profile), "-threads", str(profile.threads)]
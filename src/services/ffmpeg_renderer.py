@@ -0,0 +1,213 @@
+import logging
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import imageio_ffmpeg
+
+from ..core.config import settings
+from ..models.schemas import Scene, VideoCompositionRequest
+from ..models.enums import TransitionType
+from .audio_pipeline import audio_pipeline
+from .encoding_profiles import encoder_args, select_profile
+from .ingest import resolve_output_size
+from .packaging import keyframe_args
+from .timeline import scene_start_times, transition_overlap
+
+logger = logging.getLogger(__name__)
+
+ProgressReporter = Callable[[str, float], None]
+
+# xfade transition names for every TransitionType ffmpeg can express natively
+XFADE_TRANSITIONS = {
+    TransitionType.FADE: "fadeblack",
+    TransitionType.CROSSFADE: "fade",
+    TransitionType.DISSOLVE: "dissolve",
+    TransitionType.SLIDE_LEFT: "slideleft",
+    TransitionType.SLIDE_RIGHT: "slideright",
+    TransitionType.SLIDE_UP: "slideup",
+    TransitionType.SLIDE_DOWN: "slidedown",
+    TransitionType.ZOOM_IN: "zoomin",
+    TransitionType.WIPE_LEFT: "wipeleft",
+    TransitionType.WIPE_RIGHT: "wiperight",
+    TransitionType.CIRCLE_OPEN: "circleopen",
+    TransitionType.CIRCLE_CLOSE: "circleclose"
+}
+
+# Still images ffmpeg can loop with the image2 demuxer
+LOOPABLE_IMAGE_TYPES = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+def video_encode_args(request: VideoCompositionRequest, tune: Optional[str] = None) -> List[str]:
+    """H.264 output options shared by every ffmpeg encode of a composition.
+
+    ``tune`` overrides the profile's tuning for parts of the timeline, such
+    as still-image segments; an empty string disables tuning.
+    """
+    profile = select_profile(request)
+    if tune is not None:
+        profile = profile.model_copy(update={"tune": tune or None})
+    args = ["-c:v", "libx264", *encoder_args(profile), "-pix_fmt", "yuv420p", "-r", str(request.settings.video_settings.fps)]
+    if request.settings.package_hls:
+        args += keyframe_args()
+    return args
+
+class FFmpegRenderer:
+    """Render simple compositions with a single ffmpeg filter graph.
+
+    Scenes are scaled and padded to the output size, joined with xfade (or
+    concat for cuts) and the watermark is overlaid, so frames never pass
+    through Python; the soundtrack mixed by the audio pipeline is muxed in.
+    Compositions using features the graph cannot express are left to MoviePy.
+    """
+
+    def __init__(self, ffmpeg_path: Optional[str] = None, scratch_dir: Path = settings.TEMP_DIR):
+        self.ffmpeg_path = ffmpeg_path or imageio_ffmpeg.get_ffmpeg_exe()
+        self.scratch_dir = scratch_dir
+
+    def unsupported_reason(self, request: VideoCompositionRequest) -> Optional[str]:
+        """Return why the request needs MoviePy, or None if ffmpeg can render it."""
+        for i, scene in enumerate(request.scenes):
+            suffix = Path(scene.media_path).suffix.lower()
+            if suffix not in LOOPABLE_IMAGE_TYPES and suffix not in settings.ALLOWED_VIDEO_TYPES:
+                return f"scene {i} media type {suffix} cannot be looped by ffmpeg"
+            if scene.text_overlays:
+                return f"scene {i} has text overlays"
+            if i > 0 and scene.transition != TransitionType.CUT and scene.transition not in XFADE_TRANSITIONS:
+                return f"scene {i} uses the {scene.transition.value} transition"
+
+        composition = request.settings
+        if composition.watermark_path and Path(composition.watermark_path).suffix.lower() not in LOOPABLE_IMAGE_TYPES:
+            return "watermark is not a still image"
+        return None
+
+    def build_command(
+        self,
+        request: VideoCompositionRequest,
+        output_path: Path,
+        audio_path: Optional[Path] = None
+    ) -> List[str]:
+        """Compile a composition into an ffmpeg command line muxing audio_path if given."""
+        video_settings = request.settings.video_settings
+        width, height = resolve_output_size(video_settings)
+        fps = video_settings.fps
+        starts, total_duration = scene_start_times(request.scenes)
+
+        inputs: List[str] = []
+        filters: List[str] = []
+
+        def add_input(*args: str) -> int:
+            inputs.extend(args)
+            return inputs.count("-i") - 1
+
+        # Scale every scene to the output frame and join them on the timeline
+        video_label = None
+        timeline_end = 0.0
+        for i, scene in enumerate(request.scenes):
+            index = add_input(*self.scene_input_args(scene, fps))
+            filters.append(self.scene_filter(index, scene, (width, height), fps, f"v{i}"))
+
+            if video_label is None:
+                video_label = f"v{i}"
+                timeline_end = scene.duration
+                continue
+
+            overlap = transition_overlap(request.scenes[i - 1], scene)
+            if overlap <= 0:
+                filters.append(f"[{video_label}][v{i}]concat=n=2:v=1:a=0,fps={fps}[x{i}]")
+            else:
+                filters.append(
+                    f"[{video_label}][v{i}]xfade=transition={XFADE_TRANSITIONS[scene.transition]}:"
+                    f"duration={overlap:.3f}:offset={timeline_end - overlap:.3f}[x{i}]"
+                )
+            video_label = f"x{i}"
+            timeline_end += scene.duration - overlap
+
+        video_label = self.watermark_filters(request, (width, height), total_duration, video_label, add_input, filters)
+        maps = ["-map", f"[{video_label}]"]
+        if audio_path:
+            audio_index = add_input("-i", str(audio_path))
+            maps += ["-map", f"{audio_index}:a", "-c:a", "copy"]
+
+        command = [self.ffmpeg_path, "-y", "-hide_banner", "-nostats", "-progress", "pipe:1", *inputs]
+
+        command += ["-filter_complex", ";".join(filters), *maps]
+        command += video_encode_args(request)
+        command += ["-t", f"{total_duration:.3f}", "-movflags", "+faststart", str(output_path)]
+        return command
+
+    def scene_input_args(self, scene: Scene, fps: int) -> List[str]:
+        """Input options reading a scene's media; still images are looped."""
+        if Path(scene.media_path).suffix.lower() in LOOPABLE_IMAGE_TYPES:
+            return ["-loop", "1", "-framerate", str(fps), "-t", f"{scene.duration:.3f}", "-i", scene.media_path]
+        return ["-i", scene.media_path]
+
+    def scene_filter(self, index: int, scene: Scene, frame_size: Tuple[int, int], fps: int, label: str) -> str:
+        """Filter fitting input ``index`` to the frame and to exactly the scene duration."""
+        width, height = frame_size
+        return (
+            f"[{index}:v]"
+            f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,format=yuv420p,"
+            f"tpad=stop_mode=clone:stop_duration={scene.duration:.3f},"
+            f"trim=duration={scene.duration:.3f},setpts=PTS-STARTPTS,settb=AVTB,fps={fps}[{label}]"
+        )
+
+    def watermark_filters(
+        self,
+        request: VideoCompositionRequest,
+        frame_size: Tuple[int, int],
+        duration: float,
+        video_label: str,
+        add_input: Callable[..., int],
+        filters: List[str]
+    ) -> str:
+        """Overlay the watermark in the bottom-right corner; returns the output label."""
+        composition = request.settings
+        if not composition.watermark_path:
+            return video_label
+        width, height = frame_size
+        index = add_input("-loop", "1", "-t", f"{duration:.3f}", "-i", composition.watermark_path)
+        filters.append(
+            f"[{index}:v]scale={max(2, width // 6)}:-1,format=rgba,"
+            f"colorchannelmixer=aa={composition.watermark_opacity:.3f}[wm]"
+        )
+        filters.append(f"[{video_label}][wm]overlay=W-w-{width // 40}:H-h-{height // 40}:format=auto,format=yuv420p[vout]")
+        return "vout"
+
+    def render(
+        self,
+        request: VideoCompositionRequest,
+        output_path: Path,
+        report: ProgressReporter,
+        stage_timings: Dict[str, float]
+    ) -> Path:
+        """Render the composition to output_path, streaming encode progress."""
+        _, total_duration = scene_start_times(request.scenes)
+        with tempfile.TemporaryDirectory(dir=self.scratch_dir) as temp_dir:
+            started = time.perf_counter()
+            audio_path = audio_pipeline.render(request, Path(temp_dir) / "audio.m4a")
+            report("audio", 1.0)
+            stage_timings["audio_mix"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            command = self.build_command(request, output_path, audio_path)
+            stage_timings["assemble"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            with tempfile.TemporaryFile() as stderr:
+                process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr, text=True)
+                for line in process.stdout:
+                    key, _, value = line.strip().partition("=")
+                    if key == "out_time_us" and value.isdigit():
+                        report("encoding", min(1.0, int(value) / 1_000_000 / total_duration))
+                    elif key == "progress" and value == "end":
+                        report("muxing", 1.0)
+                return_code = process.wait()
+                if return_code != 0:
+                    stderr.seek(0)
+                    error = stderr.read().decode(errors="replace").strip().splitlines()[-5:]
+                    raise RuntimeError(f"ffmpeg exited with code {return_code}: {' | '.join(error)}")
+            stage_timings["encode"] = time.perf_counter() - started
+        return output_path
@@ -0,0 +1,97 @@
+import os
+from functools import lru_cache
+from typing import Tuple
+
+import cv2
+import numpy as np
+from moviepy.editor import VideoClip, VideoFileClip
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+from PIL import Image
+
+from ..core.config import settings
+from ..models.schemas import VideoSettings
+from ..models.enums import VideoQuality
+
+# Output frame size for each quality preset
+QUALITY_DIMENSIONS = {
+    VideoQuality.LOW: (854, 480),
+    VideoQuality.MEDIUM: (1280, 720),
+    VideoQuality.HIGH: (1920, 1080),
+    VideoQuality.ULTRA: (2560, 1440),
+    VideoQuality.UHD: (3840, 2160)
+}
+
+def resolve_output_size(video_settings: VideoSettings) -> Tuple[int, int]:
+    """Return the (width, height) a composition is rendered at.
+
+    Explicit width/height override the quality preset; when only one is
+    given the other follows the preset's aspect ratio. Dimensions are
+    rounded down to even numbers as required by yuv420p encoding.
+    """
+    preset_width, preset_height = QUALITY_DIMENSIONS[video_settings.quality]
+    width, height = video_settings.width, video_settings.height
+    if width and not height:
+        height = round(width * preset_height / preset_width)
+    elif height and not width:
+        width = round(height * preset_width / preset_height)
+    elif not width and not height:
+        width, height = preset_width, preset_height
+    return width - width % 2, height - height % 2
+
+def fit_size(source_size: Tuple[int, int], target_size: Tuple[int, int]) -> Tuple[int, int]:
+    """Largest size with the source aspect ratio that fits inside target_size."""
+    scale = min(target_size[0] / source_size[0], target_size[1] / source_size[1])
+    return (
+        max(1, min(target_size[0], round(source_size[0] * scale))),
+        max(1, min(target_size[1], round(source_size[1] * scale)))
+    )
+
+def letterbox(frame: np.ndarray, target_size: Tuple[int, int]) -> np.ndarray:
+    """Resize a frame to fit target_size and pad it with black bars."""
+    height, width = frame.shape[:2]
+    if (width, height) == tuple(target_size):
+        return frame
+
+    fitted_width, fitted_height = fit_size((width, height), target_size)
+    if (fitted_width, fitted_height) != (width, height):
+        interpolation = cv2.INTER_AREA if fitted_width < width else cv2.INTER_LINEAR
+        frame = cv2.resize(frame, (fitted_width, fitted_height), interpolation=interpolation)
+
+    pad_x = target_size[0] - fitted_width
+    pad_y = target_size[1] - fitted_height
+    return cv2.copyMakeBorder(
+        frame,
+        pad_y // 2, pad_y - pad_y // 2,
+        pad_x // 2, pad_x - pad_x // 2,
+        cv2.BORDER_CONSTANT,
+        value=(0, 0, 0)
+    )
+
+@lru_cache(maxsize=settings.STILL_IMAGE_CACHE_SIZE)
+def _load_still(path: str, modified_ns: int, target_size: Tuple[int, int]) -> np.ndarray:
+    with Image.open(path) as image:
+        frame = np.asarray(image.convert("RGB"))
+    frame = letterbox(frame, target_size)
+    frame.setflags(write=False)
+    return frame
+
+def load_still(path: str, target_size: Tuple[int, int]) -> np.ndarray:
+    """Decode a still image once, letterboxed to the output size, and cache it."""
+    return _load_still(path, os.stat(path).st_mtime_ns, tuple(target_size))
+
+def open_video_clip(path: str, target_size: Tuple[int, int]) -> VideoClip:
+    """Open a video scene whose frames are scaled by ffmpeg while decoding.
+
+    ffmpeg resizes to the fitted size (area averaging for downscales) before
+    frames reach Python; only the letterbox padding is added per frame.
+    """
+    source_size = tuple(ffmpeg_parse_infos(path)["video_size"])
+    fitted_width, fitted_height = fit_size(source_size, target_size)
+    clip = VideoFileClip(
+        path,
+        target_resolution=(fitted_height, fitted_width),
+        resize_algorithm="area" if fitted_width < source_size[0] else "bicubic"
+    )
+    if tuple(clip.size) == tuple(target_size):
+        return clip
+    return clip.fl_image(lambda frame: letterbox(frame, target_size))
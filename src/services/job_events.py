@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Set
+
+from ..core.config import settings
+from ..models.enums import JobStatus
+from ..models.schemas import VideoJob
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+def job_event(job: VideoJob) -> Dict[str, Any]:
+    """Serializable snapshot of a job's progress."""
+    return {
+        "job_id": job.id,
+        "status": job.status.value,
+        "stage": job.stage,
+        "progress": job.progress,
+        "error_message": job.error_message,
+        "preview_ready": job.preview_path is not None,
+        "updated_at": job.updated_at.isoformat()
+    }
+
+class JobEventBroker:
+    """In-process pub/sub for job progress with per-job rate limiting.
+
+    Progress updates for a job are delivered at most once per
+    ``min_interval`` seconds; the latest suppressed update is flushed when
+    the interval elapses so subscribers always see the final value. Status
+    changes bypass the limit.
+    """
+
+    def __init__(self, min_interval: float = settings.PROGRESS_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._last_sent: Dict[str, float] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=settings.PROGRESS_QUEUE_SIZE)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(job_id)
+        if not subscribers:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[job_id]
+
+    def publish(self, job: VideoJob, force: bool = False) -> None:
+        """Publish a job snapshot, coalescing bursts of progress updates."""
+        event = job_event(job)
+        if job.status in TERMINAL_STATUSES:
+            self._last_sent.pop(job.id, None)
+            self._pending.pop(job.id, None)
+            self._deliver(job.id, event)
+            return
+
+        if job.id not in self._subscribers:
+            return
+
+        now = time.monotonic()
+        elapsed = now - self._last_sent.get(job.id, 0.0)
+        if force or elapsed >= self.min_interval:
+            self._pending.pop(job.id, None)
+            self._last_sent[job.id] = now
+            self._deliver(job.id, event)
+            return
+
+        if job.id not in self._pending:
+            asyncio.get_running_loop().call_later(self.min_interval - elapsed, self._flush, job.id)
+        self._pending[job.id] = event
+
+    def _flush(self, job_id: str) -> None:
+        event = self._pending.pop(job_id, None)
+        if event is not None:
+            self._last_sent[job_id] = time.monotonic()
+            self._deliver(job_id, event)
+
+    def _deliver(self, job_id: str, event: Dict[str, Any]) -> None:
+        for queue in self._subscribers.get(job_id, ()):
+            if queue.full():
+                # Slow consumer: drop the oldest snapshot, keep the newest
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+job_events = JobEventBroker()
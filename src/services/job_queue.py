@@ -0,0 +1,291 @@
+import asyncio
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from ..core.config import settings
+from ..models.enums import JobPriority, JobStatus
+from ..models.schemas import VideoJob
+from .job_events import job_events
+from .job_scheduler import PRIORITY_ORDER, AdmissionError, JobScheduler, check_composition_limits
+from .job_store import JobRepository, job_store
+from .video_processor import VideoProcessor
+
+logger = logging.getLogger(__name__)
+
+class QueuedJob(NamedTuple):
+    """A job delivery claimed by a worker."""
+    job_id: str
+    priority: JobPriority
+    attempts: int
+    message_id: str
+
+class JobQueue(ABC):
+    """At-least-once job queue shared by API processes and render workers.
+
+    A claimed job stays invisible to other workers while its consumer keeps
+    heartbeating; after ``JOB_QUEUE_VISIBILITY_TIMEOUT`` seconds of silence
+    it is reclaimed and retried, up to ``JOB_QUEUE_MAX_ATTEMPTS`` deliveries.
+    """
+
+    @abstractmethod
+    async def enqueue(self, job_id: str, priority: JobPriority, attempts: int = 0) -> None:
+        ...
+
+    @abstractmethod
+    async def claim(self, consumer: str) -> Optional[QueuedJob]:
+        """Claim the next job by priority, waiting up to JOB_QUEUE_BLOCK_SECONDS."""
+
+    @abstractmethod
+    async def heartbeat(self, entry: QueuedJob, consumer: str) -> None:
+        """Extend the visibility timeout of a claimed job."""
+
+    @abstractmethod
+    async def ack(self, entry: QueuedJob) -> None:
+        """Remove a finished job from the queue."""
+
+    @abstractmethod
+    async def retry(self, entry: QueuedJob) -> bool:
+        """Requeue a failed delivery; returns False once attempts are exhausted."""
+
+    @abstractmethod
+    async def stats(self) -> Dict[str, int]:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+class InMemoryJobQueue(JobQueue):
+    """Process-local JobQueue with the same delivery semantics as the Redis one.
+
+    Nothing outside the process can consume it, so it is not a deployable
+    backend; it backs tests of queue consumers.
+    """
+
+    def __init__(self):
+        self._queues: Dict[JobPriority, Deque[QueuedJob]] = {priority: deque() for priority in PRIORITY_ORDER}
+        self._in_flight: Dict[str, Tuple[QueuedJob, float]] = {}
+        self.dead_letters: List[QueuedJob] = []
+        self._condition = asyncio.Condition()
+
+    async def enqueue(self, job_id: str, priority: JobPriority, attempts: int = 0) -> None:
+        async with self._condition:
+            self._queues[priority].append(QueuedJob(job_id, priority, attempts, uuid.uuid4().hex))
+            self._condition.notify()
+
+    async def claim(self, consumer: str) -> Optional[QueuedJob]:
+        now = time.monotonic()
+        for entry, deadline in list(self._in_flight.values()):
+            if deadline < now:
+                logger.warning(f"Reclaiming job {entry.job_id} after visibility timeout")
+                await self.retry(entry)
+
+        async with self._condition:
+            try:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: any(self._queues.values())),
+                    settings.JOB_QUEUE_BLOCK_SECONDS
+                )
+            except asyncio.TimeoutError:
+                return None
+            entry = next(queue for queue in (self._queues[p] for p in PRIORITY_ORDER) if queue).popleft()
+            self._in_flight[entry.message_id] = (entry, now + settings.JOB_QUEUE_VISIBILITY_TIMEOUT)
+            return entry
+
+    async def heartbeat(self, entry: QueuedJob, consumer: str) -> None:
+        if entry.message_id in self._in_flight:
+            self._in_flight[entry.message_id] = (entry, time.monotonic() + settings.JOB_QUEUE_VISIBILITY_TIMEOUT)
+
+    async def ack(self, entry: QueuedJob) -> None:
+        self._in_flight.pop(entry.message_id, None)
+
+    async def retry(self, entry: QueuedJob) -> bool:
+        await self.ack(entry)
+        if entry.attempts + 1 >= settings.JOB_QUEUE_MAX_ATTEMPTS:
+            self.dead_letters.append(entry)
+            return False
+        await self.enqueue(entry.job_id, entry.priority, entry.attempts + 1)
+        return True
+
+    async def stats(self) -> Dict[str, int]:
+        return {
+            "queued_jobs": sum(len(queue) for queue in self._queues.values()),
+            "running_jobs": len(self._in_flight)
+        }
+
+class RedisStreamJobQueue(JobQueue):
+    """JobQueue on Redis streams, one stream per priority, one consumer group.
+
+    Claimed messages sit in the group's pending list. Heartbeats re-claim them
+    for the same consumer, resetting their idle time; messages idle longer than
+    the visibility timeout are taken over with XAUTOCLAIM and retried.
+    Exhausted jobs go to a dead-letter stream.
+    """
+
+    GROUP = "renderers"
+
+    def __init__(self, redis_url: str = settings.REDIS_URL, prefix: str = settings.JOB_QUEUE_STREAM_PREFIX):
+        import redis.asyncio as redis
+
+        self.redis = redis.from_url(redis_url, decode_responses=True)
+        self.streams = {priority: f"{prefix}:{priority.value}" for priority in PRIORITY_ORDER}
+        self.dead_letter_stream = f"{prefix}:dead"
+        self._groups_ready = False
+
+    async def enqueue(self, job_id: str, priority: JobPriority, attempts: int = 0) -> None:
+        await self._ensure_groups()
+        await self.redis.xadd(self.streams[priority], {"job_id": job_id, "attempts": attempts})
+
+    async def claim(self, consumer: str) -> Optional[QueuedJob]:
+        await self._ensure_groups()
+        visibility_ms = settings.JOB_QUEUE_VISIBILITY_TIMEOUT * 1000
+        for priority, stream in self.streams.items():
+            result = await self.redis.xautoclaim(stream, self.GROUP, consumer, visibility_ms, count=10)
+            for message_id, fields in result[1]:
+                if fields:
+                    entry = self._entry(priority, message_id, fields)
+                    logger.warning(f"Reclaiming job {entry.job_id} after visibility timeout")
+                    await self.retry(entry)
+
+        # Strict priority: poll each stream in order before blocking on all of them
+        for priority, stream in self.streams.items():
+            response = await self.redis.xreadgroup(self.GROUP, consumer, {stream: ">"}, count=1)
+            if response:
+                return self._first(response)
+
+        response = await self.redis.xreadgroup(
+            self.GROUP,
+            consumer,
+            {stream: ">" for stream in self.streams.values()},
+            count=1,
+            block=int(settings.JOB_QUEUE_BLOCK_SECONDS * 1000)
+        )
+        return self._first(response) if response else None
+
+    async def heartbeat(self, entry: QueuedJob, consumer: str) -> None:
+        await self.redis.xclaim(
+            self.streams[entry.priority],
+            self.GROUP,
+            consumer,
+            0,
+            [entry.message_id],
+            justid=True
+        )
+
+    async def ack(self, entry: QueuedJob) -> None:
+        stream = self.streams[entry.priority]
+        async with self.redis.pipeline(transaction=True) as pipe:
+            await pipe.xack(stream, self.GROUP, entry.message_id).xdel(stream, entry.message_id).execute()
+
+    async def retry(self, entry: QueuedJob) -> bool:
+        stream = self.streams[entry.priority]
+        exhausted = entry.attempts + 1 >= settings.JOB_QUEUE_MAX_ATTEMPTS
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xack(stream, self.GROUP, entry.message_id).xdel(stream, entry.message_id)
+            if exhausted:
+                pipe.xadd(self.dead_letter_stream, {"job_id": entry.job_id, "attempts": entry.attempts + 1})
+            else:
+                pipe.xadd(stream, {"job_id": entry.job_id, "attempts": entry.attempts + 1})
+            await pipe.execute()
+        return not exhausted
+
+    async def stats(self) -> Dict[str, int]:
+        await self._ensure_groups()
+        queued = running = 0
+        for stream in self.streams.values():
+            length = await self.redis.xlen(stream)
+            pending = (await self.redis.xpending(stream, self.GROUP))["pending"]
+            # Acked messages are deleted, so the stream holds waiting and claimed jobs
+            queued += length - pending
+            running += pending
+        return {"queued_jobs": queued, "running_jobs": running}
+
+    async def close(self) -> None:
+        await self.redis.close()
+
+    async def _ensure_groups(self) -> None:
+        if self._groups_ready:
+            return
+        from redis.exceptions import ResponseError
+
+        for stream in self.streams.values():
+            try:
+                await self.redis.xgroup_create(stream, self.GROUP, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+        self._groups_ready = True
+
+    def _entry(self, priority: JobPriority, message_id: str, fields: Dict[str, str]) -> QueuedJob:
+        return QueuedJob(fields["job_id"], priority, int(fields.get("attempts", 0)), message_id)
+
+    def _first(self, response) -> QueuedJob:
+        stream, messages = response[0]
+        priority = next(p for p, name in self.streams.items() if name == stream)
+        message_id, fields = messages[0]
+        return self._entry(priority, message_id, fields)
+
+class QueueScheduler:
+    """API-side scheduler that hands jobs to a JobQueue consumed by ``src.worker``.
+
+    Exposes the same interface as JobScheduler; rendering happens in worker
+    processes, which may run on other machines.
+    """
+
+    def __init__(self, queue: JobQueue, store: JobRepository = job_store):
+        self.queue = queue
+        self.store = store
+
+    def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        await self.queue.close()
+
+    async def stats(self) -> Dict[str, int]:
+        return await self.queue.stats()
+
+    async def submit(self, job: VideoJob) -> int:
+        """Admit a job, persist it and publish it to the queue."""
+        check_composition_limits(job)
+        queued_jobs = (await self.queue.stats())["queued_jobs"]
+        if queued_jobs >= settings.SCHEDULER_MAX_QUEUED_JOBS:
+            raise AdmissionError("Job queue is full, retry later")
+
+        job.stage = "queued"
+        # Workers load the job from the store, so it must exist before it is queued
+        await self.store.save(job)
+        await self.queue.enqueue(job.id, job.request.priority)
+        return queued_jobs + 1
+
+    async def cancel(self, job_id: str) -> bool:
+        """Mark a waiting job cancelled; workers skip it when they claim it."""
+        job = await self.store.get(job_id)
+        if job is None or job.status != JobStatus.PENDING:
+            return False
+        job.status = JobStatus.CANCELLED
+        job.updated_at = datetime.utcnow()
+        await self.store.update(job)
+        job_events.publish(job)
+        return True
+
+def create_job_queue(backend: str = settings.JOB_QUEUE_BACKEND) -> JobQueue:
+    """The JobQueue shared by API processes and ``src.worker``; only ``redis`` has one."""
+    if backend == "redis":
+        return RedisStreamJobQueue()
+    if backend == "local":
+        raise ValueError(
+            'JOB_QUEUE_BACKEND is "local": the API renders jobs itself and there is no queue '
+            'for workers to consume; set JOB_QUEUE_BACKEND=redis to run src.worker'
+        )
+    raise ValueError(f"Unsupported job queue backend: {backend}")
+
+def create_job_scheduler(processor: VideoProcessor, backend: str = settings.JOB_QUEUE_BACKEND):
+    """In-process JobScheduler for the ``local`` backend, QueueScheduler for ``redis``."""
+    if backend == "local":
+        return JobScheduler(processor)
+    return QueueScheduler(create_job_queue(backend), processor.job_store)
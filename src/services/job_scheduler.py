@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from ..models.enums import JobPriority, JobStatus
+from ..models.schemas import VideoJob
+from .video_processor import VideoProcessor
+from .job_events import job_events
+
+logger = logging.getLogger(__name__)
+
+# Scheduling order of priorities, most important first
+PRIORITY_ORDER = [JobPriority.URGENT, JobPriority.HIGH, JobPriority.NORMAL, JobPriority.LOW]
+
+class AdmissionError(Exception):
+    """Raised when the scheduler refuses to accept a job."""
+
+def job_seconds(job: VideoJob) -> float:
+    """Total video duration a job will render."""
+    return sum(scene.duration for scene in job.request.scenes)
+
+def check_composition_limits(job: VideoJob) -> None:
+    """Reject compositions exceeding the scene count or duration limits."""
+    request = job.request
+    if len(request.scenes) > settings.MAX_SCENES:
+        raise AdmissionError(f"Composition has {len(request.scenes)} scenes; maximum is {settings.MAX_SCENES}")
+
+    total_duration = job_seconds(job)
+    if total_duration > settings.MAX_TOTAL_DURATION:
+        raise AdmissionError(
+            f"Composition lasts {total_duration:.1f}s; maximum is {settings.MAX_TOTAL_DURATION}s"
+        )
+
+class JobScheduler:
+    """Priority queue with aging feeding a fixed set of render slots.
+
+    Each priority has its own FIFO. A job's effective start key is its
+    enqueue time minus a head start proportional to its priority, so higher
+    priorities jump ahead but a waiting LOW job eventually outranks newly
+    submitted URGENT work and cannot starve. The last
+    ``SCHEDULER_URGENT_SLOTS`` slots only ever run URGENT jobs, keeping
+    capacity free for them during bursts.
+    """
+
+    def __init__(self, processor: VideoProcessor, slots: int = settings.MAX_CONCURRENT_JOBS):
+        self.processor = processor
+        self.slots = max(1, slots)
+        self._queues: Dict[JobPriority, Deque[Tuple[float, VideoJob]]] = {
+            priority: deque() for priority in PRIORITY_ORDER
+        }
+        self._queued_seconds = 0.0
+        self._condition: Optional[asyncio.Condition] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def running_jobs(self) -> int:
+        return len(self.processor.active_jobs)
+
+    async def stats(self) -> Dict[str, int]:
+        return {"queued_jobs": self.queue_depth, "running_jobs": self.running_jobs}
+
+    def start(self) -> None:
+        """Start the worker slots."""
+        if self._workers:
+            return
+        self._condition = asyncio.Condition()
+        urgent_slots = min(settings.SCHEDULER_URGENT_SLOTS, self.slots - 1)
+        for slot in range(self.slots):
+            urgent_only = slot >= self.slots - urgent_slots
+            self._workers.append(asyncio.create_task(self._run_slot(slot, urgent_only)))
+        logger.info(f"Job scheduler started with {self.slots} slots ({urgent_slots} reserved for urgent jobs)")
+
+    async def stop(self) -> None:
+        """Cancel the worker slots; queued jobs stay PENDING."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, job: VideoJob) -> int:
+        """Admit a job into the queue and return its queue position."""
+        self._admit(job)
+        if self._condition is None:
+            self.start()
+
+        job.stage = "queued"
+        async with self._condition:
+            self._queues[job.request.priority].append((time.monotonic(), job))
+            self._queued_seconds += job_seconds(job)
+            self._condition.notify_all()
+        return self.queue_depth
+
+    async def cancel(self, job_id: str) -> bool:
+        """Remove a queued job; returns False if it is not waiting."""
+        if self._condition is None:
+            return False
+        async with self._condition:
+            for queue in self._queues.values():
+                for entry in queue:
+                    if entry[1].id == job_id:
+                        queue.remove(entry)
+                        self._queued_seconds -= job_seconds(entry[1])
+                        entry[1].status = JobStatus.CANCELLED
+                        entry[1].updated_at = datetime.utcnow()
+                        await self.processor.job_store.update(entry[1])
+                        job_events.publish(entry[1])
+                        return True
+        return False
+
+    def _admit(self, job: VideoJob) -> None:
+        """Apply admission control based on scene count and duration."""
+        check_composition_limits(job)
+        if self.queue_depth >= settings.SCHEDULER_MAX_QUEUED_JOBS:
+            raise AdmissionError("Job queue is full, retry later")
+
+        # URGENT work is only bounded by the queue length
+        if (job.request.priority != JobPriority.URGENT
+                and self._queued_seconds + job_seconds(job) > settings.SCHEDULER_MAX_QUEUED_SECONDS):
+            raise AdmissionError("Queued render backlog is too large, retry later")
+
+    def _pop_next(self, urgent_only: bool) -> Optional[VideoJob]:
+        """Pop the job with the lowest aged start key."""
+        now = time.monotonic()
+        best_priority = None
+        best_key = None
+        for rank, priority in enumerate(reversed(PRIORITY_ORDER)):
+            queue = self._queues[priority]
+            if not queue or (urgent_only and priority != JobPriority.URGENT):
+                continue
+            enqueued_at = queue[0][0]
+            key = enqueued_at - rank * settings.SCHEDULER_AGING_SECONDS
+            if best_key is None or key < best_key:
+                best_priority, best_key = priority, key
+
+        if best_priority is None:
+            return None
+        enqueued_at, job = self._queues[best_priority].popleft()
+        self._queued_seconds -= job_seconds(job)
+        logger.info(f"Starting job {job.id} ({best_priority.value}) after {now - enqueued_at:.1f}s in queue")
+        return job
+
+    async def _run_slot(self, slot: int, urgent_only: bool) -> None:
+        """Worker loop for a single render slot."""
+        while True:
+            async with self._condition:
+                job = self._pop_next(urgent_only)
+                while job is None:
+                    await self._condition.wait()
+                    job = self._pop_next(urgent_only)
+
+            try:
+                await self.processor.process_job(job)
+            except Exception as e:
+                logger.error(f"Slot {slot} failed to process job {job.id}: {e}")
@@ -0,0 +1,515 @@
+import asyncio
+import base64
+import bisect
+import logging
+import os
+import socket
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy import (
+    Column, DateTime, Float, Index, MetaData, String, Table, Text,
+    and_, create_engine, event, func, or_, select, update
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..core.config import settings
+from ..models.enums import JobStatus
+from ..models.schemas import BatchJob, JobSummary, VideoJob
+from .job_events import TERMINAL_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Sort key of the job listing: newest first, ties broken by id
+CursorKey = Tuple[datetime, str]
+
+class JobPage(NamedTuple):
+    total: int
+    jobs: List[Union[VideoJob, JobSummary]]
+    next_cursor: Optional[str]
+
+def encode_cursor(job: Union[VideoJob, JobSummary]) -> str:
+    raw = f"{job.created_at.isoformat()}|{job.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> CursorKey:
+    """Parse an opaque listing cursor; raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, job_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), job_id
+    except (UnicodeDecodeError, ValueError, base64.binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def _page(items: List[Union[VideoJob, JobSummary]], total: int, limit: int) -> JobPage:
+    """Build a page from up to ``limit + 1`` items fetched in listing order."""
+    next_cursor = encode_cursor(items[limit - 1]) if len(items) > limit else None
+    return JobPage(total, items[:limit], next_cursor)
+
+class JobRepository(ABC):
+    """Persistence for video jobs.
+
+    Status transitions are written through with ``save``; progress updates
+    go through ``record_progress`` and may be batched by the implementation.
+    """
+
+    async def start(self) -> None:
+        """Prepare the store and start any background work."""
+
+    async def close(self) -> None:
+        """Flush pending writes and stop background work."""
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[VideoJob]:
+        ...
+
+    @abstractmethod
+    async def save(self, job: VideoJob) -> None:
+        ...
+
+    @abstractmethod
+    async def update(self, job: VideoJob) -> bool:
+        """Save a job only if it still exists; returns False if it was deleted."""
+
+    @abstractmethod
+    async def delete(self, job_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def list(
+        self,
+        status: Optional[JobStatus] = None,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+        summary: bool = False
+    ) -> JobPage:
+        """List jobs newest first.
+
+        ``cursor`` resumes after the last job of a previous page (keyset
+        pagination); ``offset`` is kept for older clients and ignored when a
+        cursor is given. ``summary`` returns JobSummary projections.
+        """
+
+    @abstractmethod
+    def record_progress(self, job: VideoJob) -> None:
+        ...
+
+    @abstractmethod
+    async def get_many(self, job_ids: List[str]) -> List[VideoJob]:
+        """Jobs with the given ids, in order; missing ones are skipped."""
+
+    @abstractmethod
+    async def get_batch(self, batch_id: str) -> Optional[BatchJob]:
+        ...
+
+    @abstractmethod
+    async def save_batch(self, batch: BatchJob) -> None:
+        ...
+
+    async def recover_interrupted(self, stage: Optional[str] = None) -> List[VideoJob]:
+        """Claim jobs left unfinished by a dead process and reset them to PENDING.
+
+        ``stage`` restricts recovery to jobs in that stage.
+        """
+        return []
+
+class InMemoryJobRepository(JobRepository):
+    """Process-local job store; jobs are lost on restart.
+
+    Keeps one sorted key list per status (plus one for all jobs) so listings
+    are a bisect and a slice rather than a scan.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, VideoJob] = {}
+        self._statuses: Dict[str, JobStatus] = {}
+        self._indexes: Dict[Optional[JobStatus], List[CursorKey]] = {None: []}
+        self._batches: Dict[str, BatchJob] = {}
+
+    async def get(self, job_id: str) -> Optional[VideoJob]:
+        return self._jobs.get(job_id)
+
+    async def get_many(self, job_ids: List[str]) -> List[VideoJob]:
+        return [self._jobs[job_id] for job_id in job_ids if job_id in self._jobs]
+
+    async def get_batch(self, batch_id: str) -> Optional[BatchJob]:
+        return self._batches.get(batch_id)
+
+    async def save_batch(self, batch: BatchJob) -> None:
+        self._batches[batch.id] = batch
+
+    async def save(self, job: VideoJob) -> None:
+        previous = self._statuses.get(job.id)
+        if job.id not in self._jobs:
+            bisect.insort(self._indexes[None], (job.created_at, job.id))
+        if previous != job.status:
+            if previous is not None:
+                self._unindex(previous, job)
+            bisect.insort(self._indexes.setdefault(job.status, []), (job.created_at, job.id))
+        self._jobs[job.id] = job
+        self._statuses[job.id] = job.status
+
+    async def update(self, job: VideoJob) -> bool:
+        if job.id not in self._jobs:
+            return False
+        await self.save(job)
+        return True
+
+    async def delete(self, job_id: str) -> bool:
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        self._unindex(None, job)
+        self._unindex(self._statuses.pop(job_id), job)
+        return True
+
+    async def list(
+        self,
+        status: Optional[JobStatus] = None,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+        summary: bool = False
+    ) -> JobPage:
+        keys = self._indexes.get(status, [])
+        # Keys are ascending; walk backwards from the cursor for newest first
+        end = bisect.bisect_left(keys, decode_cursor(cursor)) if cursor else len(keys) - offset
+        page_keys = keys[max(0, end - limit - 1):max(0, end)][::-1]
+        jobs = [self._jobs[job_id] for _, job_id in page_keys]
+        if summary:
+            jobs = [JobSummary.from_job(job) for job in jobs]
+        return _page(jobs, len(keys), limit)
+
+    def _unindex(self, status: Optional[JobStatus], job: VideoJob) -> None:
+        keys = self._indexes.get(status, [])
+        position = bisect.bisect_left(keys, (job.created_at, job.id))
+        if position < len(keys) and keys[position] == (job.created_at, job.id):
+            del keys[position]
+
+    def record_progress(self, job: VideoJob) -> None:
+        # Jobs are stored by reference, progress is already visible
+        pass
+
+metadata = MetaData()
+
+jobs_table = Table(
+    "jobs",
+    metadata,
+    Column("id", String(36), primary_key=True),
+    Column("status", String(16), nullable=False),
+    Column("priority", String(16), nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+    Column("progress", Float, nullable=False, default=0.0),
+    Column("stage", String(32)),
+    Column("output_path", Text),
+    Column("error_message", Text),
+    Column("owner", String(64), index=True),
+    Column("payload", Text, nullable=False),
+    # Keyset pagination, overall and per status
+    Index("ix_jobs_created_at_id", "created_at", "id"),
+    Index("ix_jobs_status_created_at_id", "status", "created_at", "id")
+)
+
+SUMMARY_COLUMNS = [
+    jobs_table.c.id,
+    jobs_table.c.status,
+    jobs_table.c.priority,
+    jobs_table.c.created_at,
+    jobs_table.c.updated_at,
+    jobs_table.c.progress,
+    jobs_table.c.stage,
+    jobs_table.c.output_path,
+    jobs_table.c.error_message
+]
+
+batches_table = Table(
+    "batches",
+    metadata,
+    Column("id", String(36), primary_key=True),
+    Column("created_at", DateTime, nullable=False),
+    Column("payload", Text, nullable=False)
+)
+
+# Liveness of every process writing to the store, used to reclaim jobs
+workers_table = Table(
+    "workers",
+    metadata,
+    Column("owner", String(64), primary_key=True),
+    Column("heartbeat_at", DateTime, nullable=False)
+)
+
+def _enable_wal(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+class SQLiteJobRepository(JobRepository):
+    """SQLite (WAL) job store shared by every API worker on the host.
+
+    Progress updates are buffered and written in one transaction every
+    ``JOB_STORE_FLUSH_INTERVAL`` seconds. Each process heartbeats in the
+    ``workers`` table; PENDING/PROCESSING jobs owned by a process whose
+    heartbeat is older than ``JOB_STORE_LEASE_SECONDS`` are reclaimed by
+    ``recover_interrupted``, which the API runs periodically. A cleanly
+    closed store removes its heartbeat so its jobs are reclaimed at once.
+    Every write takes ownership of the row, so a job belongs to the process
+    that last worked on it.
+    """
+
+    def __init__(self, database_url: str):
+        self.engine = create_engine(database_url, connect_args={"check_same_thread": False})
+        event.listen(self.engine, "connect", _enable_wal)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._dirty: Dict[str, Dict[str, object]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await asyncio.to_thread(metadata.create_all, self.engine)
+        await asyncio.to_thread(self._heartbeat)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+        await asyncio.to_thread(self._retire)
+
+    async def get(self, job_id: str) -> Optional[VideoJob]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def save(self, job: VideoJob) -> None:
+        self._dirty.pop(job.id, None)
+        await asyncio.to_thread(self._save, job)
+
+    async def update(self, job: VideoJob) -> bool:
+        self._dirty.pop(job.id, None)
+        return await asyncio.to_thread(self._update, job)
+
+    async def get_many(self, job_ids: List[str]) -> List[VideoJob]:
+        return await asyncio.to_thread(self._get_many, job_ids)
+
+    async def get_batch(self, batch_id: str) -> Optional[BatchJob]:
+        return await asyncio.to_thread(self._get_batch, batch_id)
+
+    async def save_batch(self, batch: BatchJob) -> None:
+        await asyncio.to_thread(self._save_batch, batch)
+
+    async def delete(self, job_id: str) -> bool:
+        self._dirty.pop(job_id, None)
+        return await asyncio.to_thread(self._delete, job_id)
+
+    async def list(
+        self,
+        status: Optional[JobStatus] = None,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        offset: int = 0,
+        summary: bool = False
+    ) -> JobPage:
+        after = decode_cursor(cursor) if cursor else None
+        return await asyncio.to_thread(self._list, status, limit, after, offset, summary)
+
+    def record_progress(self, job: VideoJob) -> None:
+        # Snapshot now: the job keeps changing while the flush runs in a thread
+        self._dirty[job.id] = self._row(job)
+
+    async def flush(self) -> None:
+        """Write all buffered progress updates in a single transaction."""
+        if not self._dirty:
+            return
+        rows, self._dirty = list(self._dirty.values()), {}
+        await asyncio.to_thread(self._update_many, rows)
+
+    async def recover_interrupted(self, stage: Optional[str] = None) -> List[VideoJob]:
+        return await asyncio.to_thread(self._recover, stage)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.JOB_STORE_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+                await asyncio.to_thread(self._heartbeat)
+            except Exception as e:
+                logger.error(f"Error flushing job store: {e}")
+
+    def _row(self, job: VideoJob) -> Dict[str, object]:
+        return {
+            "id": job.id,
+            "status": job.status.value,
+            "priority": job.request.priority.value,
+            "created_at": job.created_at,
+            "updated_at": job.updated_at,
+            "progress": job.progress,
+            "stage": job.stage,
+            "output_path": job.output_path,
+            "error_message": job.error_message,
+            "payload": job.model_dump_json()
+        }
+
+    def _get(self, job_id: str) -> Optional[VideoJob]:
+        with self.engine.connect() as connection:
+            payload = connection.execute(
+                select(jobs_table.c.payload).where(jobs_table.c.id == job_id)
+            ).scalar_one_or_none()
+        return VideoJob.model_validate_json(payload) if payload else None
+
+    def _get_many(self, job_ids: List[str]) -> List[VideoJob]:
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                select(jobs_table.c.id, jobs_table.c.payload).where(jobs_table.c.id.in_(job_ids))
+            ).all()
+        payloads = dict(rows)
+        return [VideoJob.model_validate_json(payloads[job_id]) for job_id in job_ids if job_id in payloads]
+
+    def _get_batch(self, batch_id: str) -> Optional[BatchJob]:
+        with self.engine.connect() as connection:
+            payload = connection.execute(
+                select(batches_table.c.payload).where(batches_table.c.id == batch_id)
+            ).scalar_one_or_none()
+        return BatchJob.model_validate_json(payload) if payload else None
+
+    def _save_batch(self, batch: BatchJob) -> None:
+        statement = sqlite_insert(batches_table).values(
+            id=batch.id, created_at=batch.created_at, payload=batch.model_dump_json()
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[batches_table.c.id],
+            set_={"payload": statement.excluded.payload}
+        )
+        with self.engine.begin() as connection:
+            connection.execute(statement)
+
+    def _save(self, job: VideoJob) -> None:
+        row = self._row(job)
+        statement = sqlite_insert(jobs_table).values(**row, owner=self.owner)
+        statement = statement.on_conflict_do_update(
+            index_elements=[jobs_table.c.id],
+            set_={key: value for key, value in row.items() if key != "id"}
+        )
+        with self.engine.begin() as connection:
+            connection.execute(statement)
+
+    def _update(self, job: VideoJob) -> bool:
+        row = self._row(job)
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                update(jobs_table).where(jobs_table.c.id == row.pop("id")).values(**row, owner=self.owner)
+            )
+        return result.rowcount > 0
+
+    def _update_many(self, rows: List[Dict[str, object]]) -> None:
+        # A flush racing the final update must not reopen a finished job or roll back a newer write
+        terminal = [status.value for status in TERMINAL_STATUSES]
+        with self.engine.begin() as connection:
+            for row in rows:
+                row = dict(row)
+                connection.execute(
+                    update(jobs_table)
+                    .where(jobs_table.c.id == row.pop("id"))
+                    .where(jobs_table.c.status.not_in(terminal))
+                    .where(jobs_table.c.updated_at <= row["updated_at"])
+                    .values(**row, owner=self.owner)
+                )
+
+    def _delete(self, job_id: str) -> bool:
+        with self.engine.begin() as connection:
+            result = connection.execute(jobs_table.delete().where(jobs_table.c.id == job_id))
+        return result.rowcount > 0
+
+    def _list(
+        self,
+        status: Optional[JobStatus],
+        limit: int,
+        after: Optional[CursorKey],
+        offset: int,
+        summary: bool
+    ) -> JobPage:
+        query = select(*SUMMARY_COLUMNS) if summary else select(jobs_table.c.payload)
+        count_query = select(func.count()).select_from(jobs_table)
+        if status is not None:
+            query = query.where(jobs_table.c.status == status.value)
+            count_query = count_query.where(jobs_table.c.status == status.value)
+        if after is not None:
+            created_at, job_id = after
+            query = query.where(or_(
+                jobs_table.c.created_at < created_at,
+                and_(jobs_table.c.created_at == created_at, jobs_table.c.id < job_id)
+            ))
+        elif offset:
+            query = query.offset(offset)
+        query = query.order_by(jobs_table.c.created_at.desc(), jobs_table.c.id.desc()).limit(limit + 1)
+
+        with self.engine.connect() as connection:
+            total = connection.execute(count_query).scalar_one()
+            rows = connection.execute(query).all()
+        if summary:
+            jobs = [JobSummary(**row._mapping) for row in rows]
+        else:
+            jobs = [VideoJob.model_validate_json(row.payload) for row in rows]
+        return _page(jobs, total, limit)
+
+    def _heartbeat(self) -> None:
+        statement = sqlite_insert(workers_table).values(owner=self.owner, heartbeat_at=datetime.utcnow())
+        statement = statement.on_conflict_do_update(
+            index_elements=[workers_table.c.owner],
+            set_={"heartbeat_at": statement.excluded.heartbeat_at}
+        )
+        with self.engine.begin() as connection:
+            connection.execute(statement)
+
+    def _retire(self) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(workers_table.delete().where(workers_table.c.owner == self.owner))
+
+    def _recover(self, stage: Optional[str]) -> List[VideoJob]:
+        lease_cutoff = datetime.utcnow() - timedelta(seconds=settings.JOB_STORE_LEASE_SECONDS)
+        live_owners = select(workers_table.c.owner).where(workers_table.c.heartbeat_at >= lease_cutoff)
+        query = (
+            select(jobs_table.c.id, jobs_table.c.owner, jobs_table.c.payload)
+            .where(jobs_table.c.status.in_([JobStatus.PENDING.value, JobStatus.PROCESSING.value]))
+            .where(jobs_table.c.owner.not_in(live_owners) | jobs_table.c.owner.is_(None))
+        )
+        if stage is not None:
+            query = query.where(jobs_table.c.stage == stage)
+        recovered = []
+        with self.engine.begin() as connection:
+            rows = connection.execute(query).all()
+            for job_id, owner, payload in rows:
+                job = VideoJob.model_validate_json(payload)
+                job.status = JobStatus.PENDING
+                job.progress = 0.0
+                job.stage = None
+                job.updated_at = datetime.utcnow()
+                row = self._row(job)
+                # Only claim the job if no other process reclaimed it first
+                claimed = connection.execute(
+                    update(jobs_table)
+                    .where(jobs_table.c.id == row.pop("id"))
+                    .where(jobs_table.c.owner.is_(owner) if owner is None else jobs_table.c.owner == owner)
+                    .values(**row, owner=self.owner)
+                )
+                if claimed.rowcount:
+                    recovered.append(job)
+            connection.execute(workers_table.delete().where(workers_table.c.heartbeat_at < lease_cutoff))
+        if recovered:
+            logger.info(f"Recovered {len(recovered)} interrupted jobs")
+        return recovered
+
+def create_job_repository(database_url: str = settings.DATABASE_URL) -> JobRepository:
+    """Build the job repository for a DATABASE_URL (``sqlite://`` or ``memory://``)."""
+    if database_url.startswith("sqlite"):
+        return SQLiteJobRepository(database_url)
+    if database_url.startswith("memory"):
+        return InMemoryJobRepository()
+    raise ValueError(f"Unsupported job store URL: {database_url}")
+
+job_store = create_job_repository()
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from ..core import metrics
+from ..core.config import settings
+from ..models.enums import JobStatus
+from ..utils.remote_fetcher import RemoteFetcher, remote_fetcher
+from .job_store import JobRepository, job_store
+from .render_cache import RenderCache
+
+logger = logging.getLogger(__name__)
+
+SCRATCH_ROOT = settings.TEMP_DIR / "jobs"
+
+# Unfinished jobs read per query when collecting referenced media
+REFERENCE_PAGE_SIZE = 500
+
+# Caches under GENERATED_DIR and TEMP_DIR that evict by mtime themselves and are only trimmed under disk pressure
+PRESSURE_ONLY_DIRS = [settings.GENERATED_DIR / "segments", settings.TEMP_DIR / "pcm"]
+
+def job_scratch_dir(job_id: str) -> Path:
+    """Per-job directory for temporary render files, removed when the job finishes."""
+    path = SCRATCH_ROOT / job_id
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def remove_job_scratch(job_id: str) -> None:
+    shutil.rmtree(SCRATCH_ROOT / job_id, ignore_errors=True)
+
+def disk_used_fraction(path: Path) -> float:
+    usage = shutil.disk_usage(path)
+    return usage.used / usage.total
+
+def _directory_bytes(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except FileNotFoundError:
+                continue
+    return total
+
+class AssetReferences:
+    """Local media still needed by unfinished jobs, read from the shared job store.
+
+    Every PENDING or PROCESSING job pins the uploads it names and the
+    downloads its URLs resolve to, whichever API or worker process
+    submitted or runs it; referenced files are never evicted.
+    """
+
+    def __init__(self, store: JobRepository = job_store, fetcher: RemoteFetcher = remote_fetcher):
+        self.store = store
+        self.fetcher = fetcher
+
+    async def referenced(self) -> Set[Path]:
+        # Imported here to avoid a cycle; video_processor reads this module
+        from .video_processor import media_references
+
+        media_paths: Set[str] = set()
+        for status in (JobStatus.PENDING, JobStatus.PROCESSING):
+            cursor = None
+            while True:
+                page = await self.store.list(status=status, limit=REFERENCE_PAGE_SIZE, cursor=cursor)
+                for job in page.jobs:
+                    media_paths |= media_references(job.request)
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+
+        urls = [media_path for media_path in media_paths if re.match(r'^https?://', media_path)]
+        local_paths = (media_paths - set(urls)) | set(self.fetcher.cached_paths(urls))
+        return {Path(media_path).resolve() for media_path in local_paths}
+
+class Candidate(NamedTuple):
+    last_access: float
+    size: int
+    remove: Callable[[], None]
+
+class LifecycleManager:
+    """Keeps UPLOAD_DIR, GENERATED_DIR and TEMP_DIR at a steady size.
+
+    A periodic sweep removes orphaned scratch directories after
+    ``TEMP_TTL``, unreferenced uploads and downloads after ``UPLOAD_TTL``
+    and outputs and previews not accessed for ``GENERATED_TTL``. When the
+    data volume is fuller than ``DISK_HIGH_WATERMARK``, the least recently
+    used outputs, previews, segments, decoded audio and unreferenced uploads
+    are removed until it is back under ``DISK_LOW_WATERMARK``; the same
+    check runs before every render so a full volume never stalls an encode.
+    """
+
+    def __init__(
+        self,
+        render_cache: RenderCache,
+        store: JobRepository = job_store
+    ):
+        self.render_cache = render_cache
+        self.references = AssetReferences(store)
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def sweep(self) -> None:
+        """Apply TTLs, relieve disk pressure and publish usage."""
+        async with self._lock:
+            referenced = await self.references.referenced()
+            now = time.time()
+            removed = await asyncio.to_thread(self.render_cache.expire, now - settings.GENERATED_TTL)
+            removed += await asyncio.to_thread(self._expire_files, referenced, now)
+            if removed:
+                logger.info(f"Removed {removed} expired files")
+            await self._relieve_pressure(referenced)
+            await self._publish_usage()
+
+    async def ensure_free_space(self) -> None:
+        """Evict down to the low watermark if the volume is above the high one."""
+        if disk_used_fraction(settings.GENERATED_DIR) < settings.DISK_HIGH_WATERMARK:
+            return
+        async with self._lock:
+            await self._relieve_pressure(await self.references.referenced())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Lifecycle sweep failed: {e}")
+            await asyncio.sleep(settings.LIFECYCLE_INTERVAL)
+
+    def _expire_files(self, referenced: Set[Path], now: float) -> int:
+        removed = 0
+        # Scratch directories of jobs that died without cleaning up, and stray temporary directories
+        scratch = [entry for entry in SCRATCH_ROOT.glob("*") if entry.is_dir()] if SCRATCH_ROOT.exists() else []
+        scratch += [entry for entry in settings.TEMP_DIR.glob("tmp*") if entry.is_dir()]
+        for entry in scratch:
+            if self._mtime(entry) < now - settings.TEMP_TTL:
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+        for path in self._upload_files(referenced):
+            if self._mtime(path) < now - settings.UPLOAD_TTL:
+                path.unlink(missing_ok=True)
+                removed += 1
+        for path in self._preview_files():
+            if self._mtime(path) < now - settings.GENERATED_TTL:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    async def _relieve_pressure(self, referenced: Set[Path]) -> None:
+        usage = shutil.disk_usage(settings.GENERATED_DIR)
+        if usage.used / usage.total < settings.DISK_HIGH_WATERMARK:
+            return
+
+        to_free = usage.used - settings.DISK_LOW_WATERMARK * usage.total
+        removed, freed = await asyncio.to_thread(self._evict_lru, referenced, to_free)
+        logger.warning(
+            f"Disk {usage.used / usage.total:.0%} full; evicted {removed} files ({freed / 1024 / 1024:.1f} MB)"
+        )
+
+    def _evict_lru(self, referenced: Set[Path], to_free: float) -> Tuple[int, int]:
+        """Remove least recently used candidates until ``to_free`` bytes are freed."""
+        freed = 0
+        removed = 0
+        for candidate in sorted(self._candidates(referenced)):
+            if freed >= to_free:
+                break
+            candidate.remove()
+            freed += candidate.size
+            removed += 1
+        return removed, freed
+
+    def _candidates(self, referenced: Set[Path]) -> List[Candidate]:
+        candidates = [
+            Candidate(last_access, size, lambda digest=digest: self.render_cache.remove(digest))
+            for digest, last_access, size in self.render_cache.entries()
+        ]
+        paths = list(self._upload_files(referenced)) + list(self._preview_files())
+        for directory in PRESSURE_ONLY_DIRS:
+            if directory.exists():
+                paths += [path for path in directory.iterdir() if path.is_file()]
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            candidates.append(Candidate(stat.st_mtime, stat.st_size, lambda path=path: path.unlink(missing_ok=True)))
+        return candidates
+
+    def _upload_files(self, referenced: Set[Path]) -> Iterable[Path]:
+        """Uploads and remote downloads no unfinished job references."""
+        for path in settings.UPLOAD_DIR.iterdir():
+            # Partial writes and the remote URL index
+            if path.name.startswith(".") or path.suffix in (".json", ".tmp") or not path.is_file():
+                continue
+            if path.resolve() not in referenced:
+                yield path
+
+    def _preview_files(self) -> Iterable[Path]:
+        preview_dir = settings.GENERATED_DIR / "previews"
+        return preview_dir.glob("*") if preview_dir.exists() else []
+
+    def _mtime(self, path: Path) -> float:
+        try:
+            return path.stat().st_mtime
+        except FileNotFoundError:
+            return time.time()
+
+    async def _publish_usage(self) -> None:
+        if not settings.METRICS_ENABLED:
+            return
+        areas = {"uploads": settings.UPLOAD_DIR, "generated": settings.GENERATED_DIR, "temp": settings.TEMP_DIR}
+        usage = {area: await asyncio.to_thread(_directory_bytes, path) for area, path in areas.items()}
+        metrics.set_disk_usage(usage, shutil.disk_usage(settings.GENERATED_DIR).free)
@@ -0,0 +1,196 @@
+import bisect
+import os
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from moviepy.editor import ImageClip, VideoClip, concatenate_videoclips
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+from ..core.config import settings
+from ..models.schemas import TextOverlay
+
+class OverlayLayer(NamedTuple):
+    """Premultiplied RGBA layer cropped to its visible bounding box."""
+    premultiplied: np.ndarray  # (h, w, 3) float32, colour already scaled by alpha
+    inverse_alpha: np.ndarray  # (h, w, 1) float32, 1 - alpha
+    top: int
+    left: int
+
+def _to_layer(image: Image.Image, top: int = 0, left: int = 0) -> Optional[OverlayLayer]:
+    """Convert an RGBA image into a premultiplied layer, cropping transparent borders."""
+    bbox = image.getchannel("A").getbbox()
+    if bbox is None:
+        return None
+    rgba = np.asarray(image.crop(bbox), dtype=np.float32) / 255.0
+    alpha = rgba[..., 3:]
+    layer = OverlayLayer(
+        premultiplied=rgba[..., :3] * alpha * 255.0,
+        inverse_alpha=1.0 - alpha,
+        top=top + bbox[1],
+        left=left + bbox[0]
+    )
+    layer.premultiplied.setflags(write=False)
+    layer.inverse_alpha.setflags(write=False)
+    return layer
+
+@lru_cache(maxsize=64)
+def _load_font(font: str, size: int) -> ImageFont.ImageFont:
+    """Resolve a font family or file name, falling back to Pillow's default font."""
+    candidates = [font, f"{font}.ttf", f"{font.replace(' ', '')}.ttf", f"{font.replace(' ', '-')}.ttf"]
+    for candidate in candidates:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+@lru_cache(maxsize=settings.OVERLAY_CACHE_SIZE)
+def _text_layer(
+    text: str,
+    font: str,
+    size: int,
+    color: str,
+    position_x: float,
+    position_y: float,
+    frame_size: Tuple[int, int]
+) -> Optional[OverlayLayer]:
+    width, height = frame_size
+    image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    draw.text(
+        (position_x * width, position_y * height),
+        text,
+        font=_load_font(font, size),
+        fill=ImageColor.getcolor(color, "RGBA"),
+        anchor="mm"
+    )
+    return _to_layer(image)
+
+def text_layer(overlay: TextOverlay, frame_size: Tuple[int, int]) -> Optional[OverlayLayer]:
+    """Rasterize a text overlay once per (text, font, size, color, position, frame size)."""
+    return _text_layer(
+        overlay.text,
+        overlay.font,
+        overlay.size,
+        overlay.color,
+        overlay.position_x,
+        overlay.position_y,
+        tuple(frame_size)
+    )
+
+@lru_cache(maxsize=settings.OVERLAY_CACHE_SIZE)
+def _watermark_layer(
+    path: str,
+    modified_ns: int,
+    opacity: float,
+    frame_size: Tuple[int, int]
+) -> Optional[OverlayLayer]:
+    width, height = frame_size
+    with Image.open(path) as source:
+        image = source.convert("RGBA")
+
+    # Same placement as the ffmpeg engine: 1/6 of the width, bottom-right margin
+    target_width = max(2, width // 6)
+    target_height = max(1, round(image.height * target_width / image.width))
+    image = image.resize((target_width, target_height), Image.LANCZOS)
+    alpha = np.asarray(image.getchannel("A"), dtype=np.float32) * opacity
+    image.putalpha(Image.fromarray(alpha.astype(np.uint8)))
+
+    margin_x, margin_y = width // 40, height // 40
+    return _to_layer(
+        image,
+        top=max(0, height - target_height - margin_y),
+        left=max(0, width - target_width - margin_x)
+    )
+
+def watermark_layer(path: str, opacity: float, frame_size: Tuple[int, int]) -> Optional[OverlayLayer]:
+    """Rasterize a watermark once per (file version, opacity, frame size)."""
+    return _watermark_layer(path, os.stat(path).st_mtime_ns, opacity, tuple(frame_size))
+
+def flatten_layers(layers: Sequence[Optional[OverlayLayer]]) -> Optional[OverlayLayer]:
+    """Composite layers bottom-to-top into a single premultiplied layer."""
+    layers = [layer for layer in layers if layer is not None]
+    if len(layers) <= 1:
+        return layers[0] if layers else None
+
+    top = min(layer.top for layer in layers)
+    left = min(layer.left for layer in layers)
+    bottom = max(layer.top + layer.premultiplied.shape[0] for layer in layers)
+    right = max(layer.left + layer.premultiplied.shape[1] for layer in layers)
+
+    premultiplied = np.zeros((bottom - top, right - left, 3), dtype=np.float32)
+    inverse_alpha = np.ones((bottom - top, right - left, 1), dtype=np.float32)
+    for layer in layers:
+        h, w = layer.premultiplied.shape[:2]
+        region = (slice(layer.top - top, layer.top - top + h), slice(layer.left - left, layer.left - left + w))
+        # "Over" operator on premultiplied colour
+        premultiplied[region] = layer.premultiplied + premultiplied[region] * layer.inverse_alpha
+        inverse_alpha[region] *= layer.inverse_alpha
+    return OverlayLayer(premultiplied, inverse_alpha, top, left)
+
+def blend_layer(frame: np.ndarray, layer: Optional[OverlayLayer]) -> np.ndarray:
+    """Alpha-blend a flattened layer onto a frame inside the layer's bounding box."""
+    if layer is None:
+        return frame
+    h, w = layer.premultiplied.shape[:2]
+    frame = frame.copy()
+    region = frame[layer.top:layer.top + h, layer.left:layer.left + w]
+    # Layers may extend past frames of a different size; blend the overlap only
+    rh, rw = region.shape[:2]
+    region[:] = (region * layer.inverse_alpha[:rh, :rw] + layer.premultiplied[:rh, :rw]).astype(np.uint8)
+    return frame
+
+TimedLayer = Tuple[float, Optional[float], Optional[OverlayLayer]]
+
+def _flatten_intervals(
+    timed_layers: List[TimedLayer],
+    duration: float
+) -> Tuple[List[float], List[Optional[OverlayLayer]]]:
+    """Interval start times and the flattened layer active during each interval."""
+    timed_layers = [(start, duration if end is None else end, layer) for start, end, layer in timed_layers]
+    boundaries = sorted({0.0, *(start for start, _, _ in timed_layers), *(end for _, end, _ in timed_layers)})
+    flattened = [
+        flatten_layers([layer for start, end, layer in timed_layers if start <= boundary < end])
+        for boundary in boundaries
+    ]
+    return boundaries, flattened
+
+def apply_layers(clip: VideoClip, timed_layers: List[TimedLayer]) -> VideoClip:
+    """Blend time-ranged layers onto a clip with one flattened layer per interval.
+
+    ``timed_layers`` holds ``(start, end, layer)`` tuples; ``end=None`` means
+    until the end of the clip. Every interval between start/end boundaries
+    gets its active layers flattened once up front.
+    """
+    boundaries, flattened = _flatten_intervals(timed_layers, clip.duration)
+    if not any(layer is not None for layer in flattened):
+        return clip
+
+    def blend(get_frame, t):
+        return blend_layer(get_frame(t), flattened[bisect.bisect_right(boundaries, t) - 1])
+
+    return clip.fl(blend)
+
+def composite_still(
+    frame: np.ndarray,
+    timed_layers: List[TimedLayer],
+    duration: float
+) -> List[Tuple[float, float, np.ndarray]]:
+    """Blend time-ranged layers onto a still frame once per interval.
+
+    Returns ``(start, end, frame)`` tuples covering ``[0, duration)``, so a
+    still scene is composited once per overlay change instead of per frame.
+    """
+    boundaries, flattened = _flatten_intervals(timed_layers, duration)
+    intervals = []
+    for start, end, layer in zip(boundaries, boundaries[1:] + [duration], flattened):
+        start, end = max(0.0, start), min(end, duration)
+        if end > start:
+            intervals.append((start, end, blend_layer(frame, layer)))
+    return intervals
+
+def still_clip(frame: np.ndarray, timed_layers: List[TimedLayer], duration: float) -> VideoClip:
+    """Clip of a still frame with its overlays pre-composited per interval."""
+    clips = [ImageClip(still, duration=end - start) for start, end, still in composite_still(frame, timed_layers, duration)]
+    return clips[0] if len(clips) == 1 else concatenate_videoclips(clips)
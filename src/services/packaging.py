@@ -0,0 +1,69 @@
+import logging
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import List
+
+from imageio_ffmpeg import get_ffmpeg_exe
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+HLS_PLAYLIST = "index.m3u8"
+
+HLS_MEDIA_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+    ".mp4": "video/mp4"
+}
+
+def hls_dir(video_path: Path) -> Path:
+    """Directory holding the HLS rendition of a generated video, next to it."""
+    return video_path.with_name(f"{video_path.stem}_hls")
+
+def keyframe_args(segment_seconds: float = settings.HLS_SEGMENT_SECONDS) -> List[str]:
+    """Encoder arguments forcing a keyframe at every HLS segment boundary."""
+    return ["-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})"]
+
+def package_hls(video_path: Path, segment_seconds: float = settings.HLS_SEGMENT_SECONDS) -> Path:
+    """Remux an MP4 into fMP4 HLS segments and a VOD playlist; returns the playlist.
+
+    Streams are copied, so segment boundaries fall on the keyframes placed by
+    ``keyframe_args`` at encode time. Existing packages are reused.
+    """
+    output_dir = hls_dir(video_path)
+    playlist = output_dir / HLS_PLAYLIST
+    if playlist.exists():
+        return playlist
+
+    # Package into a scratch directory of our own so readers never see a partial
+    # playlist and concurrent jobs sharing this output don't clobber each other
+    partial_dir = Path(tempfile.mkdtemp(prefix=f".{output_dir.name}.", suffix=".partial", dir=output_dir.parent))
+    command = [
+        get_ffmpeg_exe(), "-y", "-loglevel", "error",
+        "-i", str(video_path),
+        "-c", "copy",
+        "-f", "hls",
+        "-hls_time", str(segment_seconds),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_type", "fmp4",
+        "-hls_fmp4_init_filename", "init.mp4",
+        "-hls_segment_filename", str(partial_dir / "segment_%05d.m4s"),
+        str(partial_dir / HLS_PLAYLIST)
+    ]
+    try:
+        subprocess.run(command, check=True, capture_output=True, text=True)
+        try:
+            partial_dir.replace(output_dir)
+        except OSError:
+            # Packaged concurrently by another job sharing this output
+            if not playlist.exists():
+                raise
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"HLS packaging failed: {e.stderr.strip()[-500:]}")
+    finally:
+        shutil.rmtree(partial_dir, ignore_errors=True)
+    logger.info(f"Packaged {video_path.name} as HLS")
+    return playlist
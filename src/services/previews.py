@@ -0,0 +1,91 @@
+import logging
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import List
+
+from imageio_ffmpeg import get_ffmpeg_exe
+from PIL import Image
+
+from ..core.config import settings
+from ..models.enums import JobPriority, PreviewMode
+from ..models.schemas import VideoCompositionRequest
+from .ingest import resolve_output_size
+from .timeline import scene_start_times, transition_overlap
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_DIR = settings.GENERATED_DIR / "previews"
+
+PREVIEW_MEDIA_TYPES = {
+    PreviewMode.PROXY: "video/mp4",
+    PreviewMode.CONTACT_SHEET: "image/jpeg"
+}
+
+def preview_path(job_id: str, mode: PreviewMode) -> Path:
+    suffix = ".jpg" if mode == PreviewMode.CONTACT_SHEET else ".mp4"
+    return PREVIEW_DIR / f"{job_id}{suffix}"
+
+def proxy_request(request: VideoCompositionRequest) -> VideoCompositionRequest:
+    """The same composition at preview resolution and frame rate with the fastest profile."""
+    width, height = resolve_output_size(request.settings.video_settings)
+    preview_height = min(height, settings.PREVIEW_HEIGHT)
+    video_settings = request.settings.video_settings.model_copy(update={
+        "width": round(width * preview_height / height),
+        "height": preview_height,
+        "fps": min(request.settings.video_settings.fps, settings.PREVIEW_FPS),
+        "bitrate": None
+    })
+    composition = request.settings.model_copy(update={
+        "video_settings": video_settings,
+        "package_hls": False,
+        "preview": PreviewMode.NONE,
+        "preview_only": False
+    })
+    # Urgent priority selects the ultrafast encoding profile
+    return request.model_copy(update={"settings": composition, "priority": JobPriority.URGENT})
+
+def contact_sheet_frames(request: VideoCompositionRequest) -> List[int]:
+    """Frame numbers of the first full frame of every scene, the middle of every transition and the end."""
+    starts, total_duration = scene_start_times(request.scenes)
+    fps = request.settings.video_settings.fps
+    last_frame = max(0, round(total_duration * fps) - 1)
+    times = []
+    for i, (scene, start) in enumerate(zip(request.scenes, starts)):
+        overlap = transition_overlap(request.scenes[i - 1], scene) if i > 0 else 0.0
+        if overlap:
+            times.append(start + overlap / 2)
+        times.append(start + overlap)
+    return sorted({min(round(t * fps), last_frame) for t in times} | {last_frame})
+
+def write_contact_sheet(video_path: Path, frames: List[int], output_path: Path) -> Path:
+    """Tile the given frames of a rendered video into a JPEG grid, decoding it once."""
+    selection = "+".join(f"eq(n\\,{frame})" for frame in frames)
+    with tempfile.TemporaryDirectory(dir=settings.TEMP_DIR) as temp_dir:
+        result = subprocess.run(
+            [
+                get_ffmpeg_exe(), "-v", "error",
+                "-i", str(video_path),
+                "-vf", f"select={selection},scale={settings.CONTACT_SHEET_THUMB_WIDTH}:-2",
+                "-fps_mode", "passthrough",
+                str(Path(temp_dir) / "%04d.png")
+            ],
+            capture_output=True
+        )
+        thumb_paths = sorted(Path(temp_dir).glob("*.png"))
+        if result.returncode != 0 or not thumb_paths:
+            raise RuntimeError(f"Frame extraction failed: {result.stderr.decode(errors='ignore')[-500:]}")
+        thumbs = [Image.open(path).convert("RGB") for path in thumb_paths]
+
+    columns = min(settings.CONTACT_SHEET_COLUMNS, len(thumbs))
+    rows = -(-len(thumbs) // columns)
+    thumb_width, thumb_height = thumbs[0].size
+    sheet = Image.new("RGB", (columns * thumb_width, rows * thumb_height))
+    for index, thumb in enumerate(thumbs):
+        sheet.paste(thumb, ((index % columns) * thumb_width, (index // columns) * thumb_height))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = output_path.with_suffix(".partial.jpg")
+    sheet.save(partial_path, "JPEG", quality=85)
+    partial_path.replace(output_path)
+    logger.info(f"Wrote a {len(thumbs)}-frame contact sheet to {output_path}")
+    return output_path
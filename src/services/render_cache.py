@@ -0,0 +1,225 @@
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..core.config import settings
+from ..models.schemas import VideoCompositionRequest
+from ..utils.file_handlers import get_file_hash
+from .encoding_profiles import select_profile
+from .packaging import hls_dir
+
+logger = logging.getLogger(__name__)
+
+# Bump when rendering changes so stale outputs are not reused
+RENDER_CACHE_VERSION = "1"
+
+# Request fields that never influence the rendered pixels
+NON_RENDER_FIELDS = {
+    "priority": True,
+    "webhook_url": True,
+    "metadata": True,
+    "settings": {"preview": True, "preview_only": True}
+}
+
+class RenderCache:
+    """Content-addressed cache of rendered compositions in GENERATED_DIR.
+
+    Outputs are named after a stable digest of the canonical request and the
+    content hashes of its inputs. An on-disk JSON index, shared by every
+    process under a file lock, tracks sizes; each output's mtime is its last
+    access for LRU eviction. Concurrent renders of the same digest are
+    coalesced onto a single in-flight future within a process; across
+    processes each render writes its own partial file and the last one to
+    finish replaces the output. Index access blocks on the file lock, so
+    async callers run it in a thread.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = settings.GENERATED_DIR,
+        max_bytes: int = settings.RENDER_CACHE_MAX_BYTES
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = cache_dir / "render_cache.json"
+        self.lock_path = cache_dir / "render_cache.lock"
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._file_hashes: Dict[Tuple[str, int, int], str] = {}
+
+    async def compute_digest(self, request: VideoCompositionRequest) -> str:
+        """Return the canonical digest of a request with local media paths."""
+        payload = request.model_dump(mode="json", exclude=NON_RENDER_FIELDS)
+
+        for scene in payload["scenes"]:
+            scene["media_path"] = await self._content_ref(scene["media_path"])
+            if scene.get("audio") and scene["audio"].get("media_path"):
+                scene["audio"]["media_path"] = await self._content_ref(scene["audio"]["media_path"])
+
+        composition = payload["settings"]
+        background_audio = composition.get("background_audio")
+        if background_audio and background_audio.get("media_path"):
+            background_audio["media_path"] = await self._content_ref(background_audio["media_path"])
+        if composition.get("watermark_path"):
+            composition["watermark_path"] = await self._content_ref(composition["watermark_path"])
+
+        # Priority is excluded but selects the x264 profile, which changes the output
+        profile = select_profile(request).model_dump(exclude={"threads"})
+        canonical = json.dumps(
+            {"version": RENDER_CACHE_VERSION, "request": payload, "encoding_profile": profile},
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def output_path(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}.mp4"
+
+    def contains(self, path: str) -> bool:
+        """Whether a file is owned by the cache and must not be deleted directly."""
+        return Path(path).stem in self._read_index()
+
+    def lookup(self, digest: str) -> Optional[Path]:
+        """Return the cached output for a digest and mark it recently used."""
+        entry = self._read_index().get(digest)
+        if entry is None:
+            return None
+
+        path = Path(entry["path"])
+        try:
+            # The output's mtime is its last access, so hits don't rewrite the index
+            os.utime(path)
+        except FileNotFoundError:
+            with self._locked_index() as index:
+                index.pop(digest, None)
+            return None
+        return path
+
+    async def get_or_render(
+        self,
+        digest: str,
+        render: Callable[[Path], Awaitable[Any]]
+    ) -> Tuple[Path, bool]:
+        """Return ``(path, cache_hit)``, rendering at most once per digest."""
+        cached = await asyncio.to_thread(self.lookup, digest)
+        if cached is not None:
+            return cached, True
+
+        inflight = self._inflight.get(digest)
+        if inflight is not None:
+            return await asyncio.shield(inflight), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[digest] = future
+        try:
+            path = await self._render_into_cache(digest, render)
+            future.set_result(path)
+            return path, False
+        except Exception as e:
+            future.set_exception(e)
+            # Mark as retrieved when no duplicate request was waiting
+            future.exception()
+            raise
+        finally:
+            del self._inflight[digest]
+
+    async def _render_into_cache(self, digest: str, render: Callable[[Path], Awaitable[Any]]) -> Path:
+        path = self.output_path(digest)
+        # Unique per render: the API and workers may render the same digest at once
+        partial_path = path.with_suffix(f".{uuid.uuid4().hex}.partial.mp4")
+        try:
+            await render(partial_path)
+            os.replace(partial_path, path)
+        finally:
+            partial_path.unlink(missing_ok=True)
+
+        await asyncio.to_thread(self._insert, digest, path)
+        return path
+
+    def _insert(self, digest: str, path: Path) -> None:
+        with self._locked_index() as index:
+            index[digest] = {"path": str(path), "size": path.stat().st_size, "created_at": time.time()}
+        # The output just rendered is about to be returned, so it is never evicted here
+        self._evict(keep=digest)
+
+    def entries(self) -> List[Tuple[str, float, int]]:
+        """``(digest, last_access, size)`` of every cached output."""
+        entries = []
+        for digest, entry in self._read_index().items():
+            try:
+                last_access = os.stat(entry["path"]).st_mtime
+            except FileNotFoundError:
+                last_access = 0.0
+            entries.append((digest, last_access, entry["size"]))
+        return entries
+
+    def remove(self, digest: str) -> None:
+        """Delete a cached output and its HLS rendition."""
+        with self._locked_index() as index:
+            entry = index.pop(digest, None)
+        if entry is None:
+            return
+        Path(entry["path"]).unlink(missing_ok=True)
+        shutil.rmtree(hls_dir(Path(entry["path"])), ignore_errors=True)
+        logger.info(f"Evicted cached render {digest}")
+
+    def expire(self, cutoff: float) -> int:
+        """Remove outputs last accessed before ``cutoff``; returns how many."""
+        expired = [digest for digest, last_access, _ in self.entries() if last_access < cutoff]
+        for digest in expired:
+            self.remove(digest)
+        return len(expired)
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Remove least recently used outputs, except ``keep``, until the cache fits max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, _, size in entries)
+        for digest, _, size in sorted(entries, key=lambda entry: entry[1]):
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            total -= size
+            self.remove(digest)
+
+    async def _content_ref(self, media_path: str) -> str:
+        """Replace a local media path by a reference to its content hash."""
+        stat = os.stat(media_path)
+        key = (media_path, stat.st_size, stat.st_mtime_ns)
+        if key not in self._file_hashes:
+            self._file_hashes[key] = await get_file_hash(media_path)
+        return f"sha256:{self._file_hashes[key]}"
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        # Writers replace the file atomically, so reads need no lock
+        try:
+            return json.loads(self.index_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @contextmanager
+    def _locked_index(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """Re-read, modify and write the index under an exclusive file lock.
+
+        The API and every worker share GENERATED_DIR, so the index is merged
+        from disk on each change rather than written from a stale copy.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                index = self._read_index()
+                yield index
+                temp_path = self.index_path.with_suffix(".tmp")
+                temp_path.write_text(json.dumps(index))
+                os.replace(temp_path, self.index_path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
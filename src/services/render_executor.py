@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from ..core.config import settings
+from ..models.schemas import VideoCompositionRequest
+from .render_pipeline import RenderPipeline
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[str, float], None]
+
+# Progress queue and render pipeline set up once in every worker process
+_worker_progress_queue = None
+_worker_pipeline: Optional[RenderPipeline] = None
+
+def _init_worker(progress_queue) -> None:
+    """Store the shared progress queue and build the pipeline inside a freshly spawned worker."""
+    global _worker_progress_queue, _worker_pipeline
+    _worker_progress_queue = progress_queue
+    _worker_pipeline = RenderPipeline()
+
+def _run_render(job_id: str, request_json: str, output_path: str, scratch_dir: Optional[str]) -> Dict[str, Any]:
+    """Render a serialized composition inside a worker process."""
+    def report(stage: str, progress: float) -> None:
+        if _worker_progress_queue is not None:
+            _worker_progress_queue.put((job_id, stage, progress))
+
+    request = VideoCompositionRequest.model_validate_json(request_json)
+    result = _worker_pipeline.render(request, Path(output_path), report, Path(scratch_dir) if scratch_dir else None)
+    return {"output_path": output_path, **result}
+
+class RenderExecutor:
+    """Pool of worker processes that run blocking renders off the event loop.
+
+    Requests are handed to workers as JSON; workers stream
+    ``(job_id, stage, progress)`` tuples back over a shared queue which a
+    pump thread forwards to the callback registered for the job.
+    """
+
+    def __init__(self, max_workers: int = settings.RENDER_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._context = multiprocessing.get_context("spawn")
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._progress_queue = None
+        self._pump: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listeners: Dict[str, ProgressCallback] = {}
+
+    def start(self) -> None:
+        """Spawn the worker pool and the progress pump."""
+        if self._pool is not None:
+            return
+        self._progress_queue = self._context.Queue()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self._progress_queue,)
+        )
+        self._pump = threading.Thread(
+            target=self._pump_progress,
+            args=(self._progress_queue,),
+            name="render-progress-pump",
+            daemon=True
+        )
+        self._pump.start()
+        logger.info(f"Render executor started with {self.max_workers} workers")
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pool and the progress pump."""
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        self._progress_queue.put(None)
+        self._pool = None
+        self._progress_queue = None
+        self._pump = None
+
+    async def render(
+        self,
+        job_id: str,
+        request: VideoCompositionRequest,
+        output_path: Path,
+        on_progress: Optional[ProgressCallback] = None,
+        scratch_dir: Optional[Path] = None
+    ) -> Dict[str, Any]:
+        """Render a composition to output_path in a worker process, keeping temporary files in scratch_dir."""
+        self.start()
+        self._loop = asyncio.get_running_loop()
+        if on_progress:
+            self._listeners[job_id] = on_progress
+
+        try:
+            future = self._pool.submit(
+                _run_render, job_id, request.model_dump_json(), str(output_path),
+                str(scratch_dir) if scratch_dir else None
+            )
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            logger.error(f"Render worker died while processing job {job_id}; restarting pool")
+            self.shutdown(wait=False)
+            raise RuntimeError("Render worker terminated unexpectedly")
+        finally:
+            self._listeners.pop(job_id, None)
+
+    def _pump_progress(self, progress_queue) -> None:
+        """Forward worker progress messages to the event loop."""
+        while True:
+            try:
+                message = progress_queue.get()
+            except (EOFError, OSError):
+                break
+            if message is None:
+                break
+            loop = self._loop
+            if loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(self._dispatch, *message)
+
+    def _dispatch(self, job_id: str, stage: str, progress: float) -> None:
+        listener = self._listeners.get(job_id)
+        if listener is None:
+            return
+        try:
+            listener(stage, progress)
+        except Exception as e:
+            logger.error(f"Progress callback failed for job {job_id}: {e}")
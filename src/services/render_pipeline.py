@@ -0,0 +1,272 @@
+import logging
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from moviepy.editor import (
+    VideoFileClip,
+    concatenate_videoclips
+)
+from proglog import ProgressBarLogger
+from ..core import metrics
+from ..core.config import settings
+from ..models.enums import RenderEngine, TransitionType
+from ..models.schemas import Scene, TextOverlay, VideoCompositionRequest
+from .audio_pipeline import audio_pipeline
+from .encoding_profiles import rate_control_args, select_profile
+from .ffmpeg_renderer import FFmpegRenderer, ProgressReporter
+from .ingest import load_still, open_video_clip, resolve_output_size
+from .overlays import OverlayLayer, apply_layers, still_clip, text_layer, watermark_layer
+from .packaging import keyframe_args
+from .segment_cache import SegmentedRenderer
+from .timeline import scene_start_times, transition_overlap
+from .transitions import TransitionEngine
+
+logger = logging.getLogger(__name__)
+
+class _RenderProgressLogger(ProgressBarLogger):
+    """Proglog logger translating MoviePy's audio and frame bars into progress reports."""
+
+    def __init__(self, report: ProgressReporter):
+        super().__init__()
+        self._report = report
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        if attr != 'index' or bar not in ('chunk', 't'):
+            return
+        total = self.bars[bar].get('total')
+        if total:
+            stage = "audio" if bar == 'chunk' else "encoding"
+            self._report(stage, min(1.0, (value + 1) / total))
+
+class RenderPipeline:
+    """Synchronous rendering of a composition with the selected engine.
+
+    Holds no job, cache or executor state, so each render worker process
+    builds one and reuses it for every render it runs.
+    """
+
+    def __init__(self):
+        self.transition_engine = TransitionEngine()
+
+    def render(
+        self,
+        request: VideoCompositionRequest,
+        output_path: Path,
+        report: Optional[ProgressReporter] = None,
+        scratch_dir: Optional[Path] = None
+    ) -> Dict[str, Any]:
+        """Render a composition synchronously with the selected engine.
+
+        Runs inside a render worker process and returns the engine used, the
+        encoding profile, the encode throughput (None when every segment came
+        from the cache) and the stage timings.
+        Temporary files go to ``scratch_dir``, the job's scratch directory.
+        """
+        report = report or (lambda stage, progress: None)
+        scratch_dir = scratch_dir or settings.TEMP_DIR
+        stage_timings: Dict[str, float] = {}
+        engine = self.select_engine(request)
+        profile = select_profile(request)
+        _, total_duration = scene_start_times(request.scenes)
+        frames = round(total_duration * request.settings.video_settings.fps)
+        if engine == RenderEngine.FFMPEG:
+            FFmpegRenderer(scratch_dir=scratch_dir).render(request, output_path, report, stage_timings)
+        elif engine == RenderEngine.SEGMENTED:
+            # Only segments missing from the cache are encoded
+            frames = SegmentedRenderer(
+                lambda scene, frame_size: self._process_scene(scene, frame_size, scratch_dir),
+                scratch_dir=scratch_dir
+            ).render(request, output_path, report, stage_timings)
+        else:
+            self._create_composition(request, output_path, report, stage_timings, scratch_dir)
+
+        encode_seconds = stage_timings.get("encode", 0.0)
+        logger.info(f"Encoded {frames} frames with the {profile.name} profile in {encode_seconds:.2f}s")
+        return {
+            "engine": engine.value,
+            "encoding_profile": profile.model_dump(),
+            "encode_fps": round(frames / encode_seconds, 1) if frames and encode_seconds > 0 else None,
+            "stage_timings": stage_timings,
+            "cache_lookups": metrics.drain_worker_cache_counts()
+        }
+
+    def select_engine(self, request: VideoCompositionRequest) -> RenderEngine:
+        """Honour the requested engine when it can express the request.
+
+        AUTO prefers the segmented renderer so resubmitted compositions only
+        re-encode the scenes that changed.
+        """
+        requested = request.settings.render_engine
+        if requested == RenderEngine.MOVIEPY:
+            return RenderEngine.MOVIEPY
+
+        if requested == RenderEngine.FFMPEG:
+            reason = FFmpegRenderer().unsupported_reason(request)
+            if reason is None:
+                return RenderEngine.FFMPEG
+            logger.warning(f"Falling back to the segmented engine: {reason}")
+
+        return RenderEngine.SEGMENTED
+
+    def _prepare_scenes(
+        self,
+        scenes: List[Scene],
+        frame_size: Tuple[int, int],
+        temp_dir: Path,
+        report: ProgressReporter,
+        stage_timings: Dict[str, float]
+    ) -> List[VideoFileClip]:
+        """Open, probe and decode all scenes concurrently, preserving their order."""
+        def timed_process_scene(scene: Scene) -> Tuple[VideoFileClip, float]:
+            started = time.perf_counter()
+            return self._process_scene(scene, frame_size, temp_dir), time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=settings.SCENE_PREP_CONCURRENCY) as pool:
+            futures = [pool.submit(timed_process_scene, scene) for scene in scenes]
+            for completed, _ in enumerate(as_completed(futures), start=1):
+                report("scenes", completed / len(scenes))
+            results = [future.result() for future in futures]
+
+        stage_timings["scene_prep"] = time.perf_counter() - started
+        stage_timings["scene_prep_serial"] = sum(elapsed for _, elapsed in results)
+        return [clip for clip, _ in results]
+
+    def _create_composition(
+        self,
+        request: VideoCompositionRequest,
+        output_path: Path,
+        report: ProgressReporter,
+        stage_timings: Dict[str, float],
+        scratch_dir: Path
+    ) -> Path:
+        """Create the video composition from the request."""
+        frame_size = resolve_output_size(request.settings.video_settings)
+        scene_clips = self._prepare_scenes(request.scenes, frame_size, scratch_dir, report, stage_timings)
+
+        started = time.perf_counter()
+        fps = request.settings.video_settings.fps
+        segments = []
+        current = scene_clips[0]
+        for i in range(1, len(request.scenes)):
+            scene = request.scenes[i]
+            incoming = scene_clips[i]
+            overlap = transition_overlap(request.scenes[i - 1], scene)
+            if overlap <= 0:
+                segments.append(current)
+                current = incoming
+                continue
+
+            # The transition replaces the tail of one scene and the head of the next
+            segments.append(current.subclip(0, current.duration - overlap))
+            segments.append(self._apply_transition(
+                current.subclip(current.duration - overlap),
+                incoming.subclip(0, overlap),
+                scene.transition,
+                overlap,
+                fps
+            ))
+            current = incoming.subclip(overlap)
+        segments.append(current)
+
+        # Combine all clips
+        final_clip = concatenate_videoclips(segments)
+
+        # Apply watermark if specified
+        if request.settings.watermark_path:
+            watermark = self._create_watermark(
+                request.settings.watermark_path,
+                request.settings.watermark_opacity,
+                final_clip.size
+            )
+            final_clip = apply_layers(final_clip, [(0.0, None, watermark)])
+        stage_timings["assemble"] = time.perf_counter() - started
+
+        with tempfile.TemporaryDirectory(dir=scratch_dir) as audio_dir:
+            # Scene and background audio are mixed separately and muxed as-is
+            started = time.perf_counter()
+            audio_path = audio_pipeline.render(request, Path(audio_dir) / "audio.m4a")
+            report("audio", 1.0)
+            stage_timings["audio_mix"] = time.perf_counter() - started
+
+            # Write the final video
+            started = time.perf_counter()
+            profile = select_profile(request)
+            final_clip.write_videofile(
+                str(output_path),
+                fps=request.settings.video_settings.fps,
+                codec='libx264',
+                audio=str(audio_path) if audio_path else False,
+                preset=profile.preset,
+                threads=profile.threads,
+                ffmpeg_params=rate_control_args(profile) + (keyframe_args() if request.settings.package_hls else []),
+                logger=_RenderProgressLogger(report)
+            )
+            report("muxing", 1.0)
+            stage_timings["encode"] = time.perf_counter() - started
+
+        return output_path
+
+    def _process_scene(self, scene: Scene, frame_size: Tuple[int, int], temp_dir: Path) -> VideoFileClip:
+        """Process a single scene at the output resolution.
+
+        Remote media has already been downloaded. Every input is scaled and
+        letterboxed to frame_size once while decoding, so all later stages
+        work at output resolution. Still images are static between overlay
+        changes, so their overlays are composited once per interval rather
+        than blended onto every frame.
+        """
+        media_path = Path(scene.media_path)
+        overlays = [
+            (overlay.start_time, overlay.end_time, self._create_text_overlay(overlay, frame_size))
+            for overlay in scene.text_overlays
+        ]
+        
+        if media_path.suffix.lower() in settings.ALLOWED_VIDEO_TYPES:
+            clip = self._fit_duration(open_video_clip(str(media_path), frame_size), scene.duration)
+            # Apply text overlays as one flattened layer per overlay interval
+            if overlays:
+                clip = apply_layers(clip, overlays)
+        elif media_path.suffix.lower() in settings.ALLOWED_IMAGE_TYPES:
+            clip = still_clip(load_still(str(media_path), frame_size), overlays, scene.duration)
+        else:
+            raise ValueError(f"Unsupported media type: {media_path.suffix}")
+
+        return clip
+
+    def _fit_duration(self, clip: VideoFileClip, duration: float) -> VideoFileClip:
+        """Trim a video to the scene duration, holding its last frame if it is shorter."""
+        if clip.duration >= duration:
+            return clip.subclip(0, duration)
+        last_frame = clip.to_ImageClip(max(0.0, clip.duration - 0.05))
+        return concatenate_videoclips([clip, last_frame.set_duration(duration - clip.duration)])
+
+    def _apply_transition(
+        self, 
+        clip1: VideoFileClip, 
+        clip2: VideoFileClip, 
+        transition: TransitionType, 
+        duration: float,
+        fps: int = 30
+    ) -> VideoFileClip:
+        """Blend the tail clip1 into the head clip2; both last ``duration`` seconds."""
+        return self.transition_engine.make_clip(clip1, clip2, transition, duration, fps)
+
+    def _create_text_overlay(self, overlay: TextOverlay, size) -> Optional[OverlayLayer]:
+        """Create a cached, pre-rasterized text overlay layer."""
+        return text_layer(overlay, size)
+
+    def _create_watermark(self, watermark_path: str, opacity: float, size) -> Optional[OverlayLayer]:
+        """Create a cached, pre-rasterized watermark layer."""
+        return watermark_layer(watermark_path, opacity, size)
+
+    def _crossfade_clips(
+        self, 
+        clip1: VideoFileClip, 
+        clip2: VideoFileClip, 
+        duration: float
+    ) -> VideoFileClip:
+        """Create a crossfade transition between two clips."""
+        return self._apply_transition(clip1, clip2, TransitionType.CROSSFADE, duration)
@@ -0,0 +1,430 @@
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from moviepy.editor import VideoClip
+from PIL import Image
+
+from ..core import metrics
+from ..core.config import settings
+from ..models.enums import TransitionType
+from ..models.schemas import Scene, VideoCompositionRequest
+from ..utils.file_handlers import file_sha256
+from .audio_pipeline import audio_pipeline
+from .encoding_profiles import select_profile
+from .ffmpeg_renderer import LOOPABLE_IMAGE_TYPES, XFADE_TRANSITIONS, FFmpegRenderer, ProgressReporter, video_encode_args
+from .ingest import load_still, resolve_output_size
+from .overlays import apply_layers, composite_still, text_layer, watermark_layer
+from .timeline import scene_start_times, transition_overlap
+from .transitions import TransitionEngine
+
+logger = logging.getLogger(__name__)
+
+# Bump when segment rendering changes so stale segments are not reused
+SEGMENT_CACHE_VERSION = "3"
+
+SceneLoader = Callable[[Scene, Tuple[int, int]], VideoClip]
+
+class SegmentPlan(NamedTuple):
+    """One independently encoded piece of the timeline.
+
+    A body covers ``duration`` seconds of a single scene from ``start``; a
+    transition blends the last ``duration`` seconds of ``scenes[0]`` into the
+    first ``duration`` seconds of ``scenes[1]``.
+    """
+    key: str
+    scenes: Tuple[int, ...]
+    start: float
+    duration: float
+    frames: int
+    transition: Optional[TransitionType]
+
+class SegmentCache:
+    """Content-addressed store of encoded video-only Matroska segments.
+
+    Segments are plain files named by key, so every render worker process
+    shares them without an index; least recently used ones (by mtime) are
+    evicted above ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: Path = settings.GENERATED_DIR / "segments", max_bytes: int = settings.SEGMENT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.mkv"
+
+    def lookup(self, key: str) -> Optional[Path]:
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def partial_path(self, key: str) -> Path:
+        return self.cache_dir / f".{key}.{uuid.uuid4().hex}.partial"
+
+    def store(self, key: str, partial_path: Path) -> Path:
+        path = self.path(key)
+        os.replace(partial_path, path)
+        return path
+
+    def evict(self, keep: Set[Path]) -> None:
+        """Remove least recently used segments until the cache fits max_bytes."""
+        entries = []
+        for path in self.cache_dir.glob("*.mkv"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+class SegmentedRenderer:
+    """Render a composition as cached per-scene and per-transition segments.
+
+    Each scene body and each transition is encoded on its own, keyed by the
+    canonical content it depends on, then the segments are joined with the
+    concat demuxer using stream copy and the audio mix is muxed in. Editing
+    one scene re-encodes only its body and adjacent transitions. Segments
+    ffmpeg can express are rendered with a filter graph; others (text
+    overlays, Python-only transitions) are drawn with MoviePy and piped to
+    the same encoder settings. Still-image bodies are composited once per
+    overlay interval and encoded from a looped frame.
+    """
+
+    def __init__(
+        self,
+        scene_loader: SceneLoader,
+        cache: Optional[SegmentCache] = None,
+        ffmpeg: Optional[FFmpegRenderer] = None,
+        scratch_dir: Path = settings.TEMP_DIR
+    ):
+        self.scene_loader = scene_loader
+        self.scratch_dir = scratch_dir
+        self.cache = cache or SegmentCache()
+        self.ffmpeg = ffmpeg or FFmpegRenderer()
+        self.transition_engine = TransitionEngine()
+
+    def plan(self, request: VideoCompositionRequest) -> List[SegmentPlan]:
+        """Split the timeline into body and transition segments with their cache keys."""
+        scenes = request.scenes
+        fps = request.settings.video_settings.fps
+        overlaps = [0.0] + [transition_overlap(scenes[i - 1], scenes[i]) for i in range(1, len(scenes))] + [0.0]
+        starts, _ = scene_start_times(scenes)
+        common = self._common_key(request)
+        scene_keys = [self._scene_key(scene) for scene in scenes]
+
+        def frames_between(start: float, end: float) -> int:
+            # Rounding the timeline boundaries, not each length, keeps the frame total in step with the audio
+            return round(end * fps) - round(start * fps)
+
+        segments = []
+        for i, scene in enumerate(scenes):
+            if i > 0 and overlaps[i] > 0:
+                frames = frames_between(starts[i], starts[i] + overlaps[i])
+                if frames > 0:
+                    key = self._key(common, "transition", scene_keys[i - 1], scene_keys[i], scene.transition.value, overlaps[i], frames)
+                    segments.append(SegmentPlan(key, (i - 1, i), 0.0, overlaps[i], frames, scene.transition))
+            duration = scene.duration - overlaps[i] - overlaps[i + 1]
+            frames = frames_between(starts[i] + overlaps[i], starts[i] + scene.duration - overlaps[i + 1])
+            if frames > 0:
+                key = self._key(common, "body", scene_keys[i], overlaps[i], duration, frames)
+                segments.append(SegmentPlan(key, (i,), overlaps[i], duration, frames, None))
+        return segments
+
+    def render(
+        self,
+        request: VideoCompositionRequest,
+        output_path: Path,
+        report: ProgressReporter,
+        stage_timings: Dict[str, float]
+    ) -> int:
+        """Render to output_path, encoding only segments missing from the cache.
+
+        Returns the number of frames actually encoded, which is zero when
+        every segment was reused.
+        """
+        started = time.perf_counter()
+        segments = self.plan(request)
+        missing = [segment for segment in segments if self.cache.lookup(segment.key) is None]
+        logger.info(f"Reusing {len(segments) - len(missing)} of {len(segments)} cached segments")
+        metrics.count_worker_cache("segment", hit=True, count=len(segments) - len(missing))
+        metrics.count_worker_cache("segment", hit=False, count=len(missing))
+        stage_timings["assemble"] = time.perf_counter() - started
+
+        with tempfile.TemporaryDirectory(dir=self.scratch_dir) as temp_dir:
+            started = time.perf_counter()
+            audio_path = audio_pipeline.render(request, Path(temp_dir) / "audio.m4a")
+            report("audio", 1.0)
+            stage_timings["audio_mix"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            scene_clips: Dict[int, VideoClip] = {}
+            total_frames = sum(segment.frames for segment in missing) or 1
+            encoded_frames = 0
+            try:
+                for segment in missing:
+                    partial_path = self.cache.partial_path(segment.key)
+                    try:
+                        if self._is_still(request, segment):
+                            self._encode_still(request, segment, Path(temp_dir), partial_path)
+                        elif self._ffmpeg_can_render(request, segment):
+                            self._encode_with_ffmpeg(request, segment, partial_path)
+                        else:
+                            self._encode_with_moviepy(request, segment, scene_clips, partial_path)
+                        self.cache.store(segment.key, partial_path)
+                    finally:
+                        partial_path.unlink(missing_ok=True)
+                    encoded_frames += segment.frames
+                    report("encoding", encoded_frames / total_frames)
+            finally:
+                for clip in scene_clips.values():
+                    clip.close()
+            stage_timings["encode"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            segment_paths = [self.cache.path(segment.key) for segment in segments]
+            concat_list = Path(temp_dir) / "segments.txt"
+            concat_list.write_text("".join(f"file '{path}'\n" for path in segment_paths))
+            command = [
+                self.ffmpeg.ffmpeg_path, "-y", "-hide_banner", "-loglevel", "error",
+                "-f", "concat", "-safe", "0", "-i", str(concat_list)
+            ]
+            if audio_path:
+                command += ["-i", str(audio_path), "-map", "0:v", "-map", "1:a"]
+            command += ["-c", "copy", "-movflags", "+faststart", str(output_path)]
+            self._run(command)
+            report("muxing", 1.0)
+            stage_timings["concat"] = time.perf_counter() - started
+
+        self.cache.evict(keep=set(segment_paths))
+        return sum(segment.frames for segment in missing)
+
+    def _common_key(self, request: VideoCompositionRequest) -> Dict[str, object]:
+        """Inputs shared by every segment: output format and watermark.
+
+        Only encoder settings that change the output are included; thread
+        count and the composition-wide slideshow tuning are left out so
+        segments stay valid across hosts and edits to other scenes.
+        """
+        composition = request.settings
+        profile = select_profile(request)
+        return {
+            "version": SEGMENT_CACHE_VERSION,
+            "size": resolve_output_size(composition.video_settings),
+            "encode": {
+                "preset": profile.preset,
+                "crf": profile.crf,
+                "bitrate": profile.bitrate,
+                "fps": composition.video_settings.fps,
+                "keyframes": composition.package_hls
+            },
+            "watermark": file_sha256(composition.watermark_path) if composition.watermark_path else None,
+            "watermark_opacity": composition.watermark_opacity if composition.watermark_path else None
+        }
+
+    def _scene_key(self, scene: Scene) -> Dict[str, object]:
+        """Canonical scene content affecting its pixels (audio and transition excluded)."""
+        content = scene.model_dump(mode="json", exclude={"audio", "transition", "transition_duration"})
+        content["media_path"] = file_sha256(scene.media_path)
+        content["media_type"] = Path(scene.media_path).suffix.lower()
+        return content
+
+    def _key(self, *parts: object) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    def _encode_args(self, request: VideoCompositionRequest, segment: SegmentPlan) -> List[str]:
+        """Encoder options tuned for the segment's own content rather than the whole composition's."""
+        stills = all(
+            Path(request.scenes[index].media_path).suffix.lower() in settings.ALLOWED_IMAGE_TYPES
+            for index in segment.scenes
+        )
+        return video_encode_args(request, tune="stillimage" if stills else "")
+
+    def _is_still(self, request: VideoCompositionRequest, segment: SegmentPlan) -> bool:
+        scene = request.scenes[segment.scenes[0]]
+        return segment.transition is None and Path(scene.media_path).suffix.lower() in settings.ALLOWED_IMAGE_TYPES
+
+    def _encode_still(
+        self,
+        request: VideoCompositionRequest,
+        segment: SegmentPlan,
+        temp_dir: Path,
+        output_path: Path
+    ) -> None:
+        """Encode a still-image body from one pre-composited frame per overlay interval.
+
+        Each frame is decoded once and looped inside ffmpeg. Only one GOP of
+        STILL_GOP_SECONDS (plus a shorter remainder) is encoded per interval,
+        with still-image tuning and a single keyframe; it is then repeated by
+        stream copy, since every GOP of a static frame encodes identically.
+        """
+        scene = request.scenes[segment.scenes[0]]
+        composition = request.settings
+        fps = composition.video_settings.fps
+        frame_size = resolve_output_size(composition.video_settings)
+        gop_frames = max(1, round(settings.STILL_GOP_SECONDS * fps))
+        layers = [(overlay.start_time, overlay.end_time, text_layer(overlay, frame_size)) for overlay in scene.text_overlays]
+        if composition.watermark_path:
+            layers.append((0.0, None, watermark_layer(composition.watermark_path, composition.watermark_opacity, frame_size)))
+
+        first_frame = round(segment.start * fps)
+        last_frame = first_frame + segment.frames
+        intervals = list(composite_still(load_still(scene.media_path, frame_size), layers, scene.duration))
+        pieces: List[Path] = []
+        for n, (start, end, frame) in enumerate(intervals):
+            # The last interval holds until the segment's end, which may round one frame past the scene
+            end_frame = last_frame if n == len(intervals) - 1 else min(round(end * fps), last_frame)
+            frames = end_frame - max(round(start * fps), first_frame)
+            if frames <= 0:
+                continue
+            still_path = temp_dir / f"{segment.key}_{n}.bmp"
+            Image.fromarray(frame).save(still_path)
+            repeats, remainder = divmod(frames, gop_frames)
+            if remainder:
+                pieces.append(self._encode_frame(request, still_path, remainder, temp_dir / f"{still_path.stem}_tail.mkv"))
+            if repeats:
+                pieces += [self._encode_frame(request, still_path, gop_frames, temp_dir / f"{still_path.stem}_gop.mkv")] * repeats
+
+        concat_list = temp_dir / f"{segment.key}.txt"
+        concat_list.write_text("".join(f"file '{path}'\n" for path in pieces))
+        self._run([
+            self.ffmpeg.ffmpeg_path, "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", str(concat_list),
+            "-c", "copy", "-f", "matroska", str(output_path)
+        ])
+
+    def _encode_frame(self, request: VideoCompositionRequest, still_path: Path, frames: int, output_path: Path) -> Path:
+        """Encode ``frames`` repetitions of a still as one GOP."""
+        fps = request.settings.video_settings.fps
+        self._run([
+            self.ffmpeg.ffmpeg_path, "-y", "-hide_banner", "-loglevel", "error",
+            "-framerate", str(fps), "-i", str(still_path),
+            "-vf", f"format=yuv420p,loop=loop={frames - 1}:size=1,setpts=N/{fps}/TB",
+            "-frames:v", str(frames), *video_encode_args(request, tune="stillimage"),
+            "-g", str(frames),
+            "-f", "matroska", str(output_path)
+        ])
+        return output_path
+
+    def _ffmpeg_can_render(self, request: VideoCompositionRequest, segment: SegmentPlan) -> bool:
+        for index in segment.scenes:
+            scene = request.scenes[index]
+            suffix = Path(scene.media_path).suffix.lower()
+            if scene.text_overlays or (suffix not in LOOPABLE_IMAGE_TYPES and suffix not in settings.ALLOWED_VIDEO_TYPES):
+                return False
+        if segment.transition is not None and segment.transition not in XFADE_TRANSITIONS:
+            return False
+        watermark_path = request.settings.watermark_path
+        return not watermark_path or Path(watermark_path).suffix.lower() in LOOPABLE_IMAGE_TYPES
+
+    def _encode_with_ffmpeg(self, request: VideoCompositionRequest, segment: SegmentPlan, output_path: Path) -> None:
+        fps = request.settings.video_settings.fps
+        frame_size = resolve_output_size(request.settings.video_settings)
+        inputs: List[str] = []
+        filters: List[str] = []
+
+        def add_input(*args: str) -> int:
+            inputs.extend(args)
+            return inputs.count("-i") - 1
+
+        for n, index in enumerate(segment.scenes):
+            scene = request.scenes[index]
+            input_index = add_input(*self.ffmpeg.scene_input_args(scene, fps))
+            filters.append(self.ffmpeg.scene_filter(input_index, scene, frame_size, fps, f"s{n}"))
+
+        # Clone the last frame so the segment always fills its frame count
+        if segment.transition is None:
+            filters.append(f"[s0]trim=start_frame={round(segment.start * fps)},setpts=PTS-STARTPTS,fps={fps},tpad=stop_mode=clone:stop=1[v]")
+        else:
+            outgoing = request.scenes[segment.scenes[0]]
+            tail_start = round(outgoing.duration * fps) - segment.frames
+            filters.append(f"[s0]trim=start_frame={tail_start},setpts=PTS-STARTPTS,fps={fps}[tail]")
+            filters.append(f"[s1]trim=end_frame={segment.frames},setpts=PTS-STARTPTS,fps={fps}[head]")
+            filters.append(
+                f"[tail][head]xfade=transition={XFADE_TRANSITIONS[segment.transition]}:"
+                f"duration={segment.frames / fps:.3f}:offset=0,tpad=stop_mode=clone:stop=1[v]"
+            )
+        label = self.ffmpeg.watermark_filters(request, frame_size, segment.duration, "v", add_input, filters)
+
+        self._run([
+            self.ffmpeg.ffmpeg_path, "-y", "-hide_banner", "-loglevel", "error", *inputs,
+            "-filter_complex", ";".join(filters), "-map", f"[{label}]", "-an",
+            "-frames:v", str(segment.frames), *self._encode_args(request, segment),
+            "-f", "matroska", str(output_path)
+        ])
+
+    def _encode_with_moviepy(
+        self,
+        request: VideoCompositionRequest,
+        segment: SegmentPlan,
+        scene_clips: Dict[int, VideoClip],
+        output_path: Path
+    ) -> None:
+        fps = request.settings.video_settings.fps
+        width, height = resolve_output_size(request.settings.video_settings)
+        for index in segment.scenes:
+            if index not in scene_clips:
+                scene_clips[index] = self.scene_loader(request.scenes[index], (width, height))
+
+        if segment.transition is None:
+            clip = scene_clips[segment.scenes[0]].subclip(segment.start, segment.start + segment.duration)
+        else:
+            outgoing, incoming = (scene_clips[index] for index in segment.scenes)
+            clip = self.transition_engine.make_clip(
+                outgoing.subclip(outgoing.duration - segment.duration),
+                incoming.subclip(0, segment.duration),
+                segment.transition,
+                segment.duration,
+                fps
+            )
+        composition = request.settings
+        if composition.watermark_path:
+            layer = watermark_layer(composition.watermark_path, composition.watermark_opacity, (width, height))
+            clip = apply_layers(clip, [(0.0, None, layer)])
+
+        command = [
+            self.ffmpeg.ffmpeg_path, "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+            "-an", "-frames:v", str(segment.frames), *self._encode_args(request, segment),
+            "-f", "matroska", str(output_path)
+        ]
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=stderr)
+            try:
+                last_frame_time = max(0.0, clip.duration - 1e-3)
+                for frame_index in range(segment.frames):
+                    frame = clip.get_frame(min(frame_index / fps, last_frame_time))
+                    process.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            self._check(process.wait(), stderr)
+
+    def _run(self, command: List[str]) -> None:
+        with tempfile.TemporaryFile() as stderr:
+            self._check(subprocess.run(command, stdout=subprocess.DEVNULL, stderr=stderr).returncode, stderr)
+
+    def _check(self, return_code: int, stderr) -> None:
+        if return_code != 0:
+            stderr.seek(0)
+            error = stderr.read().decode(errors="replace").strip().splitlines()[-5:]
+            raise RuntimeError(f"ffmpeg exited with code {return_code}: {' | '.join(error)}")
@@ -0,0 +1,24 @@
+from typing import List, Tuple
+from ..models.schemas import Scene
+from ..models.enums import TransitionType
+
+def transition_overlap(previous: Scene, scene: Scene) -> float:
+    """Seconds a scene overlaps the previous one while transitioning in.
+
+    The overlap is capped at half of either scene so a scene is never
+    consumed entirely by its incoming and outgoing transitions.
+    """
+    if scene.transition == TransitionType.CUT:
+        return 0.0
+    return min(scene.transition_duration, previous.duration / 2, scene.duration / 2)
+
+def scene_start_times(scenes: List[Scene]) -> Tuple[List[float], float]:
+    """Return the start time of every scene and the total timeline duration."""
+    starts = []
+    position = 0.0
+    for i, scene in enumerate(scenes):
+        if i > 0:
+            position -= transition_overlap(scenes[i - 1], scene)
+        starts.append(position)
+        position += scene.duration
+    return starts, position
@@ -0,0 +1,184 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+from moviepy.editor import CompositeAudioClip, VideoClip
+from moviepy.audio.fx.all import audio_fadein, audio_fadeout
+
+from ..core.config import settings
+from ..models.enums import TransitionType
+
+# Scale reached by the zooming clip at the end of a zoom transition
+ZOOM_FACTOR = 1.5
+
+MASK_TRANSITIONS = {
+    TransitionType.DISSOLVE,
+    TransitionType.WIPE_LEFT,
+    TransitionType.WIPE_RIGHT,
+    TransitionType.CIRCLE_OPEN,
+    TransitionType.CIRCLE_CLOSE
+}
+
+# Wipe left reveals the incoming clip from the right edge; circle close shrinks the outgoing one
+CLOSING_MASK_TRANSITIONS = {TransitionType.WIPE_LEFT, TransitionType.CIRCLE_CLOSE}
+
+SLIDE_TRANSITIONS = {
+    TransitionType.SLIDE_LEFT,
+    TransitionType.SLIDE_RIGHT,
+    TransitionType.SLIDE_UP,
+    TransitionType.SLIDE_DOWN
+}
+
+ZOOM_TRANSITIONS = {TransitionType.ZOOM_IN, TransitionType.ZOOM_OUT}
+
+def frame_count(duration: float, fps: int) -> int:
+    return max(1, int(round(duration * fps)))
+
+def _progress(frames: int) -> np.ndarray:
+    """Transition progress in [0, 1] for every frame."""
+    if frames == 1:
+        return np.array([0.5], dtype=np.float32)
+    return np.linspace(0.0, 1.0, frames, dtype=np.float32)
+
+@lru_cache(maxsize=settings.TRANSITION_MASK_CACHE_SIZE)
+def mask_field(transition: TransitionType, width: int, height: int) -> np.ndarray:
+    """Per-pixel threshold of a mask transition, shape (height, width, 1) or (1, width, 1) for wipes.
+
+    A pixel shows the incoming clip once the transition progress passes its
+    threshold (or, for closing transitions, once ``1 - progress`` reaches it),
+    so every frame's mask is a single comparison against this field.
+    """
+    if transition == TransitionType.DISSOLVE:
+        field = np.random.default_rng(0).random((height, width), dtype=np.float32)
+    elif transition in (TransitionType.WIPE_LEFT, TransitionType.WIPE_RIGHT):
+        field = ((np.arange(width, dtype=np.float32) + 0.5) / width)[None]
+    else:
+        ys, xs = np.mgrid[0:height, 0:width].astype(np.float32)
+        field = np.hypot(xs - width / 2, ys - height / 2) / np.hypot(width / 2, height / 2)
+
+    field = np.ascontiguousarray(field[..., None])
+    field.setflags(write=False)
+    return field
+
+def alpha_mask(transition: TransitionType, width: int, height: int, progress: float) -> np.ndarray:
+    """Boolean mask selecting the incoming clip at ``progress``, broadcastable to a frame."""
+    field = mask_field(transition, width, height)
+    if transition in CLOSING_MASK_TRANSITIONS:
+        return field >= np.float32(1.0 - progress)
+    return field < np.float32(progress)
+
+@lru_cache(maxsize=settings.TRANSITION_MASK_CACHE_SIZE)
+def affine_maps(
+    transition: TransitionType,
+    width: int,
+    height: int,
+    duration: float,
+    fps: int
+) -> np.ndarray:
+    """Per-frame 2x3 affine matrices for the outgoing and incoming clip.
+
+    Returns an array of shape (frames, 2, 2, 3); index 0 warps the outgoing
+    clip and index 1 the incoming one.
+    """
+    progress = _progress(frame_count(duration, fps))
+    maps = np.zeros((len(progress), 2, 2, 3), dtype=np.float32)
+    maps[:, :, 0, 0] = 1.0
+    maps[:, :, 1, 1] = 1.0
+
+    if transition in SLIDE_TRANSITIONS:
+        axis, extent = (2, width) if transition in (TransitionType.SLIDE_LEFT, TransitionType.SLIDE_RIGHT) else (1, height)
+        sign = -1.0 if transition in (TransitionType.SLIDE_LEFT, TransitionType.SLIDE_UP) else 1.0
+        offset = np.round(progress * extent)
+        row = 0 if axis == 2 else 1
+        maps[:, 0, row, 2] = sign * offset
+        maps[:, 1, row, 2] = sign * (offset - extent)
+    else:
+        center = (width / 2, height / 2)
+        for i, p in enumerate(progress):
+            if transition == TransitionType.ZOOM_IN:
+                maps[i, 0] = cv2.getRotationMatrix2D(center, 0, 1.0 + (ZOOM_FACTOR - 1.0) * p)
+            else:
+                maps[i, 1] = cv2.getRotationMatrix2D(center, 0, ZOOM_FACTOR - (ZOOM_FACTOR - 1.0) * p)
+
+    maps.setflags(write=False)
+    return maps
+
+class TransitionEngine:
+    """Vectorized frame-blend kernels for every TransitionType.
+
+    Mask threshold fields are computed once per (type, resolution) and
+    affine maps once per (type, resolution, duration, fps) and cached, so
+    producing a transition frame is a single NumPy/cv2 operation on whole
+    frames.
+    """
+
+    def blend(
+        self,
+        transition: TransitionType,
+        outgoing: np.ndarray,
+        incoming: np.ndarray,
+        index: int,
+        duration: float,
+        fps: int
+    ) -> np.ndarray:
+        """Return frame ``index`` of a transition from ``outgoing`` to ``incoming``."""
+        height, width = outgoing.shape[:2]
+        if incoming.shape != outgoing.shape:
+            incoming = cv2.resize(incoming, (width, height), interpolation=cv2.INTER_AREA)
+        frames = frame_count(duration, fps)
+        index = min(max(index, 0), frames - 1)
+        p = float(_progress(frames)[index])
+
+        if transition == TransitionType.CUT:
+            return incoming
+        if transition == TransitionType.FADE:
+            # Fade through black
+            if p < 0.5:
+                return cv2.convertScaleAbs(outgoing, alpha=1.0 - 2.0 * p)
+            return cv2.convertScaleAbs(incoming, alpha=2.0 * p - 1.0)
+        if transition in MASK_TRANSITIONS:
+            return np.where(alpha_mask(transition, width, height, p), incoming, outgoing)
+        if transition in SLIDE_TRANSITIONS:
+            maps = affine_maps(transition, width, height, duration, fps)[index]
+            return cv2.add(
+                cv2.warpAffine(outgoing, maps[0], (width, height)),
+                cv2.warpAffine(incoming, maps[1], (width, height))
+            )
+        if transition in ZOOM_TRANSITIONS:
+            maps = affine_maps(transition, width, height, duration, fps)[index]
+            if transition == TransitionType.ZOOM_IN:
+                outgoing = cv2.warpAffine(outgoing, maps[0], (width, height), flags=cv2.INTER_LINEAR)
+            else:
+                incoming = cv2.warpAffine(incoming, maps[1], (width, height), flags=cv2.INTER_LINEAR)
+            return cv2.addWeighted(outgoing, 1.0 - p, incoming, p, 0)
+        # CROSSFADE
+        return cv2.addWeighted(outgoing, 1.0 - p, incoming, p, 0)
+
+    def make_clip(
+        self,
+        outgoing: VideoClip,
+        incoming: VideoClip,
+        transition: TransitionType,
+        duration: float,
+        fps: int
+    ) -> VideoClip:
+        """Build a clip blending ``outgoing`` into ``incoming``; both last ``duration``."""
+        def make_frame(t):
+            return self.blend(
+                transition,
+                outgoing.get_frame(t),
+                incoming.get_frame(t),
+                int(t * fps),
+                duration,
+                fps
+            )
+
+        clip = VideoClip(make_frame, duration=duration)
+        audio_tracks = []
+        if outgoing.audio is not None:
+            audio_tracks.append(audio_fadeout(outgoing.audio, duration))
+        if incoming.audio is not None:
+            audio_tracks.append(audio_fadein(incoming.audio, duration))
+        if audio_tracks:
+            clip = clip.set_audio(CompositeAudioClip(audio_tracks).set_duration(duration))
+        return clip
@@ -1,39 +1,128 @@
 import asyncio
 import logging
+import re
+import tempfile
+import time
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
-from moviepy.editor import VideoFileClip, ImageClip, AudioFileClip, CompositeVideoClip
-from PIL import Image
-import cv2
-import numpy as np
-from ..models.schemas import VideoJob, Scene, VideoCompositionRequest
-from ..models.enums import JobStatus, TransitionType
+from typing import Dict, List, Optional, Set, Tuple
+from ..models.schemas import EncodingProfile, VideoJob, VideoCompositionRequest
+from ..models.enums import JobStatus, PreviewMode
+from ..core import metrics
 from ..core.config import settings
-from ..utils.file_handlers import cleanup_temp_files
+from ..utils.file_handlers import download_remote_file
+from .render_executor import RenderExecutor
+from .render_cache import RenderCache
+from .render_pipeline import RenderPipeline
+from .job_events import JobEventBroker, job_events
+from .job_store import JobRepository, job_store
+from .lifecycle import LifecycleManager, job_scratch_dir, remove_job_scratch
+from .packaging import package_hls
+from .previews import contact_sheet_frames, preview_path, proxy_request, write_contact_sheet
 
 logger = logging.getLogger(__name__)
 
+# Share of overall job progress covered by each render stage
+STAGE_PROGRESS_RANGES = {
+    "fetching": (0.0, 0.05),
+    "scenes": (0.05, 0.15),
+    "audio": (0.15, 0.2),
+    "encoding": (0.2, 0.95),
+    "muxing": (0.95, 1.0),
+    "packaging": (0.99, 1.0)
+}
+
+def media_references(request: VideoCompositionRequest) -> Set[str]:
+    """Every media path or URL a composition reads."""
+    composition = request.settings
+    references = {scene.media_path for scene in request.scenes}
+    references |= {scene.audio.media_path for scene in request.scenes if scene.audio and scene.audio.media_path}
+    if composition.background_audio and composition.background_audio.media_path:
+        references.add(composition.background_audio.media_path)
+    if composition.watermark_path:
+        references.add(composition.watermark_path)
+    return references
+
 class VideoProcessor:
-    def __init__(self):
+    def __init__(
+        self,
+        render_executor: Optional[RenderExecutor] = None,
+        render_cache: Optional[RenderCache] = None,
+        event_broker: Optional[JobEventBroker] = None,
+        store: Optional[JobRepository] = None
+    ):
         self.active_jobs = set()
         self._processing_lock = asyncio.Lock()
+        self.render_executor = render_executor or RenderExecutor()
+        self.render_cache = render_cache or RenderCache()
+        self.pipeline = RenderPipeline()
+        self.event_broker = event_broker or job_events
+        self.job_store = store or job_store
+        self.lifecycle = LifecycleManager(self.render_cache, self.job_store)
 
     async def process_job(self, job: VideoJob) -> None:
-        """Process a video composition job."""
-        if len(self.active_jobs) >= settings.MAX_CONCURRENT_JOBS:
-            logger.warning(f"Maximum concurrent jobs limit reached. Job {job.id} queued.")
-            return
-
+        """Process a video composition job; concurrency is bounded by the JobScheduler."""
         async with self._processing_lock:
             if job.id in self.active_jobs:
                 return
             self.active_jobs.add(job.id)
 
+        started_at = datetime.utcnow()
+        stage_timings: Dict[str, float] = {"queued": (started_at - job.created_at).total_seconds()}
+        preview: Optional[asyncio.Task] = None
+        scratch_dir = job_scratch_dir(job.id)
         try:
             job.status = JobStatus.PROCESSING
-            output_path = await self._create_composition(job.request)
+            job.stage = "fetching"
+            job.updated_at = datetime.utcnow()
+            if not await self.job_store.update(job):
+                logger.info(f"Job {job.id} was deleted before processing")
+                job.status = JobStatus.CANCELLED
+                return
+            self.event_broker.publish(job, force=True)
+            request = await self.prepare_media(job.request, stage_timings)
+            await self.lifecycle.ensure_free_space()
+            if request.settings.preview != PreviewMode.NONE:
+                preview = asyncio.create_task(self._render_preview(job, request, stage_timings, scratch_dir))
+                # Let the preview claim a render worker ahead of the full render
+                await asyncio.sleep(0)
+            if request.settings.preview_only:
+                await preview
+                job.status = JobStatus.COMPLETED
+                job.stage = None
+                job.progress = 100.0
+                return
+            digest = await self.render_cache.compute_digest(request)
+
+            async def render(path: Path) -> None:
+                result = await self.render_executor.render(
+                    job.id,
+                    request,
+                    path,
+                    lambda stage, progress: self._update_progress(job, stage, progress),
+                    scratch_dir
+                )
+                stage_timings.update(result["stage_timings"])
+                job.render_engine = result["engine"]
+                job.encoding_profile = EncodingProfile.model_validate(result["encoding_profile"])
+                job.encode_fps = result["encode_fps"]
+                metrics.record_worker_cache_counts(result["cache_lookups"])
+
+            output_path, cache_hit = await self.render_cache.get_or_render(digest, render)
+            metrics.record_cache("render", cache_hit)
+            if cache_hit:
+                logger.info(f"Job {job.id} served from render cache ({digest})")
+
+            if request.settings.package_hls:
+                self._update_progress(job, "packaging", 0.0)
+                started = time.perf_counter()
+                job.hls_playlist = str(await asyncio.to_thread(package_hls, output_path))
+                stage_timings["packaging"] = time.perf_counter() - started
             
+            if preview is not None:
+                await preview
             job.status = JobStatus.COMPLETED
+            job.stage = None
             job.output_path = str(output_path)
             job.progress = 100.0
             
@@ -42,124 +131,113 @@ class VideoProcessor:
             job.status = JobStatus.FAILED
             job.error_message = str(e)
         finally:
-            self.active_jobs.remove(job.id)
-            cleanup_temp_files(job.id)
-
-    async def _create_composition(self, request: VideoCompositionRequest) -> Path:
-        """Create the video composition from the request."""
-        clips = []
-        temp_dir = settings.TEMP_DIR / "processing"
-        temp_dir.mkdir(parents=True, exist_ok=True)
-
-        for i, scene in enumerate(request.scenes):
-            clip = await self._process_scene(scene, temp_dir)
-            if i > 0:
-                clip = self._apply_transition(
-                    clips[-1], 
-                    clip, 
-                    scene.transition, 
-                    scene.transition_duration
-                )
-            clips.append(clip)
-
-        # Combine all clips
-        final_clip = CompositeVideoClip(clips)
-
-        # Apply background audio if specified
-        if request.settings.background_audio:
-            audio = AudioFileClip(request.settings.background_audio.media_path)
-            final_clip = final_clip.set_audio(audio)
-
-        # Apply watermark if specified
-        if request.settings.watermark_path:
-            watermark = self._create_watermark(
-                request.settings.watermark_path,
-                request.settings.watermark_opacity,
-                final_clip.size
+            if preview is not None and not preview.done():
+                preview.cancel()
+            job.stage_timings = stage_timings
+            job.updated_at = datetime.utcnow()
+            metrics.record_job(
+                job.status.value,
+                (job.updated_at - started_at).total_seconds(),
+                stage_timings,
+                engine=job.render_engine or "none",
+                profile=job.encoding_profile.name if job.encoding_profile else "none",
+                fps=job.encode_fps
             )
-            final_clip = CompositeVideoClip([final_clip, watermark])
-
-        # Generate output path
-        output_path = settings.GENERATED_DIR / f"{hash(request)}.mp4"
-        
-        # Write the final video
-        final_clip.write_videofile(
-            str(output_path),
-            fps=request.settings.video_settings.fps,
-            codec='libx264',
-            audio_codec='aac',
-            bitrate=request.settings.video_settings.bitrate
-        )
-
-        return output_path
-
-    async def _process_scene(self, scene: Scene, temp_dir: Path) -> VideoFileClip:
-        """Process a single scene. Accepts local file paths or URLs."""
-        import re
-        from ..utils.file_handlers import download_remote_file
-
-        media_path_str = scene.media_path
-        # Check if media_path is a URL
-        if re.match(r'^https?://', media_path_str):
-            # Download the file and use the local path
-            media_path_str = await download_remote_file(media_path_str)
-        media_path = Path(media_path_str)
-        
-        if media_path.suffix.lower() in settings.ALLOWED_VIDEO_TYPES:
-            clip = VideoFileClip(str(media_path))
-        elif media_path.suffix.lower() in settings.ALLOWED_IMAGE_TYPES:
-            clip = ImageClip(str(media_path), duration=scene.duration)
-        else:
-            raise ValueError(f"Unsupported media type: {media_path.suffix}")
-
-        # Apply text overlays
-        if scene.text_overlays:
-            for overlay in scene.text_overlays:
-                txt_clip = self._create_text_overlay(overlay, clip.size)
-                clip = CompositeVideoClip([clip, txt_clip])
-
-        # Apply audio settings
-        if scene.audio:
-            if scene.audio.effect != "none":
-                clip = self._apply_audio_effect(clip, scene.audio)
-
-        return clip
-
-    def _apply_transition(
-        self, 
-        clip1: VideoFileClip, 
-        clip2: VideoFileClip, 
-        transition: TransitionType, 
-        duration: float
-    ) -> VideoFileClip:
-        """Apply transition between two clips."""
-        # Implementation of different transitions
-        if transition == TransitionType.FADE:
-            return self._crossfade_clips(clip1, clip2, duration)
-        # Add more transition implementations here
-        return clip2
-
-    def _create_text_overlay(self, overlay, size) -> VideoFileClip:
-        """Create a text overlay clip."""
-        # Implementation of text overlay creation
-        pass
-
-    def _apply_audio_effect(self, clip: VideoFileClip, audio_settings) -> VideoFileClip:
-        """Apply audio effects to a clip."""
-        # Implementation of audio effects
-        pass
-
-    def _create_watermark(self, watermark_path: str, opacity: float, size) -> VideoFileClip:
-        """Create a watermark overlay."""
-        # Implementation of watermark creation
-        pass
-
-    def _crossfade_clips(
-        self, 
-        clip1: VideoFileClip, 
-        clip2: VideoFileClip, 
-        duration: float
-    ) -> VideoFileClip:
-        """Create a crossfade transition between two clips."""
-        # Implementation of crossfade transition
-        pass
+            self.active_jobs.remove(job.id)
+            remove_job_scratch(job.id)
+            try:
+                # Update only, so a job deleted while rendering stays deleted
+                if not await self.job_store.update(job):
+                    logger.info(f"Job {job.id} was deleted while processing")
+            except Exception as e:
+                logger.error(f"Error persisting job {job.id}: {e}")
+            self.event_broker.publish(job)
+
+    async def _render_preview(
+        self,
+        job: VideoJob,
+        request: VideoCompositionRequest,
+        stage_timings: Dict[str, float],
+        scratch_dir: Path
+    ) -> None:
+        """Render the low-resolution proxy, or a contact sheet from it, ahead of the full output."""
+        started = time.perf_counter()
+        mode = request.settings.preview
+        path = preview_path(job.id, mode)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        proxy = proxy_request(request)
+        try:
+            if mode == PreviewMode.PROXY:
+                partial_path = path.with_suffix(".partial.mp4")
+                await self.render_executor.render(f"{job.id}:preview", proxy, partial_path, scratch_dir=scratch_dir)
+                partial_path.replace(path)
+            else:
+                with tempfile.TemporaryDirectory(dir=scratch_dir) as temp_dir:
+                    proxy_path = Path(temp_dir) / "proxy.mp4"
+                    await self.render_executor.render(f"{job.id}:preview", proxy, proxy_path, scratch_dir=scratch_dir)
+                    await asyncio.to_thread(write_contact_sheet, proxy_path, contact_sheet_frames(proxy), path)
+        except Exception as e:
+            logger.error(f"Preview of job {job.id} failed: {e}")
+            if request.settings.preview_only:
+                raise
+            return
+        finally:
+            path.with_suffix(".partial.mp4").unlink(missing_ok=True)
+
+        stage_timings["preview"] = time.perf_counter() - started
+        job.preview_path = str(path)
+        job.updated_at = datetime.utcnow()
+        logger.info(f"Preview of job {job.id} ready after {stage_timings['preview']:.2f}s")
+        await self.job_store.update(job)
+        self.event_broker.publish(job, force=True)
+
+    def _update_progress(self, job: VideoJob, stage: str, progress: float) -> None:
+        """Apply a progress report streamed back from the render worker."""
+        start, end = STAGE_PROGRESS_RANGES.get(stage, (0.0, 1.0))
+        overall = start + (end - start) * progress
+        job.progress = round(min(overall, 0.99) * 100, 1)
+        job.updated_at = datetime.utcnow()
+        stage_changed = job.stage != stage
+        job.stage = stage
+        self.job_store.record_progress(job)
+        self.event_broker.publish(job, force=stage_changed)
+
+    async def prepare_media(
+        self,
+        request: VideoCompositionRequest,
+        stage_timings: Dict[str, float]
+    ) -> VideoCompositionRequest:
+        """Download remote inputs concurrently so the render worker only sees local paths."""
+        request = request.model_copy(deep=True)
+        composition = request.settings
+
+        semaphore = asyncio.Semaphore(settings.SCENE_PREP_CONCURRENCY)
+        fetch_times: List[float] = []
+
+        async def resolve(media_path: str) -> Tuple[str, str]:
+            async with semaphore:
+                started = time.perf_counter()
+                local_path = await self._resolve_media_path(media_path)
+                fetch_times.append(time.perf_counter() - started)
+                return media_path, local_path
+
+        started = time.perf_counter()
+        resolved = dict(await asyncio.gather(*(resolve(path) for path in media_references(request))))
+        stage_timings["fetch"] = time.perf_counter() - started
+        stage_timings["fetch_serial"] = sum(fetch_times)
+
+        for scene in request.scenes:
+            scene.media_path = resolved[scene.media_path]
+            if scene.audio and scene.audio.media_path:
+                scene.audio.media_path = resolved[scene.audio.media_path]
+        if composition.background_audio and composition.background_audio.media_path:
+            composition.background_audio.media_path = resolved[composition.background_audio.media_path]
+        if composition.watermark_path:
+            composition.watermark_path = resolved[composition.watermark_path]
+        return request
+
+    async def _resolve_media_path(self, media_path: str) -> str:
+        """Return a local path for a media reference, downloading URLs."""
+        if re.match(r'^https?://', media_path):
+            return await download_remote_file(media_path)
+        return media_path
@@ -0,0 +1,68 @@
+import hashlib
+import logging
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, NamedTuple, Optional
+
+import aiofiles
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+class StoredContent(NamedTuple):
+    path: Path
+    content_hash: str
+    size: int
+    deduplicated: bool
+
+class ContentTooLargeError(ValueError):
+    """Raised when streamed content exceeds the allowed size."""
+
+async def store_content_addressed(
+    chunks: AsyncIterator[bytes],
+    suffix: str,
+    max_size: int = settings.MAX_FILE_SIZE,
+    directory: Path = settings.UPLOAD_DIR
+) -> StoredContent:
+    """Stream chunks to ``<sha256><suffix>`` in ``directory``, hashing as they are written.
+
+    The body goes to a temporary file in the same directory and is renamed
+    into place once complete; if the content is already stored the temporary
+    file is discarded instead.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    partial_path = directory / f".{uuid.uuid4()}.part"
+    try:
+        async with aiofiles.open(partial_path, 'wb') as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise ContentTooLargeError(f"Content exceeds maximum allowed size ({max_size})")
+                sha256.update(chunk)
+                await f.write(chunk)
+
+        content_hash = sha256.hexdigest()
+        path = directory / f"{content_hash}{suffix.lower()}"
+        deduplicated = path.exists()
+        if deduplicated:
+            logger.info(f"Content already stored as {path.name}")
+        else:
+            os.replace(partial_path, path)
+        return StoredContent(path, content_hash, size, deduplicated)
+    finally:
+        partial_path.unlink(missing_ok=True)
+
+def find_content(content_hash: str, directory: Path = settings.UPLOAD_DIR) -> Optional[Path]:
+    """Return the stored file for a content hash, whatever its extension."""
+    if not CONTENT_HASH_PATTERN.match(content_hash):
+        return None
+    for path in directory.glob(f"{content_hash}.*"):
+        return path
+    path = directory / content_hash
+    return path if path.exists() else None
@@ -1,11 +1,13 @@
 import hashlib
 import base64
 import aiofiles
-import httpx
 import os
-from typing import Set
+from functools import lru_cache
+from typing import Optional, Set
 from pathlib import Path
 from ..core.config import settings
+from .content_store import store_content_addressed
+from .remote_fetcher import remote_fetcher
 
 async def get_file_hash(file_path: str) -> str:
     """Generate SHA256 hash of a file."""
@@ -21,9 +23,67 @@ async def get_file_hash(file_path: str) -> str:
     
     return sha256.hexdigest()
 
-def validate_file_type(filename: str, allowed_types: Set[str]) -> bool:
-    """Validate if the file extension is allowed."""
-    return Path(filename).suffix.lower() in allowed_types
+@lru_cache(maxsize=1024)
+def _file_sha256(path: str, size: int, modified_ns: int) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(settings.DOWNLOAD_CHUNK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def file_sha256(path: str) -> str:
+    """Content hash of a local file, computed once per file version."""
+    stat = os.stat(path)
+    return _file_sha256(path, stat.st_size, stat.st_mtime_ns)
+
+# Bytes needed from the start of a file to identify its format
+SNIFF_BYTES = 64
+
+ISO_MEDIA_TYPES = {'.mp4', '.mov', '.m4a', '.aac'}
+
+def sniff_media_types(header: bytes) -> Optional[Set[str]]:
+    """Extensions consistent with a file's magic bytes, or None if unrecognised."""
+    if header.startswith(b'\xff\xd8\xff'):
+        return {'.jpg', '.jpeg'}
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return {'.png'}
+    if header.startswith((b'GIF87a', b'GIF89a')):
+        return {'.gif'}
+    if header.startswith(b'BM'):
+        return {'.bmp'}
+    if header.startswith(b'RIFF') and header[8:12] == b'WAVE':
+        return {'.wav'}
+    if header.startswith(b'RIFF') and header[8:12] == b'AVI ':
+        return {'.avi'}
+    if header.startswith(b'fLaC'):
+        return {'.flac'}
+    if header[4:8] == b'ftyp':
+        return ISO_MEDIA_TYPES
+    if header.startswith(b'\x1a\x45\xdf\xa3'):
+        return {'.mkv'}
+    if header.startswith(b'ID3'):
+        return {'.mp3'}
+    if len(header) >= 2 and header[0] == 0xff and header[1] & 0xf6 == 0xf0:
+        # ADTS AAC frame sync (layer bits 00)
+        return {'.aac'}
+    if len(header) >= 2 and header[0] == 0xff and header[1] & 0xe0 == 0xe0:
+        # MPEG audio frame sync
+        return {'.mp3'}
+    return None
+
+def validate_file_type(filename: str, allowed_types: Set[str], header: Optional[bytes] = None) -> bool:
+    """Validate if the file extension is allowed.
+
+    When the first bytes of the file are given, its magic bytes must also
+    match the extension.
+    """
+    suffix = Path(filename).suffix.lower()
+    if suffix not in allowed_types:
+        return False
+    if header is None:
+        return True
+    sniffed = sniff_media_types(header)
+    return sniffed is not None and suffix in sniffed
 
 async def save_base64_media(base64_data: str, file_extension: str) -> str:
     """Save base64 encoded media to a file."""
@@ -35,53 +95,14 @@ async def save_base64_media(base64_data: str, file_extension: str) -> str:
         # Decode base64 data
         file_data = base64.b64decode(base64_data)
         
-        # Generate unique filename
-        filename = f"{hashlib.md5(file_data).hexdigest()}{file_extension}"
-        file_path = settings.UPLOAD_DIR / filename
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(file_data)
-        
-        return str(file_path)
+        async def chunks():
+            yield file_data
+
+        stored = await store_content_addressed(chunks(), file_extension)
+        return str(stored.path)
     except Exception as e:
         raise ValueError(f"Error saving base64 media: {str(e)}")
 
 async def download_remote_file(url: str, max_size: int = settings.MAX_FILE_SIZE) -> str:
-    """Download a file from a remote URL."""
-    async with httpx.AsyncClient() as client:
-        # First, make a HEAD request to check content length
-        head_response = await client.head(url)
-        content_length = int(head_response.headers.get('content-length', 0))
-        
-        if content_length > max_size:
-            raise ValueError(f"File size ({content_length}) exceeds maximum allowed size ({max_size})")
-        
-        # Download the file
-        response = await client.get(url)
-        response.raise_for_status()
-        
-        # Generate unique filename
-        file_extension = Path(url).suffix
-        filename = f"{hashlib.md5(response.content).hexdigest()}{file_extension}"
-        file_path = settings.UPLOAD_DIR / filename
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(response.content)
-        
-        return str(file_path)
-
-def cleanup_temp_files(job_id: str):
-    """Clean up temporary files associated with a job."""
-    temp_dir = settings.TEMP_DIR / job_id
-    if temp_dir.exists():
-        for file in temp_dir.glob("*"):
-            try:
-                file.unlink()
-            except Exception:
-                pass
-        try:
-            temp_dir.rmdir()
-        except Exception:
-            pass
+    """Download a file from a remote URL through the shared fetcher."""
+    return await remote_fetcher.fetch(url, max_size)
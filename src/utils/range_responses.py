@@ -0,0 +1,117 @@
+import asyncio
+import os
+import re
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import aiofiles
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from ..core.config import settings
+from .file_handlers import file_sha256
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+async def content_etag(path: Path) -> str:
+    """Strong ETag derived from the SHA-256 of the file content.
+
+    Hashes come from the bounded per-version cache behind ``file_sha256``.
+    """
+    return f'"{await asyncio.to_thread(file_sha256, str(path))}"'
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive offsets; None if unsatisfiable.
+
+    Multi-range requests are not supported and raise ValueError.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if match is None:
+        raise ValueError(f"Unsupported range: {header}")
+    start, end = match.groups()
+    if not start:
+        if not end or int(end) == 0:
+            return None
+        # Suffix range: the last N bytes
+        return max(0, size - int(end)), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+async def _read_range(path: Path, start: int, end: int) -> AsyncIterator[bytes]:
+    remaining = end - start + 1
+    async with aiofiles.open(path, 'rb') as f:
+        await f.seek(start)
+        while remaining > 0:
+            chunk = await f.read(min(settings.DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def _etag_matches(header: str, etag: str) -> bool:
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+async def ranged_file_response(
+    request: Request,
+    path: Path,
+    media_type: str,
+    filename: Optional[str] = None,
+    cache_control: str = "private, max-age=3600"
+) -> Response:
+    """Serve a file with strong ETags, If-None-Match and single byte-range support."""
+    stat = os.stat(path)
+    etag = await content_etag(path)
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": cache_control}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # A stale If-Range validator means the client's partial copy is outdated
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, stat.st_size)
+        except ValueError:
+            # RFC 9110: a Range header that cannot be parsed is ignored
+            return _full_response(path, media_type, filename, headers, stat)
+        if byte_range is None:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{stat.st_size}"}
+            )
+        start, end = byte_range
+        headers.update({
+            "Content-Range": f"bytes {start}-{end}/{stat.st_size}",
+            "Content-Length": str(end - start + 1)
+        })
+        if filename:
+            headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return StreamingResponse(
+            _read_range(path, start, end),
+            status_code=206,
+            media_type=media_type,
+            headers=headers
+        )
+
+    return _full_response(path, media_type, filename, headers, stat)
+
+def _full_response(
+    path: Path,
+    media_type: str,
+    filename: Optional[str],
+    headers: Dict[str, str],
+    stat: os.stat_result
+) -> FileResponse:
+    return FileResponse(
+        path,
+        media_type=media_type,
+        filename=filename,
+        headers=headers,
+        stat_result=stat
+    )
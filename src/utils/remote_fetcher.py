@@ -0,0 +1,177 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from ..core import metrics
+from ..core.config import settings
+from .content_store import store_content_addressed
+
+logger = logging.getLogger(__name__)
+
+# Servers often label media as a generic binary; anything else (HTML error pages, JSON) is rejected
+MEDIA_CONTENT_TYPES = ("image/", "audio/", "video/", "application/octet-stream", "application/mp4")
+
+class RemoteFetcher:
+    """Pooled, streaming downloader for remote media.
+
+    Bodies are streamed to disk in chunks and hashed on the fly, the size
+    limit is enforced while streaming, and files are stored by content hash
+    in ``cache_dir``. A URL index, shared by every process under a file
+    lock, remembers ETag/Last-Modified validators so repeat fetches become
+    conditional requests, and concurrent fetches of the same URL share one
+    download.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = settings.UPLOAD_DIR,
+        max_size: int = settings.MAX_FILE_SIZE,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.index_path = cache_dir / "remote_cache.json"
+        # Hidden so upload expiry skips it
+        self.lock_path = cache_dir / ".remote_cache.lock"
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def fetch(self, url: str, max_size: Optional[int] = None) -> str:
+        """Return a local path for ``url``, downloading it at most once at a time."""
+        inflight = self._inflight.get(url)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        try:
+            path = await self._fetch(url, max_size or self.max_size)
+            future.set_result(path)
+            return path
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del self._inflight[url]
+
+    def cached_paths(self, urls: Iterable[str]) -> List[str]:
+        """Local files already downloaded for any of ``urls``."""
+        index = self._read_index()
+        return [index[url]["path"] for url in urls if url in index]
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                follow_redirects=True,
+                timeout=httpx.Timeout(settings.DOWNLOAD_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.DOWNLOAD_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.DOWNLOAD_MAX_CONNECTIONS
+                )
+            )
+        return self._client
+
+    async def _fetch(self, url: str, max_size: int) -> str:
+        entry = (await asyncio.to_thread(self._read_index)).get(url)
+        if entry is not None and not Path(entry["path"]).exists():
+            entry = None
+
+        # Recently validated entries are served without touching the network
+        if entry is not None and time.time() - entry["validated_at"] < settings.REMOTE_CACHE_TTL:
+            metrics.record_cache("remote", hit=True)
+            return entry["path"]
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        async with self._get_client().stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and entry is not None:
+                await asyncio.to_thread(self._record, url, {**entry, "validated_at": time.time()})
+                metrics.record_cache("remote", hit=True)
+                return entry["path"]
+
+            response.raise_for_status()
+            content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type and not content_type.startswith(MEDIA_CONTENT_TYPES):
+                raise ValueError(f"Unsupported content type {content_type} for {url}")
+            content_length = int(response.headers.get("content-length", 0))
+            if content_length > max_size:
+                raise ValueError(f"File size ({content_length}) exceeds maximum allowed size ({max_size})")
+
+            metrics.record_cache("remote", hit=False)
+            path = await self._stream_to_disk(response, Path(urlparse(url).path).suffix, max_size)
+            await asyncio.to_thread(self._record, url, {
+                "path": str(path),
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "validated_at": time.time()
+            })
+            return str(path)
+
+    async def _stream_to_disk(self, response: httpx.Response, suffix: str, max_size: int) -> Path:
+        """Write a response body to a content-addressed file, hashing as it streams."""
+        stored = await store_content_addressed(
+            response.aiter_bytes(settings.DOWNLOAD_CHUNK_SIZE),
+            suffix,
+            max_size,
+            self.cache_dir
+        )
+        metrics.record_download(stored.size)
+        return stored.path
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        # Writers replace the file atomically, so reads need no lock
+        try:
+            return json.loads(self.index_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @contextmanager
+    def _locked_index(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """Re-read, modify and write the index under an exclusive file lock.
+
+        The API and every worker download into UPLOAD_DIR, so the index is
+        merged from disk on each change rather than written from a stale copy.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                index = self._read_index()
+                yield index
+                temp_path = self.index_path.with_suffix(".tmp")
+                temp_path.write_text(json.dumps(index))
+                os.replace(temp_path, self.index_path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _record(self, url: str, entry: Dict[str, Any]) -> None:
+        """Store a URL's entry and drop entries whose file was evicted."""
+        with self._locked_index() as index:
+            index[url] = entry
+            for stale in [key for key, value in index.items() if not Path(value["path"]).exists()]:
+                del index[stale]
+
+remote_fetcher = RemoteFetcher()
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import os
+import signal
+import socket
+from datetime import datetime
+from typing import Optional
+
+from .core import metrics
+from .core.config import settings
+from .models.enums import JobStatus
+from .services.job_events import TERMINAL_STATUSES
+from .services.job_queue import JobQueue, QueuedJob, create_job_queue
+from .services.job_store import JobRepository, job_store
+from .services.video_processor import VideoProcessor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class QueueWorker:
+    """Runs VideoProcessor against a JobQueue with a fixed number of slots.
+
+    Each slot is its own queue consumer and heartbeats the job it is
+    rendering, so a crashed worker's jobs are reclaimed by the others once
+    the visibility timeout expires.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        processor: Optional[VideoProcessor] = None,
+        store: JobRepository = job_store,
+        slots: int = settings.MAX_CONCURRENT_JOBS
+    ):
+        self.queue = queue
+        self.store = store
+        self.processor = processor or VideoProcessor(store=store)
+        self.slots = max(1, slots)
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        await self.store.start()
+        self.processor.render_executor.start()
+        if settings.METRICS_ENABLED and settings.WORKER_METRICS_PORT:
+            metrics.running_jobs.set_function(lambda: len(self.processor.active_jobs))
+            metrics.serve(settings.WORKER_METRICS_PORT)
+        slots = [asyncio.create_task(self._run_slot(f"{self.name}:{slot}")) for slot in range(self.slots)]
+        logger.info(f"Worker {self.name} consuming jobs with {self.slots} slots")
+        try:
+            await self._stopping.wait()
+        finally:
+            # Unfinished jobs stay claimed and are reclaimed after the visibility timeout
+            for task in slots:
+                task.cancel()
+            await asyncio.gather(*slots, return_exceptions=True)
+            self.processor.render_executor.shutdown()
+            await self.queue.close()
+            await self.store.close()
+
+    async def _run_slot(self, consumer: str) -> None:
+        while True:
+            try:
+                entry = await self.queue.claim(consumer)
+                if entry is not None:
+                    await self._process(entry, consumer)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Consumer {consumer} failed: {e}")
+                await asyncio.sleep(settings.JOB_QUEUE_BLOCK_SECONDS)
+
+    async def _process(self, entry: QueuedJob, consumer: str) -> None:
+        job = await self.store.get(entry.job_id)
+        # Cancelled, or finished by a worker that died before acknowledging
+        if job is None or job.status in TERMINAL_STATUSES:
+            await self.queue.ack(entry)
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(entry, consumer))
+        try:
+            job.error_message = None
+            await self.processor.process_job(job)
+        finally:
+            heartbeat.cancel()
+
+        if job.status == JobStatus.FAILED and await self.queue.retry(entry):
+            logger.info(f"Retrying job {job.id} (attempt {entry.attempts + 2})")
+            job.status = JobStatus.PENDING
+            job.stage = "queued"
+            job.updated_at = datetime.utcnow()
+            await self.store.update(job)
+        elif job.status != JobStatus.FAILED:
+            await self.queue.ack(entry)
+
+    async def _heartbeat(self, entry: QueuedJob, consumer: str) -> None:
+        while True:
+            await asyncio.sleep(settings.JOB_QUEUE_HEARTBEAT_INTERVAL)
+            try:
+                await self.queue.heartbeat(entry, consumer)
+            except Exception as e:
+                logger.error(f"Heartbeat for job {entry.job_id} failed: {e}")
+
+async def main() -> None:
+    try:
+        queue = create_job_queue()
+    except ValueError as e:
+        raise SystemExit(f"Cannot start worker: {e}")
+    worker = QueueWorker(queue)
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, worker.stop)
+    await worker.run()
+
+if __name__ == "__main__":
+    asyncio.run(main())
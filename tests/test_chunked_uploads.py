@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import os
+import time
+
+import pytest
+
+from src.core.config import settings
+from src.services.chunked_uploads import ChunkedUploadManager, IncompleteUploadError, UploadNotFoundError
+
+CHUNK_SIZE = 64
+DATA = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 2
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "CHUNKED_UPLOAD_CHUNK_SIZE", CHUNK_SIZE)
+
+@pytest.fixture
+def manager(tmp_path):
+    return ChunkedUploadManager(tmp_path / "sessions", tmp_path / "uploads")
+
+def chunks(data: bytes):
+    return [data[offset:offset + CHUNK_SIZE] for offset in range(0, len(data), CHUNK_SIZE)]
+
+def write(manager, upload_id, index, data, expected_hash=None):
+    async def body():
+        yield data[:10]
+        yield data[10:]
+
+    return asyncio.run(manager.write_chunk(upload_id, index, body(), expected_hash))
+
+def test_assembles_chunks_in_any_order(manager):
+    manager.upload_dir.mkdir()
+    upload = manager.create("image.png", len(DATA), hashlib.sha256(DATA).hexdigest())
+    assert upload.chunk_count == len(chunks(DATA))
+    for index in reversed(range(upload.chunk_count)):
+        write(manager, upload.upload_id, index, chunks(DATA)[index])
+    assert manager.status(upload.upload_id).received_chunks == list(range(upload.chunk_count))
+
+    stored = asyncio.run(manager.complete(upload.upload_id))
+    assert stored.path.read_bytes() == DATA
+    assert stored.path.name == f"{hashlib.sha256(DATA).hexdigest()}.png"
+    # The session is gone once the file is in UPLOAD_DIR
+    with pytest.raises(UploadNotFoundError):
+        manager.status(upload.upload_id)
+
+def test_rejects_chunk_hash_mismatch(manager):
+    upload = manager.create("image.png", len(DATA))
+    with pytest.raises(ValueError, match="hash mismatch"):
+        write(manager, upload.upload_id, 0, chunks(DATA)[0], expected_hash="0" * 64)
+    assert manager.status(upload.upload_id).received_chunks == []
+
+def test_rejects_chunk_of_wrong_length(manager):
+    upload = manager.create("image.png", len(DATA))
+    with pytest.raises(ValueError, match="expected"):
+        write(manager, upload.upload_id, 1, chunks(DATA)[1][:-1])
+
+def test_complete_requires_every_chunk(manager):
+    upload = manager.create("image.png", len(DATA))
+    write(manager, upload.upload_id, 0, chunks(DATA)[0])
+    with pytest.raises(IncompleteUploadError, match="Missing chunks: \\[1, 2"):
+        asyncio.run(manager.complete(upload.upload_id))
+
+def test_complete_rejects_file_hash_mismatch(manager):
+    upload = manager.create("image.png", len(DATA), content_hash="0" * 64)
+    for index, chunk in enumerate(chunks(DATA)):
+        write(manager, upload.upload_id, index, chunk)
+    with pytest.raises(ValueError, match="File hash mismatch"):
+        asyncio.run(manager.complete(upload.upload_id))
+
+def test_complete_checks_client_chunk_hashes(manager):
+    upload = manager.create("image.png", len(DATA))
+    for index, chunk in enumerate(chunks(DATA)):
+        write(manager, upload.upload_id, index, chunk)
+    hashes = [hashlib.sha256(chunk).hexdigest() for chunk in chunks(DATA)]
+    hashes[-1] = "0" * 64
+    with pytest.raises(ValueError, match=f"Chunk {len(hashes) - 1} hash mismatch"):
+        asyncio.run(manager.complete(upload.upload_id, hashes))
+
+def test_expiry_spares_sessions_still_receiving_chunks(manager):
+    idle = manager.create("image.png", len(DATA))
+    active = manager.create("image.png", len(DATA))
+    created_long_ago = time.time() - settings.CHUNKED_UPLOAD_TTL - 60
+    for upload in (idle, active):
+        os.utime(manager.root / upload.upload_id, (created_long_ago, created_long_ago))
+
+    write(manager, active.upload_id, 0, chunks(DATA)[0])
+    manager.expire_sessions()
+    assert manager.status(active.upload_id).received_chunks == [0]
+    with pytest.raises(UploadNotFoundError):
+        manager.status(idle.upload_id)
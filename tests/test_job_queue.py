@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from src.core.config import settings
+from src.models.enums import JobPriority
+from src.services.job_queue import InMemoryJobQueue, RedisStreamJobQueue, create_job_queue
+
+@pytest.fixture(autouse=True)
+def fast_queue(monkeypatch):
+    monkeypatch.setattr(settings, "JOB_QUEUE_BLOCK_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "JOB_QUEUE_MAX_ATTEMPTS", 3)
+
+def memory_queue() -> InMemoryJobQueue:
+    return InMemoryJobQueue()
+
+def redis_queue() -> RedisStreamJobQueue:
+    fakeredis = pytest.importorskip("fakeredis")
+    queue = RedisStreamJobQueue(prefix="test_jobs")
+    queue.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    return queue
+
+@pytest.fixture(params=[memory_queue, redis_queue], ids=["memory", "redis"])
+def make_queue(request):
+    return request.param
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_claims_in_priority_order(make_queue):
+    async def scenario():
+        queue = make_queue()
+        await queue.enqueue("low", JobPriority.LOW)
+        await queue.enqueue("urgent", JobPriority.URGENT)
+        await queue.enqueue("normal", JobPriority.NORMAL)
+        claimed = [(await queue.claim("worker-1")).job_id for _ in range(3)]
+        assert await queue.claim("worker-1") is None
+        return claimed
+
+    assert run(scenario()) == ["urgent", "normal", "low"]
+
+def test_ack_removes_claimed_job(make_queue):
+    async def scenario():
+        queue = make_queue()
+        await queue.enqueue("job-1", JobPriority.NORMAL)
+        assert await queue.stats() == {"queued_jobs": 1, "running_jobs": 0}
+        entry = await queue.claim("worker-1")
+        assert entry.job_id == "job-1" and entry.attempts == 0
+        assert await queue.stats() == {"queued_jobs": 0, "running_jobs": 1}
+        await queue.ack(entry)
+        assert await queue.stats() == {"queued_jobs": 0, "running_jobs": 0}
+        assert await queue.claim("worker-2") is None
+
+    run(scenario())
+
+def test_reclaims_jobs_of_dead_consumer(make_queue, monkeypatch):
+    async def scenario():
+        queue = make_queue()
+        await queue.enqueue("job-1", JobPriority.NORMAL)
+        # worker-1 claims the job and dies without heartbeating or acking
+        monkeypatch.setattr(settings, "JOB_QUEUE_VISIBILITY_TIMEOUT", 0)
+        first = await queue.claim("worker-1")
+        await asyncio.sleep(0.01)
+        second = await queue.claim("worker-2")
+        assert second.job_id == "job-1"
+        assert second.attempts == first.attempts + 1
+        await queue.ack(second)
+        assert await queue.stats() == {"queued_jobs": 0, "running_jobs": 0}
+
+    run(scenario())
+
+def test_heartbeat_keeps_job_claimed(make_queue, monkeypatch):
+    async def scenario():
+        queue = make_queue()
+        await queue.enqueue("job-1", JobPriority.NORMAL)
+        monkeypatch.setattr(settings, "JOB_QUEUE_VISIBILITY_TIMEOUT", 1)
+        entry = await queue.claim("worker-1")
+        await asyncio.sleep(0.6)
+        await queue.heartbeat(entry, "worker-1")
+        await asyncio.sleep(0.6)
+        # Claimed 1.2s ago but heartbeated 0.6s ago, so still invisible
+        assert await queue.claim("worker-2") is None
+
+    run(scenario())
+
+def test_retry_gives_up_after_max_attempts(make_queue):
+    async def scenario():
+        queue = make_queue()
+        await queue.enqueue("job-1", JobPriority.NORMAL)
+        retried = []
+        for _ in range(settings.JOB_QUEUE_MAX_ATTEMPTS):
+            entry = await queue.claim("worker-1")
+            retried.append(await queue.retry(entry))
+        assert await queue.claim("worker-1") is None
+        return retried
+
+    assert run(scenario()) == [True, True, False]
+
+def test_local_backend_has_no_worker_queue():
+    with pytest.raises(ValueError, match="JOB_QUEUE_BACKEND=redis"):
+        create_job_queue("local")
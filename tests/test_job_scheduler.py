@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from src.core.config import settings
+from src.models.enums import JobPriority, JobStatus
+from src.models.schemas import VideoCompositionRequest, VideoJob
+from src.services.job_scheduler import AdmissionError, JobScheduler
+from src.services.job_store import InMemoryJobRepository
+
+class GatedProcessor:
+    """Stands in for VideoProcessor; each job runs until the test releases it."""
+
+    def __init__(self):
+        self.active_jobs = set()
+        self.job_store = InMemoryJobRepository()
+        self.started = []
+        self.gate = asyncio.Event()
+
+    async def process_job(self, job: VideoJob) -> None:
+        self.active_jobs.add(job.id)
+        self.started.append(job.id)
+        await self.gate.wait()
+        self.active_jobs.remove(job.id)
+
+def make_job(job_id: str, priority: JobPriority = JobPriority.NORMAL, scenes: int = 1, duration: float = 1.0) -> VideoJob:
+    request = VideoCompositionRequest(
+        scenes=[{"media_path": "/tmp/scene.png", "duration": duration}] * scenes,
+        priority=priority
+    )
+    return VideoJob(id=job_id, request=request)
+
+def run(scenario, slots: int = 1):
+    async def main():
+        processor = GatedProcessor()
+        scheduler = JobScheduler(processor, slots=slots)
+        try:
+            return await scenario(scheduler, processor)
+        finally:
+            processor.gate.set()
+            await scheduler.stop()
+
+    return asyncio.run(main())
+
+async def drain(processor, jobs: int):
+    """Release the gate and wait until ``jobs`` jobs have started."""
+    processor.gate.set()
+    while len(processor.started) < jobs:
+        await asyncio.sleep(0.01)
+
+@pytest.fixture(autouse=True)
+def fast_aging(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_AGING_SECONDS", 0.05)
+
+def test_higher_priorities_run_first():
+    async def scenario(scheduler, processor):
+        await scheduler.submit(make_job("running"))
+        await asyncio.sleep(0.01)
+        for job_id, priority in [("low", JobPriority.LOW), ("normal", JobPriority.NORMAL), ("urgent", JobPriority.URGENT)]:
+            await scheduler.submit(make_job(job_id, priority))
+        await drain(processor, 4)
+        return processor.started
+
+    assert run(scenario) == ["running", "urgent", "normal", "low"]
+
+def test_waiting_jobs_age_past_newer_urgent_work():
+    async def scenario(scheduler, processor):
+        await scheduler.submit(make_job("running"))
+        await asyncio.sleep(0.01)
+        await scheduler.submit(make_job("low", JobPriority.LOW))
+        # Longer than the three-level head start URGENT has over LOW
+        await asyncio.sleep(4 * settings.SCHEDULER_AGING_SECONDS)
+        await scheduler.submit(make_job("urgent", JobPriority.URGENT))
+        await drain(processor, 3)
+        return processor.started
+
+    assert run(scenario) == ["running", "low", "urgent"]
+
+def test_reserved_slot_only_runs_urgent_jobs():
+    async def scenario(scheduler, processor):
+        for job_id in ("normal-1", "normal-2"):
+            await scheduler.submit(make_job(job_id))
+        await asyncio.sleep(0.05)
+        # One general slot and one held back for urgent work
+        assert processor.started == ["normal-1"]
+        await scheduler.submit(make_job("urgent", JobPriority.URGENT))
+        await asyncio.sleep(0.05)
+        return processor.started
+
+    assert run(scenario, slots=2) == ["normal-1", "urgent"]
+
+def test_rejects_compositions_over_limits(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_SCENES", 2)
+
+    async def scenario(scheduler, processor):
+        with pytest.raises(AdmissionError, match="3 scenes"):
+            await scheduler.submit(make_job("too-long", scenes=3))
+
+    run(scenario)
+
+def test_rejects_jobs_beyond_queue_depth(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_MAX_QUEUED_JOBS", 1)
+
+    async def scenario(scheduler, processor):
+        await scheduler.submit(make_job("running"))
+        await asyncio.sleep(0.01)
+        await scheduler.submit(make_job("queued"))
+        with pytest.raises(AdmissionError, match="queue is full"):
+            await scheduler.submit(make_job("rejected", JobPriority.URGENT))
+
+    run(scenario)
+
+def test_backlog_limit_spares_urgent_jobs(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_MAX_QUEUED_SECONDS", 10)
+
+    async def scenario(scheduler, processor):
+        await scheduler.submit(make_job("running"))
+        await asyncio.sleep(0.01)
+        await scheduler.submit(make_job("queued", duration=8.0))
+        with pytest.raises(AdmissionError, match="backlog"):
+            await scheduler.submit(make_job("normal", duration=5.0))
+        await scheduler.submit(make_job("urgent", JobPriority.URGENT, duration=5.0))
+        assert scheduler.queue_depth == 2
+
+    run(scenario)
+
+def test_cancel_removes_queued_job():
+    async def scenario(scheduler, processor):
+        await scheduler.submit(make_job("running"))
+        await asyncio.sleep(0.01)
+        queued = make_job("queued")
+        await processor.job_store.save(queued)
+        await scheduler.submit(queued)
+        assert await scheduler.cancel("queued")
+        assert not await scheduler.cancel("running")
+        assert (await processor.job_store.get("queued")).status == JobStatus.CANCELLED
+        await drain(processor, 1)
+        await asyncio.sleep(0.05)
+        return processor.started
+
+    assert run(scenario) == ["running"]
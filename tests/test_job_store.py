@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+
+from src.core.config import settings
+from src.models.enums import JobStatus
+from src.models.schemas import VideoCompositionRequest, VideoJob
+from src.services.job_store import SQLiteJobRepository
+
+@pytest.fixture(autouse=True)
+def slow_flushes(monkeypatch):
+    # Flushes only happen when a test asks for one
+    monkeypatch.setattr(settings, "JOB_STORE_FLUSH_INTERVAL", 3600)
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'jobs.db'}"
+
+def make_job(job_id: str = "job-1", **fields) -> VideoJob:
+    request = VideoCompositionRequest(scenes=[{"media_path": "/tmp/scene.png", "duration": 1}])
+    return VideoJob(id=job_id, request=request, **fields)
+
+def run(scenario, database_url, processes=1):
+    async def main():
+        stores = [SQLiteJobRepository(database_url) for _ in range(processes)]
+        for store in stores:
+            await store.start()
+        try:
+            return await scenario(*stores)
+        finally:
+            for store in stores:
+                await store.close()
+
+    return asyncio.run(main())
+
+def test_progress_is_buffered_until_flush(database_url):
+    async def scenario(api, worker):
+        job = make_job()
+        await api.save(job)
+        job.status = JobStatus.PROCESSING
+        job.progress = 40.0
+        worker.record_progress(job)
+        # The buffered snapshot is written, not the job as it is at flush time
+        job.progress = 60.0
+        assert (await api.get(job.id)).progress == 0.0
+        await worker.flush()
+        stored = await api.get(job.id)
+        assert (stored.status, stored.progress) == (JobStatus.PROCESSING, 40.0)
+
+    run(scenario, database_url, processes=2)
+
+def test_flush_racing_final_update_keeps_job_finished(database_url, monkeypatch):
+    async def scenario(store):
+        job = make_job(status=JobStatus.PROCESSING)
+        await store.save(job)
+        job.progress = 99.0
+        job.updated_at = datetime.utcnow()
+        store.record_progress(job)
+
+        # Hold the flush in its thread until the final update has committed
+        started, release = threading.Event(), threading.Event()
+        update_many = store._update_many
+
+        def delayed_update_many(rows):
+            started.set()
+            release.wait(5)
+            update_many(rows)
+
+        monkeypatch.setattr(store, "_update_many", delayed_update_many)
+        flush = asyncio.create_task(store.flush())
+        await asyncio.to_thread(started.wait, 5)
+        job.status = JobStatus.COMPLETED
+        job.progress = 100.0
+        job.updated_at = datetime.utcnow()
+        assert await store.update(job)
+        release.set()
+        await flush
+
+        stored = await store.get(job.id)
+        assert (stored.status, stored.progress) == (JobStatus.COMPLETED, 100.0)
+
+    run(scenario, database_url)
+
+def test_update_does_not_resurrect_deleted_jobs(database_url):
+    async def scenario(store):
+        job = make_job()
+        await store.save(job)
+        assert await store.delete(job.id)
+        job.status = JobStatus.COMPLETED
+        assert not await store.update(job)
+        assert await store.get(job.id) is None
+
+    run(scenario, database_url)
+
+def test_recovers_jobs_of_closed_process(database_url):
+    async def scenario(api, worker):
+        job = make_job(status=JobStatus.PENDING)
+        await api.save(job)
+        job.status = JobStatus.PROCESSING
+        job.stage = "encoding"
+        job.progress = 50.0
+        # The worker took the job over, so the API no longer owns it
+        await worker.update(job)
+        assert await api.recover_interrupted() == []
+
+        # A cleanly closed store retires its heartbeat at once
+        await worker.close()
+        recovered = await api.recover_interrupted()
+        assert [job.id for job in recovered] == [job.id]
+        stored = await api.get(job.id)
+        assert (stored.status, stored.stage, stored.progress) == (JobStatus.PENDING, None, 0.0)
+        # Recovered jobs belong to the recovering process
+        assert await api.recover_interrupted() == []
+
+    run(scenario, database_url, processes=2)
+
+def test_recovers_jobs_after_heartbeat_expires(database_url, monkeypatch):
+    async def scenario(api, worker):
+        await api.save(make_job("running", status=JobStatus.PROCESSING))
+        await worker.update(make_job("running", status=JobStatus.PROCESSING))
+        await api.save(make_job("finished", status=JobStatus.COMPLETED))
+        await worker.update(make_job("finished", status=JobStatus.COMPLETED))
+        assert await api.recover_interrupted() == []
+
+        monkeypatch.setattr(settings, "JOB_STORE_LEASE_SECONDS", 0)
+        await asyncio.sleep(0.01)
+        # The API's own heartbeat is renewed; the worker's has lapsed
+        await asyncio.to_thread(api._heartbeat)
+        assert [job.id for job in await api.recover_interrupted()] == ["running"]
+
+    run(scenario, database_url, processes=2)
+
+def test_recovery_can_be_limited_to_a_stage(database_url):
+    async def scenario(api, worker):
+        for job in (make_job("planning", stage="planning"), make_job("queued")):
+            await worker.save(job)
+        await worker.close()
+        assert [job.id for job in await api.recover_interrupted(stage="planning")] == ["planning"]
+        assert [job.id for job in await api.recover_interrupted()] == ["queued"]
+
+    run(scenario, database_url, processes=2)
@@ -0,0 +1,81 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from src.utils.range_responses import _parse_range, ranged_file_response
+
+BODY = bytes(range(256)) * 4
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, len(BODY) - 1)),
+    ("bytes=-100", (len(BODY) - 100, len(BODY) - 1)),
+    ("bytes=1000-5000", (1000, len(BODY) - 1)),
+    ("bytes=-5000", (0, len(BODY) - 1)),
+    ("bytes=2000-", None),
+    ("bytes=50-10", None),
+    ("bytes=-0", None)
+])
+def test_parse_range(header, expected):
+    assert _parse_range(header, len(BODY)) == expected
+
+@pytest.mark.parametrize("header", ["bytes=0-1,5-9", "items=0-9", "bytes=a-b"])
+def test_parse_range_rejects_unsupported(header):
+    with pytest.raises(ValueError):
+        _parse_range(header, len(BODY))
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "output.mp4"
+    path.write_bytes(BODY)
+    app = FastAPI()
+
+    @app.get("/file")
+    async def serve(request: Request):
+        return await ranged_file_response(request, path, media_type="video/mp4")
+
+    def get(url, headers=None):
+        async def scenario():
+            # Starlette's TestClient predates httpx 0.28, so drive the app through the ASGI transport
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+                return await http.get(url, headers=headers)
+
+        return asyncio.run(scenario())
+
+    return get
+
+def test_serves_whole_file_without_range(client):
+    response = client("/file")
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["accept-ranges"] == "bytes"
+
+def test_serves_partial_content(client):
+    response = client("/file", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == BODY[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(BODY)}"
+
+def test_unsatisfiable_range_is_416(client):
+    response = client("/file", headers={"Range": f"bytes={len(BODY)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(BODY)}"
+
+def test_unparseable_range_is_ignored(client):
+    response = client("/file", headers={"Range": "bytes=0-1,5-9"})
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert "content-range" not in response.headers
+
+def test_matching_etag_is_304(client):
+    etag = client("/file").headers["etag"]
+    response = client("/file", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+def test_stale_if_range_serves_whole_file(client):
+    response = client("/file", headers={"Range": "bytes=10-19", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == BODY
@@ -0,0 +1,153 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from src.core.config import settings
+from src.utils.content_store import ContentTooLargeError
+from src.utils.remote_fetcher import RemoteFetcher
+
+IMAGE = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+ETAG = '"v1"'
+
+class MediaHandler(BaseHTTPRequestHandler):
+    """Local stand-in for a media host; records every request it serves."""
+
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/image.png":
+            self._send(200, IMAGE, "image/png", {"ETag": ETAG})
+        elif self.path == "/other.png":
+            self._send(200, IMAGE[::-1], "image/png")
+        elif self.path == "/validated.png":
+            if self.headers.get("If-None-Match") == ETAG:
+                self._send(304, b"", None, {"ETag": ETAG})
+            else:
+                self._send(200, IMAGE, "image/png", {"ETag": ETAG})
+        elif self.path == "/redirect.png":
+            self._send(302, b"", None, {"Location": "/image.png"})
+        elif self.path == "/page.png":
+            self._send(200, b"<html>Not found</html>", "text/html; charset=utf-8")
+        elif self.path == "/declared-large.png":
+            self._send(200, IMAGE, "image/png", {"Content-Length": str(10 * len(IMAGE))}, body_length=False)
+        elif self.path == "/streamed-large.png":
+            # No Content-Length: the cap must be enforced while streaming
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(IMAGE * 10)
+        else:
+            self._send(404, b"", None)
+
+    def _send(self, status, body, content_type, headers=None, body_length=True):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body_length:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body_length:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), MediaHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+@pytest.fixture(autouse=True)
+def clear_requests():
+    MediaHandler.requests.clear()
+
+def fetch(cache_dir: Path, *urls: str, max_size: int = 1024 * 1024):
+    async def scenario():
+        fetcher = RemoteFetcher(cache_dir, max_size)
+        try:
+            return [await fetcher.fetch(url) for url in urls]
+        finally:
+            await fetcher.aclose()
+
+    return asyncio.run(scenario())
+
+def test_streams_to_content_addressed_file(server, tmp_path):
+    path, = fetch(tmp_path, f"{server}/image.png")
+    assert Path(path).parent == tmp_path
+    assert Path(path).suffix == ".png"
+    assert Path(path).read_bytes() == IMAGE
+
+def test_rejects_declared_size_over_cap(server, tmp_path):
+    with pytest.raises(ValueError, match="exceeds maximum"):
+        fetch(tmp_path, f"{server}/declared-large.png", max_size=2 * len(IMAGE))
+    assert not list(tmp_path.glob("*.png"))
+
+def test_enforces_cap_while_streaming(server, tmp_path):
+    with pytest.raises(ContentTooLargeError):
+        fetch(tmp_path, f"{server}/streamed-large.png", max_size=2 * len(IMAGE))
+    # The partial download is removed
+    assert not [path for path in tmp_path.iterdir() if path.name != "remote_cache.json"]
+
+def test_rejects_non_media_content_type(server, tmp_path):
+    with pytest.raises(ValueError, match="Unsupported content type text/html"):
+        fetch(tmp_path, f"{server}/page.png")
+
+def test_follows_redirects(server, tmp_path):
+    path, = fetch(tmp_path, f"{server}/redirect.png")
+    assert Path(path).read_bytes() == IMAGE
+    assert [request for request, _ in MediaHandler.requests] == ["/redirect.png", "/image.png"]
+
+def test_serves_fresh_entries_without_network(server, tmp_path):
+    first, second = fetch(tmp_path, f"{server}/image.png", f"{server}/image.png")
+    assert first == second
+    assert len(MediaHandler.requests) == 1
+
+def test_revalidates_stale_entries_with_etag(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "REMOTE_CACHE_TTL", 0)
+    first, second = fetch(tmp_path, f"{server}/validated.png", f"{server}/validated.png")
+    assert first == second
+    assert MediaHandler.requests == [("/validated.png", None), ("/validated.png", ETAG)]
+
+def test_concurrent_fetches_share_one_download(server, tmp_path):
+    async def scenario():
+        fetcher = RemoteFetcher(tmp_path)
+        try:
+            return await asyncio.gather(*(fetcher.fetch(f"{server}/image.png") for _ in range(5)))
+        finally:
+            await fetcher.aclose()
+
+    assert len(set(asyncio.run(scenario()))) == 1
+    assert len(MediaHandler.requests) == 1
+
+def test_index_is_shared_between_fetchers(server, tmp_path):
+    # Two processes downloading into the same directory must not drop each other's entries
+    async def scenario():
+        first, second = RemoteFetcher(tmp_path), RemoteFetcher(tmp_path)
+        try:
+            await first.fetch(f"{server}/image.png")
+            await second.fetch(f"{server}/validated.png")
+            await first.fetch(f"{server}/redirect.png")
+            return second.cached_paths([f"{server}/image.png", f"{server}/validated.png", f"{server}/redirect.png"])
+        finally:
+            await first.aclose()
+            await second.aclose()
+
+    assert len(asyncio.run(scenario())) == 3
+
+def test_prunes_entries_of_evicted_files(server, tmp_path):
+    path, = fetch(tmp_path, f"{server}/image.png")
+    Path(path).unlink()
+    fetch(tmp_path, f"{server}/other.png")
+    fetcher = RemoteFetcher(tmp_path)
+    assert fetcher.cached_paths([f"{server}/image.png"]) == []
+    assert len(fetcher.cached_paths([f"{server}/other.png"])) == 1
@@ -0,0 +1,72 @@
+import imageio_ffmpeg
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.models.schemas import VideoCompositionRequest
+from src.services.segment_cache import SegmentCache, SegmentedRenderer
+
+@pytest.fixture
+def images(tmp_path):
+    paths = []
+    for n, color in enumerate([(200, 40, 40), (40, 200, 40), (40, 40, 200)]):
+        path = tmp_path / f"still-{n}.png"
+        Image.fromarray(np.full((90, 160, 3), color, dtype=np.uint8)).save(path)
+        paths.append(str(path))
+    return paths
+
+def composition(images, durations=(1.3, 1.1, 0.9), fps=24, transition="crossfade", **video_settings):
+    return VideoCompositionRequest(
+        scenes=[
+            {"media_path": path, "duration": duration, "transition": transition, "transition_duration": 0.35}
+            for path, duration in zip(images, durations)
+        ],
+        settings={"video_settings": {"width": 160, "height": 90, "fps": fps, **video_settings}}
+    )
+
+def no_loader(scene, frame_size):
+    raise AssertionError("still compositions are encoded without MoviePy")
+
+@pytest.fixture
+def renderer(tmp_path):
+    return SegmentedRenderer(no_loader, cache=SegmentCache(tmp_path / "segments"), scratch_dir=tmp_path)
+
+@pytest.mark.parametrize("fps", [24, 25, 30])
+def test_segment_frames_add_up_to_the_timeline(renderer, images, fps):
+    request = composition(images, durations=(1.37, 1.11, 0.93), fps=fps)
+    # 3.41s minus two 0.35s overlaps
+    assert sum(segment.frames for segment in renderer.plan(request)) == round(2.71 * fps)
+
+def test_editing_a_scene_changes_only_its_segments(renderer, images, tmp_path):
+    keys = [segment.key for segment in renderer.plan(composition(images))]
+    replacement = tmp_path / "replacement.png"
+    Image.fromarray(np.zeros((90, 160, 3), dtype=np.uint8)).save(replacement)
+    edited = [segment.key for segment in renderer.plan(composition([images[0], images[1], str(replacement)]))]
+    # Bodies and transitions alternate: body 0, t01, body 1, t12, body 2
+    assert len(keys) == len(edited) == 5
+    assert edited[:3] == keys[:3]
+    assert all(a != b for a, b in zip(edited[3:], keys[3:]))
+
+def test_keys_ignore_other_scenes_and_encoder_threads(renderer, images, monkeypatch):
+    first_body = renderer.plan(composition(images))[0].key
+    monkeypatch.setattr("src.services.encoding_profiles.encoder_threads", lambda: 64)
+    assert renderer.plan(composition(images, durations=(1.3, 1.1, 2.0)))[0].key == first_body
+    assert renderer.plan(composition(images, bitrate="500k"))[0].key != first_body
+
+def test_rerender_reuses_every_segment(renderer, images, tmp_path):
+    request = composition(images)
+    timings = {}
+    encoded = renderer.render(request, tmp_path / "first.mp4", lambda stage, progress: None, timings)
+    total_frames = round(2.6 * 24)
+    assert encoded == total_frames
+    assert imageio_ffmpeg.count_frames_and_secs(str(tmp_path / "first.mp4"))[0] == total_frames
+
+    assert renderer.render(request, tmp_path / "second.mp4", lambda stage, progress: None, {}) == 0
+    assert (tmp_path / "second.mp4").read_bytes() == (tmp_path / "first.mp4").read_bytes()
+
+def test_rerender_encodes_only_changed_segments(renderer, images, tmp_path):
+    renderer.render(composition(images), tmp_path / "first.mp4", lambda stage, progress: None, {})
+    edited = composition(images, durations=(1.3, 1.1, 1.5))
+    plan = renderer.plan(edited)
+    # The edited scene's body and its incoming transition are encoded again, the rest is reused
+    assert renderer.render(edited, tmp_path / "edited.mp4", lambda stage, progress: None, {}) == plan[-1].frames + plan[-2].frames